@@ -1,24 +1,26 @@
 from __future__ import annotations
 
-import asyncio
 from itertools import cycle
 from typing import Any, MutableMapping
 
 import aiodocker
-import click
 from azure.containerregistry import RepositoryProperties
+from rich.console import RenderableType
+from textual import events
 from textual.app import App
 from textual.keys import Keys
 from textual.reactive import Reactive
 from textual.widget import Widget
 
-from . import __version__
+from . import auth
 from .azure import ContainerRegistry
-from .config import CLI_HELP, get_config
+from .config import get_config
+from .metrics import METRICS_FILE, Metrics
 from .widgets import (
     FlashWidget,
     HeaderWidget,
     HelpWidget,
+    MetricsWidget,
     RepositoriesWidget,
     SearchWidget,
     ShowFlashNotification,
@@ -33,6 +35,10 @@ class ACRBrowser(App):
     acr_name: str = ""
     config: MutableMapping[str, Any]
     config_path: str | None = None
+    use_cache: bool = True
+    refresh_cache: bool = False
+    debug: bool = False
+    metrics: Metrics | None = None
     client: ContainerRegistry
     docker: aiodocker.Docker | None = None
     show_help: Reactive[bool] = Reactive(False)
@@ -40,6 +46,7 @@ class ACRBrowser(App):
     selected_repo: Reactive[str] = Reactive("")
     searchable_nodes: Reactive[list[RepositoryProperties]] = Reactive([])
     search_result: Reactive[list[str]] = Reactive([])
+    tag_hits: dict[str, str] = {}
     widget_list: cycle[Widget] = cycle([])
 
     async def on_load(self) -> None:
@@ -50,7 +57,14 @@ class ACRBrowser(App):
         if not self.acr_name:
             self.acr_name = self.config["registry"]
         self.log(f"Registry name: {self.acr_name}")
-        self.client = ContainerRegistry(self.acr_name)
+
+        self.client = ContainerRegistry.from_config(
+            self.acr_name,
+            self.config.get("cache", {}),
+            use_cache=self.use_cache,
+            refresh=self.refresh_cache,
+            log=self.log,
+        )
 
         try:
             self.docker = aiodocker.Docker()
@@ -64,11 +78,15 @@ class ACRBrowser(App):
         await self.bind("q", "quit", "quit")
         if self.docker:
             await self.bind("p", "pull_image", "pull")
+        if self.debug:
+            self.metrics = Metrics()
+            await self.bind("m", "toggle_metrics", "metrics")
 
     async def on_mount(self) -> None:
         """Overrides on_mount from App()"""
 
-        await self.view.dock(HeaderWidget(), size=7)
+        self.header = HeaderWidget()
+        await self.view.dock(self.header, size=7)
 
         self.search = SearchWidget()
         await self.view.dock(self.search, size=3)
@@ -94,6 +112,19 @@ class ACRBrowser(App):
         self.help = HelpWidget()
         await self.view.dock(self.help, z=1)
 
+        if self.metrics is not None:
+            for widget in (
+                self.header,
+                self.search,
+                self.repositories,
+                self.tags,
+                self.properties,
+            ):
+                self.metrics.instrument(widget)
+            self.metrics_overlay = MetricsWidget(self.metrics)
+            await self.view.dock(self.metrics_overlay, edge="bottom", size=14, z=1)
+            self.metrics.start()
+
         self.widget_list = cycle(
             [self.search, self.repositories, self.tags, self.properties]
         )
@@ -113,23 +144,54 @@ class ACRBrowser(App):
 
         self.refresh(layout=True)
 
-    async def action_toggle_help(self) -> None:
-        """Toggle the help widget."""
+    async def on_event(self, event: events.Event) -> None:
+        """Overrides on_event from App(), to time key presses in debug mode.
 
-        self.show_help = not self.show_help
+        Args:
+            event (events.Event): The event.
+        """
 
-    async def run_cmd(self, cmd) -> None:
-        proc = await asyncio.create_subprocess_shell(
-            cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-        )
+        if (
+            self.metrics is not None
+            and isinstance(event, events.Key)
+            and not event.is_forwarded
+        ):
+            self.metrics.key_pressed()
+        await super().on_event(event)
+
+    def refresh(self, repaint: bool = True, layout: bool = False) -> None:
+        """Overrides refresh from App(), which paints the whole screen.
+
+        Args:
+            repaint (bool): Repaint the screen. Defaults to True.
+            layout (bool): Also lay out the widgets. Defaults to False.
+        """
+
+        super().refresh(repaint=repaint, layout=layout)
+        if self.metrics is not None:
+            self.metrics.painted()
+
+    def display(self, renderable: RenderableType) -> None:
+        """Overrides display from App(), which paints the widgets that changed.
+
+        Args:
+            renderable (RenderableType): The update to paint.
+        """
+
+        super().display(renderable)
+        if self.metrics is not None:
+            self.metrics.painted()
+
+    async def action_toggle_metrics(self) -> None:
+        """Toggle the debug mode metrics overlay."""
+
+        self.metrics_overlay.visible = not self.metrics_overlay.visible
+        self.refresh(layout=True)
 
-        stdout, stderr = await proc.communicate()
+    async def action_toggle_help(self) -> None:
+        """Toggle the help widget."""
 
-        self.log(f"[{cmd!r} exited with {proc.returncode}]")
-        if stdout:
-            self.log(f"[stdout]\n{stdout.decode()}")
-        if stderr:
-            self.log(f"[stderr]\n{stderr.decode()}")
+        self.show_help = not self.show_help
 
     async def action_pull_image(self) -> None:
         """Pull an image with docker."""
@@ -150,9 +212,56 @@ class ACRBrowser(App):
         )
 
         self.log("Logging in to ACR")
-        await self.run_cmd(f"az acr login -n {self.acr_name}")
+        server = f"{self.acr_name}.azurecr.io"
+        try:
+            password = await auth.get_acr_refresh_token(self.acr_name)
+        except Exception as e:
+            # The token can fail to be fetched for many reasons, such as an expired login or a network error, none
+            # of which should close the app.
+            await self.show_pull_error(f"Logging in to {server} failed: {e}")
+            return
+
         self.log(f"Pulling image: {image}")
-        await self.run_cmd(f"docker pull {self.acr_name}.azurecr.io/{image}")
+        try:
+            await self.docker.images.pull(
+                f"{server}/{self.selected_repo}",
+                tag=self.selected_tag.name,
+                auth={
+                    "username": auth.ACR_REFRESH_TOKEN_USERNAME,
+                    "password": password,
+                    "serveraddress": server,
+                },
+            )
+        except aiodocker.exceptions.DockerError as e:
+            await self.show_pull_error(f"Pulling {image} failed: {e.message}")
+            return
+        self.client.invalidate_tags(self.selected_repo)
+
+    async def show_pull_error(self, message: str) -> None:
+        """Log an image pull error and show it in the flash area.
+
+        Args:
+            message (str): The error message.
+        """
+
+        self.log(message)
+        await self.handle_show_flash_notification(
+            ShowFlashNotification(
+                self,
+                type=FlashMessageType.ERROR,
+                value=message,
+            )
+        )
+
+    async def action_quit(self) -> None:
+        """Close shared connections and quit the app."""
+
+        if self.metrics is not None:
+            self.metrics.stop()
+            self.metrics.dump()
+            self.log(f"Metrics written to {METRICS_FILE}")
+        await auth.close()
+        await super().action_quit()
 
     async def action_select_search(self) -> None:
         """Focus on the search widget."""
@@ -194,25 +303,22 @@ class ACRBrowser(App):
             self.show_help = False
 
 
-@click.command(help=CLI_HELP)
-@click.argument("registry", nargs=1, required=False)
-@click.option(
-    "--debug",
-    is_flag=True,
-    help="Enable debug mode.",
-)
-@click.version_option(__version__)
-def run(registry: str, debug: bool) -> None:
-    """The entry point.
+def run(registry: str, debug: bool, no_cache: bool, refresh: bool) -> None:
+    """Run the browser.
 
     Args:
         registry (str): The container registry to browse.
         debug (bool): Enable debug mode.
+        no_cache (bool): Disable the on-disk catalog cache.
+        refresh (bool): Bypass cached entries, but still store freshly fetched ones.
     """
 
     title = "ACR Browser"
     app = ACRBrowser
     app.acr_name = registry
+    app.use_cache = not no_cache
+    app.refresh_cache = refresh
+    app.debug = debug
     if debug:
         app.run(log="azurecr-browser.log", title=title)
     else:
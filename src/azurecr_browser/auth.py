@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import functools
+import json
+import time
+from typing import TYPE_CHECKING, Any
+
+from azure.core.credentials import AccessToken
+
+# The HTTP and identity libraries take a few hundred milliseconds to import, so they are only imported once a request
+# is made. Commands answered from the cache never need them.
+if TYPE_CHECKING:
+    import aiohttp
+    from azure.core.pipeline.transport import AioHttpTransport
+
+AUDIENCE = "https://management.azure.com"
+
+# Tokens are refreshed in the background once they are this close to expiring.
+REFRESH_MARGIN = 5 * 60
+
+# The username ACR expects when logging in with a refresh token.
+ACR_REFRESH_TOKEN_USERNAME = "00000000-0000-0000-0000-000000000000"
+
+_credential: CachedCredential | None = None
+_session: aiohttp.ClientSession | None = None
+_refresh_tokens: dict[str, AccessToken] = {}
+
+
+class CachedCredential:
+    """A credential that caches the tokens of another credential and refreshes them before they expire.
+
+    AzureCliCredential runs `az account get-access-token` for every token it hands out, which takes seconds. Cached
+    tokens are returned immediately, and tokens that are about to expire are refreshed in the background while the
+    current one is still being used.
+    """
+
+    def __init__(self, credential: Any, refresh_margin: float = REFRESH_MARGIN) -> None:
+        """A credential that caches the tokens of another credential and refreshes them before they expire.
+
+        Args:
+            credential (Any): The async credential to get tokens from.
+            refresh_margin (float): Seconds before expiry at which a token is refreshed. Defaults to 5 minutes.
+        """
+
+        self.credential = credential
+        self.refresh_margin = refresh_margin
+        self.tokens: dict[tuple[str, ...], AccessToken] = {}
+        self.refreshing: dict[tuple[str, ...], asyncio.Future] = {}
+        # The event loop only keeps weak references to tasks, so background refreshes are referenced until they finish.
+        self.background: dict[tuple[str, ...], asyncio.Future] = {}
+
+    async def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+        """Get a token for the given scopes, from the cache if possible.
+
+        Args:
+            *scopes (str): The scopes the token is for.
+            **kwargs (Any): Passed on to the underlying credential.
+
+        Returns:
+            AccessToken: A valid access token.
+        """
+
+        if kwargs.get("claims"):
+            # Claims challenges need a new token, so they can't be answered from the cache.
+            return await self.credential.get_token(*scopes, **kwargs)
+
+        token = self.tokens.get(scopes)
+        now = time.time()
+        if token is None or token.expires_on <= now:
+            return await self.refresh(scopes, **kwargs)
+
+        if token.expires_on - now <= self.refresh_margin and not (
+            scopes in self.refreshing or scopes in self.background
+        ):
+            task = asyncio.ensure_future(self.refresh_in_background(scopes, **kwargs))
+            self.background[scopes] = task
+            task.add_done_callback(lambda _: self.background.pop(scopes, None))
+        return token
+
+    async def refresh_in_background(
+        self, scopes: tuple[str, ...], **kwargs: Any
+    ) -> None:
+        """Refresh a token that is still valid, ignoring failures.
+
+        Args:
+            scopes (tuple[str, ...]): The scopes the token is for.
+            **kwargs (Any): Passed on to the underlying credential.
+        """
+
+        try:
+            await self.refresh(scopes, **kwargs)
+        except Exception:
+            # The current token is still valid; the next call will try again.
+            pass
+
+    async def refresh(self, scopes: tuple[str, ...], **kwargs: Any) -> AccessToken:
+        """Fetch a new token for the given scopes, sharing the request with concurrent callers.
+
+        Args:
+            scopes (tuple[str, ...]): The scopes the token is for.
+            **kwargs (Any): Passed on to the underlying credential.
+
+        Returns:
+            AccessToken: The new access token.
+        """
+
+        request = self.refreshing.get(scopes)
+        if request is None:
+            request = asyncio.ensure_future(
+                self.credential.get_token(*scopes, **kwargs)
+            )
+            self.refreshing[scopes] = request
+            # Done callbacks run even if every caller has been cancelled, so a finished request is never reused.
+            request.add_done_callback(functools.partial(self.refreshed, scopes))
+
+        # A cancelled caller must not cancel the request the other callers are waiting for.
+        return await asyncio.shield(request)
+
+    def refreshed(self, scopes: tuple[str, ...], request: asyncio.Future) -> None:
+        """Cache the token of a finished request, and let the next refresh of its scopes make a new one.
+
+        Args:
+            scopes (tuple[str, ...]): The scopes the token is for.
+            request (asyncio.Future): The finished request.
+        """
+
+        if self.refreshing.get(scopes) is request:
+            del self.refreshing[scopes]
+        if not request.cancelled() and request.exception() is None:
+            self.tokens[scopes] = request.result()
+
+    async def close(self) -> None:
+        """Stop refreshing in the background, and close the underlying credential."""
+
+        for task in self.background.values():
+            task.cancel()
+        await self.credential.close()
+
+    async def __aenter__(self) -> CachedCredential:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        # The credential is shared by the whole process, so it outlives any single client.
+        pass
+
+
+def get_credential() -> CachedCredential:
+    """Get the credential shared by the whole process.
+
+    Returns:
+        CachedCredential: A caching wrapper around AzureCliCredential.
+    """
+
+    from azure.identity.aio import AzureCliCredential
+
+    global _credential
+    if _credential is None:
+        _credential = CachedCredential(AzureCliCredential())
+    return _credential
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Get the HTTP session shared by the whole process, so connections are pooled and reused.
+
+    Returns:
+        aiohttp.ClientSession: The shared session.
+    """
+
+    import aiohttp
+
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=64, ttl_dns_cache=300)
+        _session = aiohttp.ClientSession(connector=connector)
+    return _session
+
+
+def get_transport() -> AioHttpTransport:
+    """Get a transport for Azure SDK clients that uses the shared HTTP session.
+
+    Returns:
+        AioHttpTransport: A transport that does not close the shared session when its client is closed.
+    """
+
+    from azure.core.pipeline.transport import AioHttpTransport
+
+    return AioHttpTransport(session=get_session(), session_owner=False)
+
+
+async def close() -> None:
+    """Close the shared session and credential."""
+
+    global _credential, _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+    if _credential is not None:
+        await _credential.close()
+        _credential = None
+
+
+def token_expiry(token: str) -> float:
+    """Read the expiry time of a JWT, without verifying it.
+
+    Args:
+        token (str): The JWT.
+
+    Returns:
+        float: When the token expires, in seconds since the epoch.
+    """
+
+    payload = token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+
+
+async def get_acr_refresh_token(acr_name: str) -> str:
+    """Get an ACR refresh token, which can be used as a password to log in to the registry.
+
+    The cached Azure AD token is exchanged for the refresh token, which is itself cached until shortly before it
+    expires. This replaces `az acr login`.
+
+    Args:
+        acr_name (str): Name of the container registry.
+
+    Returns:
+        str: The refresh token.
+    """
+
+    token = _refresh_tokens.get(acr_name)
+    if token is not None and token.expires_on - time.time() > REFRESH_MARGIN:
+        return token.token
+
+    aad_token = await get_credential().get_token(f"{AUDIENCE}/.default")
+    service = f"{acr_name}.azurecr.io"
+    async with get_session().post(
+        f"https://{service}/oauth2/exchange",
+        data={
+            "grant_type": "access_token",
+            "service": service,
+            "access_token": aad_token.token,
+        },
+    ) as response:
+        response.raise_for_status()
+        refresh_token = (await response.json())["refresh_token"]
+
+    _refresh_tokens[acr_name] = AccessToken(
+        refresh_token, int(token_expiry(refresh_token))
+    )
+    return refresh_token
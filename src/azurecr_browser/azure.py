@@ -1,27 +1,616 @@
 from __future__ import annotations
 
-from azure.containerregistry import ArtifactTagProperties
-from azure.containerregistry.aio import ContainerRegistryClient
-from azure.identity.aio import AzureCliCredential
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Mapping,
+    cast,
+)
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from .auth import AUDIENCE, get_credential, get_transport
+from .cache import (
+    MAX_SIZE,
+    MEMORY_MAX_ENTRIES,
+    MEMORY_MAX_SIZE,
+    REPOSITORIES_TTL,
+    TAGS_TTL,
+    CacheEntry,
+    CatalogCache,
+    ManifestCache,
+    TagsLRUCache,
+)
+from .tagstore import TagStore
+
+if TYPE_CHECKING:
+    from azure.containerregistry import ArtifactTagProperties
+    from azure.containerregistry.aio import ContainerRegistryClient
+    from azure.core.async_paging import AsyncPageIterator
+
+# Number of tags requested per page.
+TAGS_PAGE_SIZE = 100
+
+# Maximum number of partially loaded repositories to hold on to.
+MAX_TAG_PAGERS = 64
+
+# Number of tags shown when only the most recently updated tags are wanted.
+LATEST_TAGS = 20
+
+
+def enum_value(value: Any) -> Any:
+    """Get the value of an enum, or the value itself if it is not an enum.
+
+    Args:
+        value (Any): The value.
+
+    Returns:
+        Any: A JSON serializable value.
+    """
+
+    return getattr(value, "value", value)
+
+
+def manifest_size(properties: Any) -> int | None:
+    """Get the size of a manifest from its properties.
+
+    Args:
+        properties (Any): The manifest properties returned by the SDK.
+
+    Returns:
+        int | None: The size in bytes, or None if the service does not report it.
+    """
+
+    # Older versions of the SDK call this "size".
+    return getattr(properties, "size_in_bytes", None) or getattr(
+        properties, "size", None
+    )
+
+
+class TagPager:
+    """Loads the tags of a repository one service page at a time."""
+
+    def __init__(
+        self,
+        registry: ContainerRegistry,
+        name: str,
+        page_size: int = TAGS_PAGE_SIZE,
+    ) -> None:
+        """Loads the tags of a repository one service page at a time.
+
+        Args:
+            registry (ContainerRegistry): The registry the repository belongs to.
+            name (str): The repository name.
+            page_size (int): Number of tags to request per page. Defaults to 100.
+        """
+
+        self.registry = registry
+        self.name = name
+        self.tags = TagStore()
+        self.complete = False
+        self.lock = asyncio.Lock()
+        # by_page() is annotated as a plain AsyncIterator, but returns a page iterator that knows its continuation
+        # token.
+        self.pages = cast(
+            "AsyncPageIterator[ArtifactTagProperties]",
+            registry.client.list_tag_properties(
+                name, results_per_page=page_size
+            ).by_page(),
+        )
+
+    @property
+    def continuation_token(self) -> str | None:
+        """The token the service needs to return the next page.
+
+        Returns:
+            str | None: The continuation token, or None if no page has been fetched or there are no more pages.
+        """
+
+        return self.pages.continuation_token
+
+    @property
+    def total(self) -> str:
+        """A description of how many tags the repository has.
+
+        Returns:
+            str: The number of tags loaded so far, prefixed with "at least" if there are more to load.
+        """
+
+        return str(len(self.tags)) if self.complete else f"at least {len(self.tags)}"
+
+    async def ensure(self, count: int) -> TagStore:
+        """Fetch pages until at least the given number of tags is loaded, or there are no more tags.
+
+        The tag listeners are passed the tags loaded so far, so that they are searchable before the last page has
+        arrived. Once it has, the tags are stored in the registry's caches instead.
+
+        Args:
+            count (int): The number of tags needed.
+
+        Returns:
+            TagStore: The tags loaded so far.
+        """
+
+        async with self.lock:
+            loaded = len(self.tags)
+            while len(self.tags) < count and not self.complete:
+                page = await self.pages.__anext__()
+                # Only the compact form of the tags is kept, not the SDK objects.
+                self.tags.extend([tag async for tag in page])
+                if self.continuation_token is None:
+                    self.complete = True
+                    self.registry.store_tags(self.name, self.tags)
+            # The listeners replace all of the tags of a repository, so they are only notified once per call.
+            if not self.complete and len(self.tags) > loaded:
+                self.registry.notify_tags(self.name, self.tags)
+
+        return self.tags
+
+    async def fetch_all(self) -> TagStore:
+        """Fetch all of the remaining pages.
+
+        Returns:
+            TagStore: All of the tags in the repository.
+        """
+
+        return await self.ensure(sys.maxsize)
 
 
 class ContainerRegistry:
-    def __init__(self, acr_name: str):
-        credential = AzureCliCredential()
-        self.client = ContainerRegistryClient(
-            f"https://{acr_name}.azurecr.io",
-            credential,
-            audience="https://management.azure.com",
+    def __init__(
+        self,
+        acr_name: str,
+        cache: CatalogCache | None = None,
+        tag_cache: TagsLRUCache | None = None,
+        manifest_cache: ManifestCache | None = None,
+    ):
+        self.acr_name = acr_name
+        self._client: ContainerRegistryClient | None = None
+        self.cache = cache
+        self.tag_cache = tag_cache if tag_cache is not None else TagsLRUCache()
+        self.manifest_cache = (
+            manifest_cache
+            if manifest_cache is not None
+            else ManifestCache(persist=False)
         )
+        self.pending_tags: dict[str, asyncio.Future] = {}
+        self.tag_waiters: dict[str, int] = {}
+        self.tag_pagers: OrderedDict[str, TagPager] = OrderedDict()
+        # Called with a repository name and its tags whenever they are fetched or read from disk. A repository whose
+        # tags are paged through is passed the tags loaded so far after every page, which replace the previous ones.
+        self.tag_listeners: list[Callable[[str, TagStore], None]] = []
+        # The sizes of manifests whose properties were fetched without downloading the manifest itself.
+        self.manifest_sizes: dict[str, int | None] = {}
+
+    @property
+    def client(self) -> ContainerRegistryClient:
+        """The SDK client, created when the first request is made.
+
+        Creating it loads the SDK's HTTP and identity libraries, which commands answered from the cache never need.
+
+        Returns:
+            ContainerRegistryClient: The client.
+        """
+
+        if self._client is None:
+            from azure.containerregistry.aio import ContainerRegistryClient
+
+            self._client = ContainerRegistryClient(
+                f"https://{self.acr_name}.azurecr.io",
+                get_credential(),
+                audience=AUDIENCE,
+                transport=get_transport(),
+            )
+        return self._client
+
+    @client.setter
+    def client(self, client: ContainerRegistryClient) -> None:
+        self._client = client
+
+    @classmethod
+    def from_config(
+        cls,
+        acr_name: str,
+        cache_config: Mapping[str, Any],
+        use_cache: bool = True,
+        refresh: bool = False,
+        log: Callable[..., Any] | None = None,
+    ) -> ContainerRegistry:
+        """Create a client with caches set up from the [cache] section of the configuration file.
+
+        Args:
+            acr_name (str): Name of the container registry.
+            cache_config (Mapping[str, Any]): The cache configuration.
+            use_cache (bool): Read and write the on-disk caches. Defaults to True.
+            refresh (bool): Bypass cached entries, but still store freshly fetched ones. Defaults to False.
+            log (Callable[..., Any] | None): Function used to log cache entries that cannot be written. Defaults to
+                None.
+
+        Returns:
+            ContainerRegistry: The client.
+        """
+
+        tag_cache = TagsLRUCache(
+            max_entries=cache_config.get("memory_max_entries", MEMORY_MAX_ENTRIES),
+            max_size=cache_config.get("memory_max_size", MEMORY_MAX_SIZE),
+        )
+        cache = None
+        if use_cache:
+            cache = CatalogCache(
+                acr_name,
+                repositories_ttl=cache_config.get("repositories_ttl", REPOSITORIES_TTL),
+                tags_ttl=cache_config.get("tags_ttl", TAGS_TTL),
+                max_size=cache_config.get("max_size", MAX_SIZE),
+                refresh=refresh,
+                log=log,
+            )
+        return cls(
+            acr_name,
+            cache=cache,
+            tag_cache=tag_cache,
+            manifest_cache=ManifestCache(persist=use_cache, log=log),
+        )
+
+    def cached_repositories(self) -> CacheEntry[list[str]] | None:
+        """Get the repository names from the cache, without calling Azure.
+
+        Returns:
+            CacheEntry[list[str]] | None: The cached repository names, or None if there are none.
+        """
+
+        return self.cache.get_repositories() if self.cache else None
+
+    def cached_tags(self, name: str) -> CacheEntry[TagStore] | None:
+        """Get the tags of a repository from the cache, without calling Azure.
+
+        Args:
+            name (str): The repository name.
+
+        Returns:
+            CacheEntry[TagStore] | None: The cached tags, or None if there are none.
+        """
+
+        entry = self.tag_cache.get(name)
+        if entry is None and self.cache:
+            entry = self.cache.get_tags(name)
+            if entry is not None:
+                self.tag_cache.put(name, entry)
+                self.notify_tags(name, entry.value)
+        return entry
+
+    def has_tags(self, name: str) -> bool:
+        """Check whether the tags of a repository are cached, without reading them.
+
+        Args:
+            name (str): The repository name.
+
+        Returns:
+            bool: True if the tags are cached in memory or on disk.
+        """
+
+        pager = self.tag_pagers.get(name)
+        return (
+            name in self.tag_cache
+            or bool(pager and pager.tags)
+            or bool(self.cache and self.cache.has_tags(name))
+        )
+
+    def tag_pager(self, name: str) -> TagPager:
+        """Get a pager for the tags of a repository.
+
+        Pagers are shared, so pages fetched by one caller, such as a prefetch, are available to the others.
+
+        Args:
+            name (str): The repository name.
+
+        Returns:
+            TagPager: The pager.
+        """
+
+        pager = self.tag_pagers.get(name)
+        if pager is None:
+            pager = TagPager(self, name)
+            self.tag_pagers[name] = pager
+            while len(self.tag_pagers) > MAX_TAG_PAGERS:
+                self.tag_pagers.popitem(last=False)
+        else:
+            self.tag_pagers.move_to_end(name)
+        return pager
+
+    def store_tags(self, name: str, tags: TagStore) -> None:
+        """Cache the complete list of tags of a repository.
+
+        Args:
+            name (str): The repository name.
+            tags (TagStore): All of the tags in the repository.
+        """
+
+        self.tag_pagers.pop(name, None)
+        ttl = self.cache.tags_ttl if self.cache else TAGS_TTL
+        self.tag_cache.put(name, CacheEntry(tags, time.time(), ttl))
+        if self.cache:
+            self.cache.set_tags(name, tags)
+        self.notify_tags(name, tags)
+
+    def notify_tags(self, name: str, tags: TagStore) -> None:
+        """Pass the tags of a repository to the tag listeners.
+
+        Args:
+            name (str): The repository name.
+            tags (TagStore): All of the tags in the repository, or those loaded so far if it is being paged through.
+        """
+
+        for listener in self.tag_listeners:
+            listener(name, tags)
+
+    def invalidate_tags(self, name: str) -> None:
+        """Discard the cached tags of a repository, for example after it has been changed.
+
+        Args:
+            name (str): The repository name.
+        """
+
+        # A partially loaded pager would otherwise keep serving the pages it fetched before the change.
+        self.tag_pagers.pop(name, None)
+        self.tag_cache.invalidate(name)
+        if self.cache:
+            self.cache.invalidate_tags(name)
+
+    async def iter_repositories(
+        self, page_size: int | None = None
+    ) -> AsyncIterator[list[str]]:
+        """Stream repository names one catalog page at a time.
+
+        The complete catalog is written to the cache once the last page has arrived.
+
+        Args:
+            page_size (int | None): Number of names to request per page. Defaults to the service default.
+
+        Yields:
+            list[str]: The repository names contained in the next page.
+        """
+
+        repos = []
+        pages = self.client.list_repository_names(results_per_page=page_size).by_page()
+        async for page in pages:
+            names = [name async for name in page]
+            repos.extend(names)
+            yield names
+
+        if self.cache:
+            self.cache.set_repositories(repos)
 
     async def get_repositories(self) -> list[str]:
         repos = []
-        async for p in self.client.list_repository_names():
-            repos.append(p)
+        async for page in self.iter_repositories():
+            repos.extend(page)
         return repos
 
-    async def get_tags(self, name: str) -> list[ArtifactTagProperties]:
-        properties = []
-        async for p in self.client.list_tag_properties(name):
-            properties.append(p)
-        return properties
+    async def get_tags(self, name: str) -> TagStore:
+        """Get the tags of a repository from the cache, or fetch and cache them if they are missing or stale.
+
+        Concurrent calls for the same repository share a single request, which is cancelled once every caller
+        waiting on it has been cancelled.
+
+        Args:
+            name (str): The repository name.
+
+        Returns:
+            TagStore: The tags.
+        """
+
+        cached = self.cached_tags(name)
+        if cached is not None and cached.fresh:
+            return cached.value
+
+        request = self.pending_tags.get(name)
+        if request is None:
+            request = asyncio.ensure_future(self.list_tags(name))
+            self.pending_tags[name] = request
+            self.tag_waiters[name] = 0
+
+        self.tag_waiters[name] += 1
+        try:
+            return await asyncio.shield(request)
+        finally:
+            self.tag_waiters[name] -= 1
+            if self.tag_waiters[name] == 0:
+                del self.tag_waiters[name]
+                del self.pending_tags[name]
+                request.cancel()
+
+    async def get_latest_tags(self, name: str, count: int = LATEST_TAGS) -> TagStore:
+        """Get the most recently updated tags of a repository, newest first.
+
+        The service sorts the tags, so this takes a single request however many tags the repository has. If all of
+        the tags are cached they are sorted locally instead.
+
+        Args:
+            name (str): The repository name.
+            count (int): Number of tags to get. Defaults to 20.
+
+        Returns:
+            TagStore: Up to count of the most recently updated tags.
+        """
+
+        cached = self.cached_tags(name)
+        if cached and cached.fresh:
+            return cached.value.latest(count)
+
+        pages = self.client.list_tag_properties(
+            name,
+            # The enum holding this value was renamed between SDK versions, but the value itself was not.
+            order_by="timedesc",
+            results_per_page=count,
+        ).by_page()
+        async for page in pages:
+            return TagStore([tag async for tag in page][:count])
+        return TagStore()
+
+    async def get_tags_many(
+        self,
+        names: Iterable[str],
+        concurrency: int = 8,
+        on_error: Callable[[str, Exception], None] | None = None,
+        latest: int | None = None,
+    ) -> AsyncIterator[tuple[str, TagStore]]:
+        """Fetch the tags of many repositories concurrently, yielding each result as soon as it completes.
+
+        All requests go through the same client, and so share its connection pool. Workers only move on to the
+        next repository once their previous result has been queued, so a slow consumer holds back the requests
+        rather than letting results pile up in memory. Repositories deleted since they were listed are skipped, and
+        tags that are cached and fresh are yielded without calling Azure.
+
+        Args:
+            names (Iterable[str]): The repository names. This can be a lazy iterable.
+            concurrency (int): Maximum number of requests in flight at once. Defaults to 8.
+            on_error (Callable[[str, Exception], None] | None): Called with the repository name and the error when
+                fetching the tags of a repository fails, after which the other repositories are still fetched.
+                Defaults to None, which stops at the first error.
+            latest (int | None): Only get this many of the most recently updated tags of each repository. Defaults
+                to all of the tags.
+
+        Yields:
+            tuple[str, TagStore]: A repository name and its tags.
+
+        Raises:
+            result: The first error raised while fetching tags, other than a missing repository, unless on_error is
+                given.
+        """
+
+        remaining = iter(names)
+        results: asyncio.Queue[Any] = asyncio.Queue(maxsize=concurrency)
+        done = object()
+
+        async def worker() -> None:
+            # Every worker pulls from the same iterator, so each repository is fetched once.
+            for name in remaining:
+                try:
+                    if latest is None:
+                        tags = await self.get_tags(name)
+                    else:
+                        tags = await self.get_latest_tags(name, latest)
+                except ResourceNotFoundError:
+                    continue
+                except Exception as e:
+                    if on_error is None:
+                        raise
+                    on_error(name, e)
+                    continue
+                await results.put((name, tags))
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+
+        async def run() -> None:
+            try:
+                await asyncio.gather(*workers)
+            except Exception as e:
+                await results.put(e)
+            else:
+                await results.put(done)
+
+        runner = asyncio.ensure_future(run())
+        try:
+            while True:
+                result = await results.get()
+                if result is done:
+                    break
+                if isinstance(result, Exception):
+                    raise result
+                yield result
+        finally:
+            # gather does not cancel the other workers when one of them fails, and a worker whose result is never
+            # taken would wait on the full queue forever, so they are all stopped here.
+            for task in (runner, *workers):
+                task.cancel()
+            await asyncio.gather(runner, *workers, return_exceptions=True)
+
+    async def get_manifest_properties(self, name: str, digest: str) -> dict[str, Any]:
+        """Get the size, platform, media type and layer count of a manifest.
+
+        Manifests never change, so the properties are cached by digest and every later call for the same digest,
+        from any tag or repository, is answered without calling Azure.
+
+        Args:
+            name (str): The repository name.
+            digest (str): The manifest digest.
+
+        Returns:
+            dict[str, Any]: The manifest properties. Properties the service does not report are None.
+        """
+
+        cached = self.manifest_cache.get(digest)
+        if cached is not None:
+            return cached
+
+        properties = await self.client.get_manifest_properties(name, digest)
+        result: dict[str, Any] = {
+            "size": manifest_size(properties),
+            "architecture": enum_value(properties.architecture),
+            "operating_system": enum_value(properties.operating_system),
+            "media_type": None,
+            "layers": None,
+        }
+
+        # Only newer versions of the SDK can download the manifest itself.
+        if hasattr(self.client, "get_manifest"):
+            manifest = await self.client.get_manifest(name, digest)
+            content = manifest.manifest or {}
+            result["media_type"] = manifest.media_type or content.get("mediaType")
+            # An image index lists the manifests of its platforms instead of layers.
+            result["layers"] = len(content.get("layers", content.get("manifests", [])))
+
+        self.manifest_cache.set(digest, result)
+        return result
+
+    def peek_manifest_size(self, digest: str) -> int | None:
+        """Get the size of a manifest if it is already known, without calling Azure or reading the disk.
+
+        Args:
+            digest (str): The manifest digest.
+
+        Returns:
+            int | None: The size in bytes, or None if it is not known.
+        """
+
+        if digest in self.manifest_sizes:
+            return self.manifest_sizes[digest]
+        properties = self.manifest_cache.peek(digest)
+        return properties.get("size") if properties else None
+
+    async def get_manifest_size(self, name: str, digest: str) -> int | None:
+        """Get the size of a manifest.
+
+        Unlike get_manifest_properties this takes a single request for the manifest properties, and never downloads
+        the manifest itself.
+
+        Args:
+            name (str): The repository name.
+            digest (str): The manifest digest.
+
+        Returns:
+            int | None: The size in bytes, or None if the service does not report it.
+        """
+
+        if digest in self.manifest_sizes:
+            return self.manifest_sizes[digest]
+
+        cached = self.manifest_cache.get(digest)
+        if cached is not None:
+            size = cached.get("size")
+        else:
+            size = manifest_size(
+                await self.client.get_manifest_properties(name, digest)
+            )
+        self.manifest_sizes[digest] = size
+        return size
+
+    async def list_tags(self, name: str) -> TagStore:
+        return await self.tag_pager(name).fetch_all()
@@ -0,0 +1,497 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, TypeVar
+
+from .index import IndexSnapshot, read_snapshot, write_snapshot
+from .tagstore import TagStore
+
+T = TypeVar("T")
+
+# Defaults
+REPOSITORIES_TTL = 15 * 60
+TAGS_TTL = 15 * 60
+MAX_SIZE = 64 * 1024 * 1024
+MEMORY_MAX_ENTRIES = 256
+MEMORY_MAX_SIZE = 32 * 1024 * 1024
+
+# Manifests are content-addressed, so cached manifest properties are shared by every registry and never expire.
+MANIFESTS_DIR = "manifests"
+
+# The search index of a registry is persisted next to its catalog, so it does not have to be rebuilt on startup.
+SEARCH_INDEX_FILE = "search-index.bin"
+
+
+def write_json(path: str, data: Any) -> int:
+    """Write a JSON file atomically.
+
+    The data is written to a temporary file first, so that readers never see a partially written file.
+
+    Args:
+        path (str): The file to write.
+        data (Any): The JSON serializable data.
+
+    Returns:
+        int: The size of the file in bytes.
+
+    Raises:
+        OSError: If the file cannot be written. The temporary file is removed.
+    """
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+    return os.path.getsize(path)
+
+
+def user_cache_dir() -> str:
+    """Get the directory the application caches data in.
+
+    Returns:
+        str: The platform specific cache directory for azurecr-browser.
+    """
+
+    if sys.platform == "win32":
+        base = os.getenv("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+
+    return os.path.join(base, "azurecr-browser")
+
+
+class CacheEntry(Generic[T]):
+    """A value read from the cache."""
+
+    def __init__(self, value: T, stored_at: float, ttl: float) -> None:
+        """A value read from the cache.
+
+        Args:
+            value (T): The cached value.
+            stored_at (float): When the value was stored, in seconds since the epoch.
+            ttl (float): How long the value is considered fresh for, in seconds.
+        """
+
+        self.value = value
+        self.stored_at = stored_at
+        self.ttl = ttl
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the value is young enough to be used without revalidating it.
+
+        Returns:
+            bool: True if the value is younger than its TTL.
+        """
+
+        return time.time() - self.stored_at < self.ttl
+
+
+class TagsLRUCache:
+    """An in-memory cache of the tags of each repository.
+
+    The least recently used repositories are evicted once either the number of cached repositories or the
+    approximate size of their tags exceeds its limit.
+    """
+
+    def __init__(
+        self, max_entries: int = MEMORY_MAX_ENTRIES, max_size: int = MEMORY_MAX_SIZE
+    ) -> None:
+        """An in-memory cache of the tags of each repository.
+
+        Args:
+            max_entries (int): Maximum number of repositories to hold tags for. Defaults to 256.
+            max_size (int): Maximum approximate size of the cached tags in bytes. Defaults to 32 MiB.
+        """
+
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[CacheEntry[TagStore], int]] = (
+            OrderedDict()
+        )
+
+    def __contains__(self, repository: object) -> bool:
+        return repository in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, repository: str) -> CacheEntry[TagStore] | None:
+        """Get the tags of a repository, marking them as recently used.
+
+        Args:
+            repository (str): The repository name.
+
+        Returns:
+            CacheEntry[TagStore] | None: The tags, or None if they are not cached.
+        """
+
+        item = self._entries.get(repository)
+        if item is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(repository)
+        return item[0]
+
+    def put(self, repository: str, entry: CacheEntry[TagStore]) -> None:
+        """Store the tags of a repository, evicting the least recently used tags if needed.
+
+        Args:
+            repository (str): The repository name.
+            entry (CacheEntry[TagStore]): The tags to store.
+        """
+
+        self.invalidate(repository)
+
+        size = entry.value.nbytes
+        if size > self.max_size:
+            return
+
+        self._entries[repository] = (entry, size)
+        self.size += size
+        while len(self._entries) > self.max_entries or self.size > self.max_size:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def invalidate(self, repository: str) -> None:
+        """Remove the tags of a repository.
+
+        Args:
+            repository (str): The repository name.
+        """
+
+        item = self._entries.pop(repository, None)
+        if item is not None:
+            self.size -= item[1]
+
+    def clear(self) -> None:
+        """Remove all cached tags."""
+
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict[str, int]:
+        """Get usage statistics for the cache.
+
+        Returns:
+            dict[str, int]: Hit and miss counters, the number of entries and their approximate size.
+        """
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "size": self.size,
+        }
+
+
+class ManifestCache:
+    """A cache of manifest properties, keyed by digest.
+
+    A digest identifies the content of a manifest, so the properties of a digest never change and entries are never
+    revalidated. Entries are kept in memory and, unless disabled, on disk.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        persist: bool = True,
+        log: Callable[..., Any] | None = None,
+    ) -> None:
+        """A cache of manifest properties, keyed by digest.
+
+        Args:
+            path (str | None): Directory to store the cache in. Defaults to the user's cache directory.
+            persist (bool): Read and write entries on disk, as well as in memory. Defaults to True.
+            log (Callable[..., Any] | None): Function used to log entries that cannot be written. Defaults to None.
+        """
+
+        self.path = os.path.join(path or user_cache_dir(), MANIFESTS_DIR)
+        self.persist = persist
+        self.log = log
+        self._entries: dict[str, dict[str, Any]] = {}
+
+    def __contains__(self, digest: object) -> bool:
+        return digest in self._entries
+
+    def get(self, digest: str) -> dict[str, Any] | None:
+        """Get the properties of a manifest.
+
+        Args:
+            digest (str): The manifest digest.
+
+        Returns:
+            dict[str, Any] | None: The manifest properties, or None if they are not cached.
+        """
+
+        properties = self._entries.get(digest)
+        if properties is None and self.persist:
+            try:
+                with open(self._file(digest)) as f:
+                    properties = json.load(f)
+            except (OSError, ValueError):
+                return None
+            self._entries[digest] = properties
+        return properties
+
+    def peek(self, digest: str) -> dict[str, Any] | None:
+        """Get the properties of a manifest if they are in memory, without reading them from disk.
+
+        Args:
+            digest (str): The manifest digest.
+
+        Returns:
+            dict[str, Any] | None: The manifest properties, or None if they are not in memory.
+        """
+
+        return self._entries.get(digest)
+
+    def set(self, digest: str, properties: dict[str, Any]) -> None:
+        """Store the properties of a manifest.
+
+        If they cannot be written to disk they are only kept in memory.
+
+        Args:
+            digest (str): The manifest digest.
+            properties (dict[str, Any]): The manifest properties. They must be JSON serializable.
+        """
+
+        self._entries[digest] = properties
+        if not self.persist:
+            return
+
+        try:
+            write_json(self._file(digest), properties)
+        except OSError as e:
+            if self.log:
+                self.log(f"Caching the manifest of {digest} failed: {e!r}")
+
+    def _file(self, digest: str) -> str:
+        # Digests look like "sha256:<hex>", and colons are not allowed in file names on Windows.
+        return os.path.join(self.path, f"{digest.replace(':', '-')}.json")
+
+
+class CatalogCache:
+    """A per-registry on-disk cache of repository names and tag properties.
+
+    Entries older than their TTL are still returned, flagged as stale, so that callers can show them straight away
+    and revalidate in the background. Entries that cannot be written are logged and dropped, as the cache is only an
+    optimization.
+    """
+
+    def __init__(
+        self,
+        registry: str,
+        path: str | None = None,
+        repositories_ttl: float = REPOSITORIES_TTL,
+        tags_ttl: float = TAGS_TTL,
+        max_size: int = MAX_SIZE,
+        refresh: bool = False,
+        log: Callable[..., Any] | None = None,
+    ) -> None:
+        """A per-registry on-disk cache of repository names and tag properties.
+
+        Args:
+            registry (str): Name of the container registry.
+            path (str | None): Directory to store the cache in. Defaults to the user's cache directory.
+            repositories_ttl (float): Seconds the repository list stays fresh for. Defaults to 15 minutes.
+            tags_ttl (float): Seconds the tags of a repository stay fresh for. Defaults to 15 minutes.
+            max_size (int): Maximum size of the cached tags in bytes. Defaults to 64 MiB.
+            refresh (bool): Ignore existing entries, but still store fresh ones. Defaults to False.
+            log (Callable[..., Any] | None): Function used to log entries that cannot be written. Defaults to None.
+        """
+
+        self.path = os.path.join(path or user_cache_dir(), registry)
+        self.tags_path = os.path.join(self.path, "tags")
+        self.repositories_ttl = repositories_ttl
+        self.tags_ttl = tags_ttl
+        self.max_size = max_size
+        self.refresh = refresh
+        self.log = log
+        self._size: int | None = None
+
+    def get_repositories(self) -> CacheEntry[list[str]] | None:
+        """Get the cached repository names.
+
+        Returns:
+            CacheEntry[list[str]] | None: The repository names, or None if they are not cached.
+        """
+
+        data = self._read(os.path.join(self.path, "repositories.json"))
+        if data is None:
+            return None
+
+        return CacheEntry(data["items"], data["stored_at"], self.repositories_ttl)
+
+    def set_repositories(self, repositories: list[str]) -> None:
+        """Store the repository names.
+
+        Args:
+            repositories (list[str]): The repository names.
+        """
+
+        try:
+            self._write(os.path.join(self.path, "repositories.json"), repositories)
+        except OSError as e:
+            self._log(f"Caching the repositories failed: {e!r}")
+
+    def get_search_index(self) -> IndexSnapshot | None:
+        """Get the persisted search index.
+
+        The index is memory-mapped and decoded lazily, so loading it is cheap even for large registries. It may be
+        out of date with the repository list, and should be updated with the difference.
+
+        Returns:
+            IndexSnapshot | None: The search index, or None if it is not cached.
+        """
+
+        if self.refresh:
+            return None
+
+        try:
+            return read_snapshot(os.path.join(self.path, SEARCH_INDEX_FILE))
+        except (OSError, ValueError):
+            return None
+
+    def set_search_index(self, snapshot: IndexSnapshot) -> None:
+        """Persist the search index.
+
+        Args:
+            snapshot (IndexSnapshot): The search index.
+        """
+
+        write_snapshot(snapshot, os.path.join(self.path, SEARCH_INDEX_FILE))
+
+    def get_tags(self, repository: str) -> CacheEntry[TagStore] | None:
+        """Get the cached tags of a repository.
+
+        Args:
+            repository (str): The repository name.
+
+        Returns:
+            CacheEntry[TagStore] | None: The tags, or None if they are not cached.
+        """
+
+        data = self._read(self._tags_file(repository))
+        if data is None:
+            return None
+
+        return CacheEntry(
+            TagStore.from_dicts(data["items"]), data["stored_at"], self.tags_ttl
+        )
+
+    def has_tags(self, repository: str) -> bool:
+        """Check whether the tags of a repository are cached, without reading them.
+
+        Args:
+            repository (str): The repository name.
+
+        Returns:
+            bool: True if there are cached tags for the repository.
+        """
+
+        return not self.refresh and os.path.exists(self._tags_file(repository))
+
+    def set_tags(self, repository: str, tags: TagStore) -> None:
+        """Store the tags of a repository, evicting the least recently stored tags if the cache grows too big.
+
+        Args:
+            repository (str): The repository name.
+            tags (TagStore): The tags.
+        """
+
+        path = self._tags_file(repository)
+        try:
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            size = self._write(path, tags.to_dicts())
+
+            if self._size is not None:
+                self._size += size - previous_size
+            self._prune()
+        except OSError as e:
+            # The size of the cache is no longer known, so it is counted again on the next write.
+            self._size = None
+            self._log(f"Caching the tags of {repository} failed: {e!r}")
+
+    def invalidate_tags(self, repository: str) -> None:
+        """Remove the cached tags of a repository.
+
+        Args:
+            repository (str): The repository name.
+        """
+
+        path = self._tags_file(repository)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            self._size = None
+            self._log(f"Removing the cached tags of {repository} failed: {e!r}")
+            return
+
+        if self._size is not None:
+            self._size -= size
+
+    def _tags_file(self, repository: str) -> str:
+        digest = hashlib.sha1(repository.encode()).hexdigest()
+        return os.path.join(self.tags_path, f"{digest}.json")
+
+    def _read(self, path: str) -> dict[str, Any] | None:
+        if self.refresh:
+            return None
+
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: str, items: list[Any]) -> int:
+        return write_json(path, {"stored_at": time.time(), "items": items})
+
+    def _log(self, message: str) -> None:
+        if self.log:
+            self.log(message)
+
+    def _prune(self) -> None:
+        if self._size is not None and self._size <= self.max_size:
+            return
+
+        entries = []
+        with os.scandir(self.tags_path) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if self._size <= self.max_size:
+                break
+            os.remove(path)
+            self._size -= size
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+from typing import Any, Callable, Coroutine, Mapping
+
+import click
+
+from . import __version__
+from .config import CLI_HELP, read_config
+
+# The commands import the modules they need when they run, so that the headless commands never import textual, rich
+# or aiodocker, and "--help" does not import the Azure SDK either.
+
+FORMATS = ("jsonl", "tsv")
+
+
+class DefaultCommandGroup(click.Group):
+    """A command group that runs its default command when it is not given another one.
+
+    This keeps "acr [REGISTRY]" opening the browser, as it did before there were other commands.
+    """
+
+    default_command = "browse"
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if not args or (
+            args[0] not in self.commands and args[0] not in ("--help", "--version")
+        ):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+def resolve_registry(registry: str | None) -> tuple[str, Mapping[str, Any]]:
+    """Find the registry to query and the cache configuration, without prompting for them.
+
+    Args:
+        registry (str | None): The registry given on the command line.
+
+    Returns:
+        tuple[str, Mapping[str, Any]]: The registry name, and the [cache] section of the configuration file.
+
+    Raises:
+        UsageError: If no registry was given and none is configured.
+    """
+
+    config = read_config() or {}
+    registry = registry or config.get("registry")
+    if not registry:
+        raise click.UsageError(
+            "No registry given and none is configured. Pass --registry, or run acr once to configure one."
+        )
+    return registry, config.get("cache", {})
+
+
+def run_headless(main: Callable[[], Coroutine[Any, Any, Any]]) -> Any:
+    """Run a headless command, and report Azure errors without a traceback.
+
+    Args:
+        main (Callable[[], Coroutine[Any, Any, Any]]): Creates the coroutine that runs the command.
+
+    Returns:
+        Any: The result of the coroutine.
+
+    Raises:
+        ClickException: If a request to Azure fails.
+    """
+
+    from azure.core.exceptions import AzureError
+
+    try:
+        return asyncio.run(main())
+    except AzureError as e:
+        raise click.ClickException(str(e))
+    except BrokenPipeError:
+        # The reader, such as head, stopped reading. Point standard output at /dev/null, so that flushing it when
+        # Python exits does not fail again.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return None
+
+
+def headless_options(command: Callable[..., Any]) -> Callable[..., Any]:
+    """Add the options shared by the headless commands.
+
+    Args:
+        command (Callable[..., Any]): The command.
+
+    Returns:
+        Callable[..., Any]: The command with the options.
+    """
+
+    for option in reversed(
+        (
+            click.option(
+                "--registry",
+                "-r",
+                help="The container registry to query. Defaults to the configured registry.",
+            ),
+            click.option(
+                "--format",
+                "output_format",
+                type=click.Choice(FORMATS),
+                default="jsonl",
+                show_default=True,
+                help="Write JSON Lines or tab separated values.",
+            ),
+            click.option(
+                "--no-cache",
+                is_flag=True,
+                help="Do not read or write the on-disk catalog cache.",
+            ),
+            click.option(
+                "--refresh",
+                is_flag=True,
+                help="Ignore the on-disk catalog cache and fetch everything from the registry.",
+            ),
+        )
+    ):
+        command = option(command)
+    return command
+
+
+@click.group(cls=DefaultCommandGroup, help=CLI_HELP)
+@click.version_option(__version__)
+def main() -> None:
+    """The entry point."""
+
+
+@main.command(help="Browse a registry in the terminal. This is the default command.")
+@click.argument("registry", nargs=1, required=False)
+@click.option(
+    "--debug",
+    is_flag=True,
+    help="Enable debug mode, which logs to azurecr-browser.log and measures render and input latencies.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not read or write the on-disk catalog cache.",
+)
+@click.option(
+    "--refresh",
+    is_flag=True,
+    help="Ignore the on-disk catalog cache and fetch everything from the registry.",
+)
+def browse(registry: str, debug: bool, no_cache: bool, refresh: bool) -> None:
+    """Browse a registry in the terminal. This is the default command.
+
+    Args:
+        registry (str): The container registry to browse.
+        debug (bool): Enable debug mode.
+        no_cache (bool): Disable the on-disk catalog cache.
+        refresh (bool): Bypass cached entries, but still store freshly fetched ones.
+    """
+
+    from .app import run
+
+    run(registry, debug, no_cache, refresh)
+
+
+@main.command(
+    name="ls",
+    help="List the repositories in a registry, writing each page as it arrives.",
+)
+@headless_options
+@click.option(
+    "--page-size",
+    type=click.IntRange(min=1),
+    help="Number of repositories to request per page. Defaults to the service default.",
+)
+def list_repositories(
+    registry: str | None,
+    output_format: str,
+    no_cache: bool,
+    refresh: bool,
+    page_size: int | None,
+) -> None:
+    """List the repositories in a registry, writing each page as it arrives.
+
+    Args:
+        registry (str | None): The container registry to query.
+        output_format (str): The output format.
+        no_cache (bool): Disable the on-disk catalog cache.
+        refresh (bool): Bypass cached entries, but still store freshly fetched ones.
+        page_size (int | None): Number of repositories to request per page.
+    """
+
+    from . import headless
+
+    acr_name, cache_config = resolve_registry(registry)
+    writer = headless.RecordWriter(headless.REPOSITORY_FIELDS, output_format)
+
+    async def run() -> None:
+        async with headless.open_registry(
+            acr_name, cache_config, use_cache=not no_cache, refresh=refresh
+        ) as client:
+            await headless.list_repositories(client, writer, page_size)
+
+    run_headless(run)
+
+
+@main.command(
+    name="tags",
+    help="List the tags of REPOSITORIES, or of every repository, writing the tags of each repository as they arrive.",
+)
+@click.argument("repositories", nargs=-1)
+@headless_options
+@click.option(
+    "--manifests",
+    is_flag=True,
+    help="Add the size, platform, media type and layer count of the manifest each tag points at.",
+)
+@click.option(
+    "--latest",
+    type=click.IntRange(min=1),
+    help="Only list this many of the most recently updated tags of each repository.",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="Number of repositories to fetch at once.",
+)
+@click.option(
+    "--manifest-concurrency",
+    type=click.IntRange(min=1),
+    default=16,
+    show_default=True,
+    help="Number of manifests to fetch at once.",
+)
+def list_tags(
+    repositories: tuple[str, ...],
+    registry: str | None,
+    output_format: str,
+    no_cache: bool,
+    refresh: bool,
+    manifests: bool,
+    latest: int | None,
+    concurrency: int,
+    manifest_concurrency: int,
+) -> None:
+    """List the tags of repositories, or of every repository, writing the tags of each repository as they arrive.
+
+    Args:
+        repositories (tuple[str, ...]): The repositories. Defaults to every repository in the registry.
+        registry (str | None): The container registry to query.
+        output_format (str): The output format.
+        no_cache (bool): Disable the on-disk catalog cache.
+        refresh (bool): Bypass cached entries, but still store freshly fetched ones.
+        manifests (bool): Add the properties of the manifest each tag points at.
+        latest (int | None): Only list this many of the most recently updated tags of each repository.
+        concurrency (int): Number of repositories to fetch at once.
+        manifest_concurrency (int): Number of manifests to fetch at once.
+
+    Raises:
+        ClickException: If any of the repositories do not exist.
+    """
+
+    from . import headless
+
+    acr_name, cache_config = resolve_registry(registry)
+    fields: tuple[str, ...] = headless.TAG_FIELDS
+    if manifests:
+        fields += headless.MANIFEST_FIELDS
+    writer = headless.RecordWriter(fields, output_format)
+
+    async def run() -> list[str]:
+        async with headless.open_registry(
+            acr_name, cache_config, use_cache=not no_cache, refresh=refresh
+        ) as client:
+            return await headless.list_tags(
+                client,
+                writer,
+                repositories,
+                manifests=manifests,
+                latest=latest,
+                concurrency=concurrency,
+                manifest_concurrency=manifest_concurrency,
+            )
+
+    missing = run_headless(run)
+    if missing:
+        raise click.ClickException(f"Repositories not found: {', '.join(missing)}")
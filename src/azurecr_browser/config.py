@@ -5,11 +5,6 @@ import re
 from typing import Any, MutableMapping
 
 import toml  # type: ignore
-from rich.console import Console
-from validators.utils import validator
-
-from . import styles
-from .ask import Ask
 
 # General
 CLI_HELP = """
@@ -17,7 +12,6 @@ azurecr-browser is a tool for managing container images and artifacts in Azure C
 """
 
 
-@validator
 def acr_name(name: str) -> bool:
     """Validate the name of the container registry.
 
@@ -43,6 +37,13 @@ def set_config(path: str) -> MutableMapping[str, Any]:
         MutableMapping[str, Any]: Configuration for the client.
     """
 
+    # Only needed to prompt for the configuration, so that the headless commands do not have to import them.
+    from rich.console import Console
+    from validators.utils import validator
+
+    from . import styles
+    from .ask import Ask
+
     config = {}
     console = Console()
     ask = Ask()
@@ -51,7 +52,8 @@ def set_config(path: str) -> MutableMapping[str, Any]:
         "Which ACR registry would you like to manage? :smiley:\n"  # noqa: E501
     )
     config["registry"] = ask.question(
-        f"[b][{styles.GREY}]Container Registry Name[/][/]", validation=acr_name
+        f"[b][{styles.GREY}]Container Registry Name[/][/]",
+        validation=validator(acr_name),
     )
     with open(path, "w") as f:
         toml.dump(config, f)
@@ -59,6 +61,31 @@ def set_config(path: str) -> MutableMapping[str, Any]:
     return toml.load(path)
 
 
+def default_config_path() -> str:
+    """Get the path of the configuration file used when no other is given.
+
+    Returns:
+        str: The path in the home directory.
+    """
+
+    home = os.getenv("HOME")
+    return f"{home}/.azurecr-browser.toml"
+
+
+def read_config(config: str | None = None) -> MutableMapping[str, Any] | None:
+    """Retrieve configuration without creating it, for commands that cannot prompt for it.
+
+    Args:
+        config (str | None): Path to the configuration file. Defaults to the default configuration file.
+
+    Returns:
+        MutableMapping[str, Any] | None: Configuration, or None if the file does not exist.
+    """
+
+    path = config or default_config_path()
+    return toml.load(path) if os.path.exists(path) else None
+
+
 def get_config(config: str | None = None) -> MutableMapping[str, Any]:
     """Retrieve or create configuration.
 
@@ -76,8 +103,7 @@ def get_config(config: str | None = None) -> MutableMapping[str, Any]:
         _config = set_config(config)
 
     else:
-        home = os.getenv("HOME")
-        config_path = f"{home}/.azurecr-browser.toml"
+        config_path = default_config_path()
 
         if not os.path.exists(config_path):
             _config = set_config(config_path)
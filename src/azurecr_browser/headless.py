@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable, Mapping, Sequence, TextIO
+
+from . import auth
+from .azure import ContainerRegistry
+from .tagstore import TagRecord, isoformat
+
+REPOSITORY_FIELDS = ("repository",)
+TAG_FIELDS = ("repository", "tag", "digest", "created_on", "last_updated_on")
+MANIFEST_FIELDS = ("size", "architecture", "operating_system", "media_type", "layers")
+
+# Characters that would break a line of tab separated values up, and how they are written instead.
+TSV_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+class RecordWriter:
+    """Writes records to a stream as JSON Lines or tab separated values, flushing after every batch."""
+
+    def __init__(
+        self,
+        fields: Sequence[str],
+        output_format: str = "jsonl",
+        stream: TextIO | None = None,
+    ) -> None:
+        """Writes records to a stream as JSON Lines or tab separated values, flushing after every batch.
+
+        Args:
+            fields (Sequence[str]): The fields of the records, in the order they are written.
+            output_format (str): "jsonl" or "tsv". Defaults to "jsonl".
+            stream (TextIO | None): The stream to write to. Defaults to standard output.
+        """
+
+        self.fields = fields
+        self.output_format = output_format
+        self.stream = stream if stream is not None else sys.stdout
+        self.header_written = False
+
+    def write(self, records: Iterable[Mapping[str, Any]]) -> None:
+        """Write a batch of records, such as one page of results.
+
+        Args:
+            records (Iterable[Mapping[str, Any]]): The records.
+        """
+
+        lines = []
+        if self.output_format == "tsv":
+            if not self.header_written:
+                lines.append("\t".join(self.fields))
+                self.header_written = True
+            for record in records:
+                lines.append(
+                    "\t".join(tsv_value(record.get(field)) for field in self.fields)
+                )
+        else:
+            for record in records:
+                lines.append(
+                    json.dumps({field: record.get(field) for field in self.fields})
+                )
+
+        if lines:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+
+
+def tsv_value(value: Any) -> str:
+    """Format a value for a tab separated file.
+
+    Args:
+        value (Any): The value.
+
+    Returns:
+        str: The formatted value. None is written as an empty string.
+    """
+
+    return "" if value is None else str(value).translate(TSV_ESCAPES)
+
+
+def tag_record(repository: str, tag: TagRecord) -> dict[str, Any]:
+    """Convert a tag into a record for a RecordWriter.
+
+    Args:
+        repository (str): The repository the tag belongs to.
+        tag (TagRecord): The tag.
+
+    Returns:
+        dict[str, Any]: The record.
+    """
+
+    return {
+        "repository": repository,
+        "tag": tag.name,
+        "digest": tag.digest,
+        "created_on": isoformat(tag.created),
+        "last_updated_on": isoformat(tag.updated),
+    }
+
+
+@asynccontextmanager
+async def open_registry(
+    acr_name: str,
+    cache_config: Mapping[str, Any],
+    use_cache: bool = True,
+    refresh: bool = False,
+) -> AsyncIterator[ContainerRegistry]:
+    """Create a client, and close the shared connections once it is no longer needed.
+
+    Args:
+        acr_name (str): Name of the container registry.
+        cache_config (Mapping[str, Any]): The [cache] section of the configuration file.
+        use_cache (bool): Read and write the on-disk caches. Defaults to True.
+        refresh (bool): Bypass cached entries, but still store freshly fetched ones. Defaults to False.
+
+    Yields:
+        ContainerRegistry: The client.
+    """
+
+    try:
+        yield ContainerRegistry.from_config(
+            acr_name, cache_config, use_cache=use_cache, refresh=refresh
+        )
+    finally:
+        await auth.close()
+
+
+async def repository_pages(
+    client: ContainerRegistry, page_size: int | None = None
+) -> AsyncIterator[list[str]]:
+    """Stream the repository names one catalog page at a time, or all at once if they are cached.
+
+    Args:
+        client (ContainerRegistry): The client.
+        page_size (int | None): Number of names to request per page. Defaults to the service default.
+
+    Yields:
+        list[str]: The repository names contained in the next page.
+    """
+
+    cached = client.cached_repositories()
+    if cached is not None and cached.fresh:
+        yield cached.value
+        return
+
+    async for page in client.iter_repositories(page_size):
+        yield page
+
+
+async def add_manifest_properties(
+    client: ContainerRegistry,
+    name: str,
+    records: list[dict[str, Any]],
+    semaphore: asyncio.Semaphore,
+) -> None:
+    """Add the properties of their manifests to tag records.
+
+    Each manifest is fetched once, however many of the tags point at it.
+
+    Args:
+        client (ContainerRegistry): The client.
+        name (str): The repository the tags belong to.
+        records (list[dict[str, Any]]): The tag records, which are updated in place.
+        semaphore (asyncio.Semaphore): Limits the number of manifests fetched at once.
+    """
+
+    async def fetch(digest: str) -> tuple[str, dict[str, Any]]:
+        async with semaphore:
+            return digest, await client.get_manifest_properties(name, digest)
+
+    digests = {record["digest"] for record in records if record["digest"]}
+    properties = dict(await asyncio.gather(*(fetch(digest) for digest in digests)))
+    for record in records:
+        record.update(properties.get(record["digest"], {}))
+
+
+async def list_repositories(
+    client: ContainerRegistry, writer: RecordWriter, page_size: int | None = None
+) -> None:
+    """Write the names of the repositories in a registry as the catalog pages arrive.
+
+    Args:
+        client (ContainerRegistry): The client.
+        writer (RecordWriter): Writes the repositories.
+        page_size (int | None): Number of names to request per page. Defaults to the service default.
+    """
+
+    async for page in repository_pages(client, page_size):
+        writer.write({"repository": name} for name in page)
+
+
+async def list_tags(
+    client: ContainerRegistry,
+    writer: RecordWriter,
+    repositories: Sequence[str] = (),
+    manifests: bool = False,
+    latest: int | None = None,
+    concurrency: int = 8,
+    manifest_concurrency: int = 16,
+) -> list[str]:
+    """Write the tags of repositories as they arrive.
+
+    Repositories are fetched concurrently, and the tags of each repository are written as soon as all of them have
+    been fetched, in the order the service returns them.
+
+    Args:
+        client (ContainerRegistry): The client.
+        writer (RecordWriter): Writes the tags.
+        repositories (Sequence[str]): The repositories. Defaults to every repository in the registry, whose tags are
+            fetched one catalog page at a time, as the pages arrive.
+        manifests (bool): Add the properties of the manifest each tag points at. Defaults to False.
+        latest (int | None): Only write this many of the most recently updated tags of each repository. Defaults
+            to all of the tags.
+        concurrency (int): Maximum number of repositories fetched at once. Defaults to 8.
+        manifest_concurrency (int): Maximum number of manifests fetched at once. Defaults to 16.
+
+    Returns:
+        list[str]: The repositories that do not exist.
+    """
+
+    semaphore = asyncio.Semaphore(manifest_concurrency)
+    found: set[str] = set()
+
+    async def write(names: Sequence[str]) -> None:
+        async for name, tags in client.get_tags_many(names, concurrency, latest=latest):
+            found.add(name)
+            records = [tag_record(name, tag) for tag in tags]
+            if manifests:
+                await add_manifest_properties(client, name, records, semaphore)
+            writer.write(records)
+
+    if repositories:
+        await write(repositories)
+        # get_tags_many skips repositories that do not exist.
+        return [name for name in repositories if name not in found]
+
+    async for page in repository_pages(client):
+        await write(page)
+    return []
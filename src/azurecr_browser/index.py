@@ -0,0 +1,1134 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import heapq
+import itertools
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import AbstractSet, Any, Iterable, Iterator, Mapping, MutableMapping
+
+# Repository names are made up of words separated by these characters, and each word can be searched for on its own.
+SEPARATORS = re.compile(r"[-/_.]")
+
+# Length of the n-grams used to find substrings and fuzzy matches.
+GRAM_SIZE = 3
+
+# A digest, or at least the first 12 characters of one, prefixed with "@", "sha256:" or both.
+DIGEST = re.compile(r"^(?:@(?:sha256:)?|sha256:)([0-9a-f]{12,64})$")
+
+# Number of leading hex characters digests are looked up by.
+DIGEST_PREFIX = 12
+
+# Maximum number of results returned by a search.
+SEARCH_LIMIT = 200
+
+# Number of words with the most shared n-grams that are scored as fuzzy matches.
+FUZZY_CANDIDATES = 50
+
+# Searches starting with this are regular expressions, and searches containing any of the glob characters are globs.
+REGEX_PREFIX = "~"
+GLOB_CHARS = "*?["
+
+# Number of names a pattern is matched against before control is handed back to the event loop.
+MATCH_CHUNK = 2000
+
+# Persisted snapshots start with a header of the format version, the byte order of their postings, and the byte
+# lengths of their sections: the keys, the words and the postings of the words, n-grams and word n-grams.
+SNAPSHOT_FORMAT = b"ACRIDX01"
+SNAPSHOT_HEADER = struct.Struct("<8s8s10Q")
+
+
+def normalize(name: str) -> str:
+    """Get the key a name is indexed and searched by.
+
+    Args:
+        name (str): The name.
+
+    Returns:
+        str: The normalized name.
+    """
+
+    return name.lower()
+
+
+def tokenize(key: str) -> set[str]:
+    """Split a normalized name into the words it can be found by.
+
+    Args:
+        key (str): The normalized name.
+
+    Returns:
+        set[str]: The words in the name.
+    """
+
+    return {word for word in SEPARATORS.split(key) if word}
+
+
+def ngrams(key: str, size: int = GRAM_SIZE) -> set[str]:
+    """Get the n-grams of a normalized name.
+
+    Args:
+        key (str): The normalized name.
+        size (int): Length of the n-grams. Defaults to 3.
+
+    Returns:
+        set[str]: Every substring of the given length. Empty if the name is shorter than that.
+    """
+
+    return {key[i : i + size] for i in range(len(key) - size + 1)}
+
+
+def is_subsequence(text: str, key: str) -> bool:
+    """Check whether the characters of a text appear in a name in the same order, such as "pymnts" in "payments".
+
+    Args:
+        text (str): The text to look for.
+        key (str): The name to look in.
+
+    Returns:
+        bool: True if the text is a subsequence of the name.
+    """
+
+    remaining = iter(key)
+    return all(c in remaining for c in text)
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Compute the Levenshtein distance between two strings, giving up once it exceeds a limit.
+
+    Args:
+        a (str): A string.
+        b (str): Another string.
+        limit (int): The largest distance of interest.
+
+    Returns:
+        int: The distance, or limit + 1 if it is greater than the limit.
+    """
+
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+def prefixed(items: list[str], prefix: str) -> Iterator[str]:
+    """Iterate over the items of a sorted list that start with a prefix.
+
+    Args:
+        items (list[str]): The sorted items.
+        prefix (str): The prefix.
+
+    Yields:
+        str: The matching items, in order.
+    """
+
+    i = bisect.bisect_left(items, prefix)
+    while i < len(items) and items[i].startswith(prefix):
+        yield items[i]
+        i += 1
+
+
+def is_pattern(text: str) -> bool:
+    """Check whether a search is a regular expression or glob rather than plain text.
+
+    Args:
+        text (str): The search string.
+
+    Returns:
+        bool: True if the text starts with "~", or contains a glob character.
+    """
+
+    return text.startswith(REGEX_PREFIX) or any(c in text for c in GLOB_CHARS)
+
+
+def glob_to_regex(glob: str) -> str:
+    """Translate a glob into a regular expression matching whole names.
+
+    "*" and "?" do not match "/", so that "infra/*" only matches names directly under "infra/", while "**" matches
+    anything, including "/".
+
+    Args:
+        glob (str): The glob.
+
+    Returns:
+        str: The regular expression.
+    """
+
+    parts = ["^"]
+    i = 0
+    while i < len(glob):
+        if glob.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif glob[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif glob[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif glob[i] == "[" and "]" in glob[i + 2 :]:
+            end = glob.index("]", i + 2)
+            members = glob[i + 1 : end]
+            if members.startswith("!"):
+                members = "^" + members[1:]
+            parts.append(f"[{members.replace(chr(92), chr(92) * 2)}]")
+            i = end + 1
+        else:
+            parts.append(re.escape(glob[i]))
+            i += 1
+    parts.append("$")
+    return "".join(parts)
+
+
+def regex_prefix(pattern: str) -> str:
+    """Get the literal text every match of an anchored regular expression starts with.
+
+    Args:
+        pattern (str): The regular expression.
+
+    Returns:
+        str: The normalized literal prefix, or an empty string if there is none, or it cannot safely be worked out.
+    """
+
+    if not pattern.startswith("^") or "|" in pattern:
+        return ""
+
+    prefix = []
+    i = 1
+    while i < len(pattern):
+        if pattern[i] == "\\" and i + 1 < len(pattern) and pattern[i + 1] in "-./_":
+            literal, step = pattern[i + 1], 2
+        elif pattern[i].isalnum() or pattern[i] in "-/_":
+            literal, step = pattern[i], 1
+        else:
+            break
+        if i + step < len(pattern) and pattern[i + step] in "*?{":
+            # The character is optional or repeated.
+            break
+        prefix.append(literal)
+        i += step
+    return normalize("".join(prefix))
+
+
+def compile_pattern(text: str) -> tuple[re.Pattern[str], str, list[str]]:
+    """Compile a regular expression or glob search, and work out what every match must contain.
+
+    Invalid regular expressions raise re.error.
+
+    Args:
+        text (str): The search string. Regular expressions start with "~".
+
+    Returns:
+        tuple[re.Pattern[str], str, list[str]]: The compiled pattern, the literal prefix of every match, and literal
+            substrings of at least one n-gram every match contains.
+    """
+
+    if text.startswith(REGEX_PREFIX):
+        pattern = text[len(REGEX_PREFIX) :]
+        return re.compile(pattern, re.IGNORECASE), regex_prefix(pattern), []
+
+    glob = normalize(text)
+    prefix = re.split(r"[*?\[]", glob, maxsplit=1)[0]
+    literals = [
+        literal
+        for literal in re.split(r"\*+|\?|\[[^\]]*\]", glob)
+        # The prefix is already checked for by a range scan of the sorted names.
+        if len(literal) >= GRAM_SIZE and literal != prefix
+    ]
+    return re.compile(glob_to_regex(glob)), prefix, literals
+
+
+class IndexSnapshot:
+    """The state of a search index at one point in time. Snapshots are never modified once they are published."""
+
+    def __init__(
+        self,
+        keys: frozenset[str] = frozenset(),
+        sorted_keys: list[str] | None = None,
+        words: Mapping[str, tuple[str, ...]] | None = None,
+        sorted_words: list[str] | None = None,
+        grams: Mapping[str, frozenset[str]] | None = None,
+        word_grams: Mapping[str, frozenset[str]] | None = None,
+    ) -> None:
+        """The state of a search index at one point in time.
+
+        Args:
+            keys (frozenset[str]): The normalized names in the index.
+            sorted_keys (list[str] | None): The normalized names, sorted. Defaults to None.
+            words (Mapping[str, tuple[str, ...]] | None): The sorted keys containing each word. Defaults to None.
+            sorted_words (list[str] | None): The words in the index, sorted. Defaults to None.
+            grams (Mapping[str, frozenset[str]] | None): The keys containing each n-gram. Defaults to None.
+            word_grams (Mapping[str, frozenset[str]] | None): The words containing each n-gram. Defaults to None.
+        """
+
+        self.keys = keys
+        self.sorted_keys = sorted_keys or []
+        self.words = words or {}
+        self.sorted_words = sorted_words or []
+        self.grams = grams or {}
+        self.word_grams = word_grams or {}
+
+
+class SearchIndex:
+    """A ranked search index over repository names that can be updated incrementally.
+
+    Matches are ranked exact match first, then names starting with the search, names with a word starting with it,
+    names containing it, and finally names with a word that fuzzily matches it. Only as many tiers as are needed to
+    fill the results are evaluated, so a search costs time proportional to the number of results rather than the
+    number of names.
+
+    Updates build a new snapshot from the current one and then publish it with a single assignment, so they can run
+    in a worker thread while the UI keeps querying the previous snapshot.
+    """
+
+    def __init__(self, limit: int = SEARCH_LIMIT) -> None:
+        """A ranked search index over repository names that can be updated incrementally.
+
+        Args:
+            limit (int): Maximum number of results returned by a search. Defaults to 200.
+        """
+
+        self.limit = limit
+        self.snapshot = IndexSnapshot()
+        self.build_time: float = 0.0
+        self.query_time: float = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.snapshot.keys)
+
+    def restore(self, snapshot: IndexSnapshot) -> bool:
+        """Start from a previously persisted snapshot, unless the index has already been built.
+
+        Args:
+            snapshot (IndexSnapshot): The snapshot to start from.
+
+        Returns:
+            bool: True if the snapshot was restored.
+        """
+
+        with self._lock:
+            if self.snapshot.keys:
+                return False
+            self.snapshot = snapshot
+            return True
+
+    def update(self, names: Iterable[str]) -> tuple[int, int]:
+        """Make the index contain exactly the given names, adding and removing only the names that changed.
+
+        Args:
+            names (Iterable[str]): All of the names that should be searchable.
+
+        Returns:
+            tuple[int, int]: The number of keys added and removed.
+        """
+
+        with self._lock:
+            start = time.perf_counter()
+            keys = {normalize(name) for name in names}
+            current = self.snapshot.keys
+            return self._apply(keys - current, current - keys, start)
+
+    def add(self, names: Iterable[str]) -> int:
+        """Add names to the index.
+
+        Args:
+            names (Iterable[str]): The names to add.
+
+        Returns:
+            int: The number of keys added.
+        """
+
+        with self._lock:
+            start = time.perf_counter()
+            keys = {normalize(name) for name in names}
+            return self._apply(keys - self.snapshot.keys, set(), start)[0]
+
+    def remove(self, names: Iterable[str]) -> int:
+        """Remove names from the index.
+
+        Args:
+            names (Iterable[str]): The names to remove.
+
+        Returns:
+            int: The number of keys removed.
+        """
+
+        with self._lock:
+            start = time.perf_counter()
+            keys = {normalize(name) for name in names}
+            return self._apply(set(), keys & self.snapshot.keys, start)[1]
+
+    async def update_in_background(self, names: Iterable[str]) -> tuple[int, int]:
+        """Update the index in a worker thread, so that the event loop is not blocked while it is built.
+
+        Args:
+            names (Iterable[str]): All of the names that should be searchable.
+
+        Returns:
+            tuple[int, int]: The number of keys added and removed.
+        """
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.update, list(names))
+
+    def query(self, text: str, limit: int | None = None) -> list[str]:
+        """Find the names that best match a text.
+
+        Args:
+            text (str): The text to search for.
+            limit (int | None): Maximum number of results. Defaults to the index's limit.
+
+        Returns:
+            list[str]: The normalized names of the matches, best match first.
+        """
+
+        start = time.perf_counter()
+        limit = limit or self.limit
+
+        result: list[str] = []
+        seen: set[str] = set()
+        for key in self.ranked(self.snapshot, normalize(text), limit):
+            if key not in seen:
+                seen.add(key)
+                result.append(key)
+                if len(result) >= limit:
+                    break
+
+        self.query_time = time.perf_counter() - start
+        return result
+
+    async def match(self, text: str, chunk_size: int = MATCH_CHUNK) -> list[str]:
+        """Find the names matching a regular expression or glob.
+
+        The pattern is compiled once, and only matched against names that have its literal prefix and contain its
+        literal substrings. Names are matched in chunks, handing control back to the event loop between them, so a
+        long match neither blocks the UI nor prevents it from being cancelled.
+
+        Args:
+            text (str): The search string. Regular expressions start with "~".
+            chunk_size (int): Number of names to match between yielding to the event loop. Defaults to 2000.
+
+        Returns:
+            list[str]: The normalized names of the matches, sorted.
+        """
+
+        start = time.perf_counter()
+        snapshot = self.snapshot
+        pattern, prefix, literals = compile_pattern(text)
+
+        candidates: list[str] | set[str]
+        if prefix:
+            candidates = list(prefixed(snapshot.sorted_keys, prefix))
+        else:
+            candidates = snapshot.sorted_keys
+        if literals:
+            required = set.intersection(
+                *(containing(snapshot.grams, literal) for literal in literals)
+            )
+            if prefix:
+                candidates = [key for key in candidates if key in required]
+            else:
+                candidates = sorted(required)
+
+        result: list[str] = []
+        for i in range(0, len(candidates), chunk_size):
+            result.extend(filter(pattern.search, candidates[i : i + chunk_size]))
+            await asyncio.sleep(0)
+
+        self.query_time = time.perf_counter() - start
+        return result
+
+    def ranked(self, snapshot: IndexSnapshot, text: str, limit: int) -> Iterator[str]:
+        """Lazily generate the matches of a normalized text, best match first. Matches may be repeated.
+
+        Args:
+            snapshot (IndexSnapshot): The snapshot to search.
+            text (str): The normalized text to search for.
+            limit (int): Maximum number of results needed.
+
+        Yields:
+            str: The normalized names of the matches.
+        """
+
+        if not text:
+            return
+
+        if text in snapshot.keys:
+            yield text
+        yield from prefixed(snapshot.sorted_keys, text)
+        for word in prefixed(snapshot.sorted_words, text):
+            yield from snapshot.words[word]
+        yield from self.substrings(snapshot, text, limit)
+        for word in self.fuzzy(snapshot, text):
+            yield from snapshot.words[word]
+
+    def substrings(
+        self, snapshot: IndexSnapshot, text: str, limit: int
+    ) -> Iterator[str]:
+        """Find the names that contain a text, using the n-gram indexes.
+
+        Words never contain separators, so a text without any is looked up in the much smaller vocabulary of words.
+
+        Args:
+            snapshot (IndexSnapshot): The snapshot to search.
+            text (str): The normalized text to search for.
+            limit (int): Maximum number of results needed.
+
+        Yields:
+            str: The matching names.
+        """
+
+        if SEPARATORS.search(text):
+            yield from heapq.nsmallest(limit, containing(snapshot.grams, text))
+        else:
+            for word in sorted(containing(snapshot.word_grams, text)):
+                yield from snapshot.words[word]
+
+    def fuzzy(self, snapshot: IndexSnapshot, text: str) -> list[str]:
+        """Find words that roughly match a text, such as misspellings and abbreviations.
+
+        Candidates are the words sharing the most n-grams with the text. A candidate matches if the text is a
+        subsequence of it, or if they are within an edit distance of a third of the length of the text.
+
+        Args:
+            snapshot (IndexSnapshot): The snapshot to search.
+            text (str): The normalized text to search for.
+
+        Returns:
+            list[str]: The matching words, best match first.
+        """
+
+        counts: Counter[str] = Counter()
+        for gram in ngrams(text):
+            counts.update(snapshot.word_grams.get(gram, ()))
+
+        limit = max(1, len(text) // 3)
+        scored = []
+        for word, count in counts.most_common(FUZZY_CANDIDATES):
+            if len(text) < len(word) and is_subsequence(text, word):
+                distance = 0
+            else:
+                distance = edit_distance(text, word, limit)
+            if distance <= limit:
+                scored.append((distance, -count, word))
+
+        return [word for *_, word in sorted(scored)]
+
+    def _apply(
+        self, added: AbstractSet[str], removed: AbstractSet[str], start: float
+    ) -> tuple[int, int]:
+        if not added and not removed:
+            return 0, 0
+
+        snapshot = self.snapshot
+
+        word_changes: dict[str, tuple[set[str], set[str]]] = {}
+        gram_changes: dict[str, tuple[set[str], set[str]]] = {}
+        for keys, side in ((added, 0), (removed, 1)):
+            for key in keys:
+                for word in tokenize(key):
+                    word_changes.setdefault(word, (set(), set()))[side].add(key)
+                for gram in ngrams(key):
+                    gram_changes.setdefault(gram, (set(), set()))[side].add(key)
+
+        words, new_words, dropped_words = apply_changes(
+            snapshot.words, word_changes, ordered=True
+        )
+        grams, _, _ = apply_changes(snapshot.grams, gram_changes, ordered=False)
+
+        # The vocabulary only changes when a word is used by its first name or no longer used by any.
+        word_gram_changes: dict[str, tuple[set[str], set[str]]] = {}
+        for changed, side in ((new_words, 0), (dropped_words, 1)):
+            for word in changed:
+                for gram in ngrams(word):
+                    word_gram_changes.setdefault(gram, (set(), set()))[side].add(word)
+        word_grams, _, _ = apply_changes(
+            snapshot.word_grams, word_gram_changes, ordered=False
+        )
+
+        self.snapshot = IndexSnapshot(
+            (snapshot.keys | added) - removed,
+            update_sorted(snapshot.sorted_keys, added, removed),
+            words,
+            update_sorted(snapshot.sorted_words, new_words, dropped_words),
+            grams,
+            word_grams,
+        )
+        self.build_time = time.perf_counter() - start
+        return len(added), len(removed)
+
+
+def containing(grams: Mapping[str, frozenset[str]], text: str) -> set[str]:
+    """Find the items of an n-gram index that contain a text.
+
+    Args:
+        grams (Mapping[str, frozenset[str]]): The items containing each n-gram.
+        text (str): The text to look for.
+
+    Returns:
+        set[str]: The items containing the text. Empty if the text is shorter than an n-gram.
+    """
+
+    postings = sorted((grams.get(gram, frozenset()) for gram in ngrams(text)), key=len)
+    if not postings:
+        return set()
+
+    candidates = postings[0].intersection(*postings[1:])
+    if len(text) == GRAM_SIZE:
+        return set(candidates)
+    # Items containing all of the n-grams do not necessarily contain them in the right order.
+    return {item for item in candidates if text in item}
+
+
+def apply_changes(
+    postings: Mapping[str, Any],
+    changes: dict[str, tuple[set[str], set[str]]],
+    ordered: bool,
+) -> tuple[Mapping[str, Any], set[str], set[str]]:
+    """Apply added and removed keys to a copy of a posting map.
+
+    Args:
+        postings (Mapping[str, Any]): The keys for each token.
+        changes (dict[str, tuple[set[str], set[str]]]): The keys added to and removed from each token.
+        ordered (bool): Store the keys of each token as a sorted tuple rather than a frozenset.
+
+    Returns:
+        tuple[Mapping[str, Any], set[str], set[str]]: The updated posting map, and the tokens it gained and lost.
+    """
+
+    updated: MutableMapping[str, Any]
+    if isinstance(postings, MappedPostings):
+        # Copying only copies the changes made since the postings were loaded, rather than decoding all of them.
+        updated = postings.copy()
+    else:
+        updated = dict(postings)
+    new_tokens = set()
+    dropped_tokens = set()
+    for token, (token_added, token_removed) in changes.items():
+        previous = updated.get(token, ())
+        keys = set(previous).union(token_added).difference(token_removed)
+        if keys:
+            updated[token] = tuple(sorted(keys)) if ordered else frozenset(keys)
+            if not previous:
+                new_tokens.add(token)
+        elif previous:
+            del updated[token]
+            dropped_tokens.add(token)
+    return updated, new_tokens, dropped_tokens
+
+
+def update_sorted(
+    items: list[str], added: AbstractSet[str], removed: AbstractSet[str]
+) -> list[str]:
+    """Add and remove items from a copy of a sorted list.
+
+    Args:
+        items (list[str]): The sorted items.
+        added (AbstractSet[str]): Items to add.
+        removed (AbstractSet[str]): Items to remove.
+
+    Returns:
+        list[str]: The updated items, sorted.
+    """
+
+    if removed:
+        items = [item for item in items if item not in removed]
+    if added:
+        # Both lists are sorted already, which sorting takes advantage of.
+        items = sorted(items + sorted(added))
+    return items
+
+
+class MappedPostings(MutableMapping):
+    """A posting map of a snapshot loaded from disk, decoded lazily from a memory-mapped file.
+
+    The keys of a token are only decoded when the token is first looked up, so a large index is usable as soon as its
+    file is mapped. Changes are kept in memory on top of the file.
+    """
+
+    def __init__(
+        self,
+        spans: dict[str, tuple[int, int]],
+        ids: memoryview,
+        table: list[str],
+        ordered: bool,
+        decoded: dict[str, Any] | None = None,
+        changes: dict[str, Any] | None = None,
+    ) -> None:
+        """A posting map of a snapshot loaded from disk, decoded lazily from a memory-mapped file.
+
+        Args:
+            spans (dict[str, tuple[int, int]]): The start and end of the ids of each token.
+            ids (memoryview): The ids of the keys of every token, indexing into the table.
+            table (list[str]): The keys the ids refer to.
+            ordered (bool): Decode the keys of each token as a tuple rather than a frozenset.
+            decoded (dict[str, Any] | None): The keys of the tokens decoded so far. Defaults to None.
+            changes (dict[str, Any] | None): The keys of tokens changed since loading, or None for removed tokens.
+                Defaults to None.
+        """
+
+        self.spans = spans
+        self.ids = ids
+        self.table = table
+        self.ordered = ordered
+        # Decoded keys never change, so they are shared with every copy.
+        self.decoded = decoded if decoded is not None else {}
+        self.changes = changes if changes is not None else {}
+
+    def __getitem__(self, token: str) -> Any:
+        if token in self.changes:
+            keys = self.changes[token]
+            if keys is None:
+                raise KeyError(token)
+            return keys
+
+        keys = self.decoded.get(token)
+        if keys is None:
+            start, end = self.spans[token]
+            items = map(self.table.__getitem__, self.ids[start:end])
+            keys = tuple(items) if self.ordered else frozenset(items)
+            self.decoded[token] = keys
+        return keys
+
+    def __setitem__(self, token: str, keys: Any) -> None:
+        self.changes[token] = keys
+
+    def __delitem__(self, token: str) -> None:
+        if token not in self:
+            raise KeyError(token)
+        self.changes[token] = None
+
+    def __contains__(self, token: object) -> bool:
+        if token in self.changes:
+            return self.changes[token] is not None
+        return token in self.spans
+
+    def __iter__(self) -> Iterator[str]:
+        for token in self.spans:
+            if token not in self.changes:
+                yield token
+        for token, keys in self.changes.items():
+            if keys is not None:
+                yield token
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def copy(self) -> MappedPostings:
+        """Copy the postings, without decoding them.
+
+        Returns:
+            MappedPostings: The copy.
+        """
+
+        return MappedPostings(
+            self.spans,
+            self.ids,
+            self.table,
+            self.ordered,
+            self.decoded,
+            dict(self.changes),
+        )
+
+
+def write_snapshot(snapshot: IndexSnapshot, path: str) -> None:
+    """Persist a snapshot, so that it can be loaded by read_snapshot instead of being rebuilt.
+
+    Keys and words are stored once, and postings as arrays of 32-bit ids into them.
+
+    Args:
+        snapshot (IndexSnapshot): The snapshot to persist.
+        path (str): The file to write to. It is replaced atomically.
+    """
+
+    key_ids = {key: i for i, key in enumerate(snapshot.sorted_keys)}
+    word_ids = {word: i for i, word in enumerate(snapshot.sorted_words)}
+    grams = list(snapshot.grams)
+    word_grams = list(snapshot.word_grams)
+    sections = [
+        encode_strings(snapshot.sorted_keys),
+        encode_strings(snapshot.sorted_words),
+        *encode_postings(snapshot.words, snapshot.sorted_words, key_ids),
+        encode_strings(grams),
+        *encode_postings(snapshot.grams, grams, key_ids),
+        encode_strings(word_grams),
+        *encode_postings(snapshot.word_grams, word_grams, word_ids),
+    ]
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(
+            SNAPSHOT_HEADER.pack(
+                SNAPSHOT_FORMAT,
+                sys.byteorder.encode(),
+                *(len(section) for section in sections),
+            )
+        )
+        for section in sections:
+            # Sections are aligned, so that postings can be read as arrays straight from the mapped file.
+            f.write(section + bytes(-len(section) % 4))
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> IndexSnapshot:
+    """Load a snapshot persisted by write_snapshot.
+
+    The file is memory-mapped and only the keys and tokens are decoded up front. The postings are decoded as they
+    are looked up.
+
+    Args:
+        path (str): The file to load.
+
+    Returns:
+        IndexSnapshot: The snapshot.
+
+    Raises:
+        ValueError: If the file is not a persisted snapshot this version can read.
+    """
+
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(data) < SNAPSHOT_HEADER.size:
+        raise ValueError("Truncated search index")
+    version, byteorder, *lengths = SNAPSHOT_HEADER.unpack_from(data)
+    if version != SNAPSHOT_FORMAT or byteorder.rstrip(b"\0") != sys.byteorder.encode():
+        raise ValueError("Unsupported search index format")
+    if SNAPSHOT_HEADER.size + sum(n + -n % 4 for n in lengths) != len(data):
+        raise ValueError("Truncated search index")
+
+    view = memoryview(data)
+    sections = []
+    offset = SNAPSHOT_HEADER.size
+    for length in lengths:
+        sections.append(view[offset : offset + length])
+        offset += length + -length % 4
+
+    keys = decode_strings(sections[0])
+    words = decode_strings(sections[1])
+    grams = decode_strings(sections[4])
+    word_grams = decode_strings(sections[7])
+    return IndexSnapshot(
+        frozenset(keys),
+        keys,
+        decode_postings(words, sections[2], sections[3], keys, ordered=True),
+        words,
+        decode_postings(grams, sections[5], sections[6], keys, ordered=False),
+        decode_postings(word_grams, sections[8], sections[9], words, ordered=False),
+    )
+
+
+def encode_strings(strings: list[str]) -> bytes:
+    """Encode a table of keys or tokens. None of them can contain a line break.
+
+    Args:
+        strings (list[str]): The keys or tokens.
+
+    Returns:
+        bytes: The encoded table.
+    """
+
+    return "\n".join(strings).encode()
+
+
+def decode_strings(data: memoryview) -> list[str]:
+    """Decode a table encoded by encode_strings.
+
+    Args:
+        data (memoryview): The encoded table.
+
+    Returns:
+        list[str]: The keys or tokens.
+    """
+
+    return str(data, "utf-8").split("\n") if data else []
+
+
+def encode_postings(
+    postings: Mapping[str, Iterable[str]], tokens: list[str], ids: dict[str, int]
+) -> tuple[bytes, bytes]:
+    """Encode a posting map as the number of keys of each token, and the ids of the keys of all tokens.
+
+    Args:
+        postings (Mapping[str, Iterable[str]]): The keys of each token.
+        tokens (list[str]): The tokens, in the order they are stored in.
+        ids (dict[str, int]): The id of each key.
+
+    Returns:
+        tuple[bytes, bytes]: The number of keys of each token, and the key ids.
+    """
+
+    counts = array("I")
+    key_ids = array("I")
+    for token in tokens:
+        keys = postings[token]
+        before = len(key_ids)
+        key_ids.extend(map(ids.__getitem__, keys))
+        counts.append(len(key_ids) - before)
+    return counts.tobytes(), key_ids.tobytes()
+
+
+def decode_postings(
+    tokens: list[str],
+    counts: memoryview,
+    ids: memoryview,
+    table: list[str],
+    ordered: bool,
+) -> MappedPostings:
+    """Map the postings encoded by encode_postings, without decoding them.
+
+    Args:
+        tokens (list[str]): The tokens, in the order they are stored in.
+        counts (memoryview): The number of keys of each token.
+        ids (memoryview): The ids of the keys of all tokens.
+        table (list[str]): The keys the ids refer to.
+        ordered (bool): Decode the keys of each token as a tuple rather than a frozenset.
+
+    Returns:
+        MappedPostings: The postings.
+
+    Raises:
+        ValueError: If the number of tokens and keys do not add up.
+    """
+
+    counts = counts.cast("I")
+    ids = ids.cast("I")
+    if len(counts) != len(tokens) or sum(counts) != len(ids):
+        raise ValueError("Corrupt search index")
+
+    ends = list(itertools.accumulate(counts))
+    spans = dict(zip(tokens, zip([0] + ends, ends)))
+    return MappedPostings(spans, ids, table, ordered)
+
+
+class CatalogFilter:
+    """Maps search results back to the names in the repository catalog.
+
+    Normalized keys are computed once per name when the catalog changes, so filtering costs time proportional to
+    the number of results rather than the size of the catalog. Results keep the order they were ranked in.
+    """
+
+    def __init__(self) -> None:
+        """Maps search results back to the names in the repository catalog."""
+
+        self.catalog: list[str] = []
+        self.names: dict[str, list[str]] = {}
+
+    def set_catalog(self, catalog: list[str]) -> None:
+        """Replace the catalog, only indexing new names if it extends the previous one.
+
+        Args:
+            catalog (list[str]): All of the repository names in the registry.
+        """
+
+        indexed = len(self.catalog)
+        if catalog[:indexed] != self.catalog:
+            indexed = 0
+            self.names = {}
+
+        for name in catalog[indexed:]:
+            self.names.setdefault(normalize(name), []).append(name)
+        self.catalog = catalog
+
+    def filter(self, keys: Iterable[str]) -> list[str]:
+        """Get the catalog names matching the given keys.
+
+        Args:
+            keys (Iterable[str]): Normalized names, such as the result of a search.
+
+        Returns:
+            list[str]: The matching names, in the order of the keys. Keys that are not in the catalog are ignored.
+        """
+
+        return [name for key in dict.fromkeys(keys) for name in self.names.get(key, ())]
+
+
+class TagIndex:
+    """A registry-wide index of the tags of every repository.
+
+    Tag names are searched with a SearchIndex over the distinct names, so a tag such as "latest" that is used by
+    many repositories is only indexed once.
+    """
+
+    def __init__(self, limit: int = SEARCH_LIMIT) -> None:
+        """A registry-wide index of the tags of every repository.
+
+        Args:
+            limit (int): Maximum number of results returned by a search. Defaults to 200.
+        """
+
+        self.limit = limit
+        self.names = SearchIndex(limit=limit)
+        self.repositories: dict[str, list[str]] = {}
+        self.locations: dict[str, set[tuple[str, str]]] = {}
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.repositories)
+
+    def set_tags(self, repository: str, tags: Iterable[str]) -> None:
+        """Replace the tags of a repository.
+
+        The names are only searchable once the name index has been updated with update_names.
+
+        Args:
+            repository (str): The repository name.
+            tags (Iterable[str]): All of the tag names in the repository.
+        """
+
+        for tag in self.repositories.get(repository, []):
+            key = normalize(tag)
+            self.locations[key].discard((repository, tag))
+            if not self.locations[key]:
+                del self.locations[key]
+
+        self.repositories[repository] = list(tags)
+        for tag in self.repositories[repository]:
+            self.locations.setdefault(normalize(tag), set()).add((repository, tag))
+        self.dirty = True
+
+    async def update_names(self) -> None:
+        """Bring the name index up to date with the tags, in a worker thread."""
+
+        while self.dirty:
+            self.dirty = False
+            await self.names.update_in_background(list(self.locations))
+
+    def query(self, text: str) -> list[tuple[str, str]]:
+        """Find tags, optionally only in repositories whose name contains some text. This is thread safe.
+
+        Args:
+            text (str): The tag to search for, optionally prefixed with "<repository>:".
+
+        Returns:
+            list[tuple[str, str]]: The repository and tag names of the matches, best match first.
+        """
+
+        repository, _, tag = text.rpartition(":")
+        repository = normalize(repository)
+        if not tag:
+            return []
+
+        # Filtering by repository can discard most of the tags, so all of the matching names may be needed.
+        limit = len(self.locations) if repository else self.limit
+
+        hits = []
+        for key in self.names.query(tag, limit=limit):
+            # Copying the set is a single operation under the GIL, so this is safe to run in a worker thread while
+            # set_tags runs on the event loop.
+            for location in sorted(tuple(self.locations.get(key, ()))):
+                if repository in normalize(location[0]):
+                    hits.append(location)
+                    if len(hits) >= self.limit:
+                        return hits
+        return hits
+
+
+class DigestIndex:
+    """A reverse index from image digests to the repositories and tags pointing at them."""
+
+    def __init__(self) -> None:
+        """A reverse index from image digests to the repositories and tags pointing at them."""
+
+        self.repositories: dict[str, list[tuple[str, str]]] = {}
+        self.locations: dict[str, set[tuple[str, str]]] = {}
+        self.prefixes: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def set_tags(self, repository: str, tags: Iterable[tuple[str, str]]) -> None:
+        """Replace the tags of a repository.
+
+        Args:
+            repository (str): The repository name.
+            tags (Iterable[tuple[str, str]]): The name and digest of every tag in the repository.
+        """
+
+        for tag, digest in self.repositories.get(repository, []):
+            self.locations[digest].discard((repository, tag))
+            if not self.locations[digest]:
+                del self.locations[digest]
+                prefix = digest_prefix(digest)
+                self.prefixes[prefix].discard(digest)
+                if not self.prefixes[prefix]:
+                    del self.prefixes[prefix]
+
+        self.repositories[repository] = [
+            (tag, digest) for tag, digest in tags if digest
+        ]
+        for tag, digest in self.repositories[repository]:
+            self.locations.setdefault(digest, set()).add((repository, tag))
+            self.prefixes.setdefault(digest_prefix(digest), set()).add(digest)
+
+    def query(self, text: str) -> list[tuple[str, str]]:
+        """Find the tags pointing at a digest. This is thread safe.
+
+        Args:
+            text (str): The digest, or at least its first 12 hex characters.
+
+        Returns:
+            list[tuple[str, str]]: The repository and tag names, sorted. Empty if the text is not a digest.
+        """
+
+        match = DIGEST.match(text.strip().lower())
+        if match is None:
+            return []
+
+        value = match.group(1)
+        # Copying the sets is a single operation under the GIL, so this is safe while set_tags runs.
+        digests = tuple(self.prefixes.get(value[:DIGEST_PREFIX], ()))
+        return sorted(
+            location
+            for digest in digests
+            if digest.partition(":")[2].startswith(value)
+            for location in tuple(self.locations.get(digest, ()))
+        )
+
+
+def is_digest(text: str) -> bool:
+    """Check whether a search is for a digest rather than a name.
+
+    Args:
+        text (str): The search string.
+
+    Returns:
+        bool: True if the text looks like a digest, or the start of one.
+    """
+
+    return DIGEST.match(text.strip().lower()) is not None
+
+
+def digest_prefix(digest: str) -> str:
+    """Get the key a digest is looked up by.
+
+    Args:
+        digest (str): The digest, such as "sha256:<hex>".
+
+    Returns:
+        str: The first 12 hex characters of the digest.
+    """
+
+    return digest.partition(":")[2][:DIGEST_PREFIX]
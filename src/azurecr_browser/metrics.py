@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+from time import perf_counter
+from typing import Any, Callable
+
+# Upper bounds of the latency histogram buckets in milliseconds. The last bucket holds everything slower.
+BUCKETS = (1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0, 128.0, 256.0, 512.0, 1024.0)
+
+# A frame has to be painted within this many milliseconds to keep up with a 60 Hz display.
+FRAME_BUDGET = 16.0
+
+# How often the event loop lag is sampled, in seconds.
+LAG_INTERVAL = 0.1
+
+METRICS_FILE = "azurecr-browser-metrics.json"
+
+
+class Histogram:
+    """A latency histogram with exponentially sized buckets."""
+
+    def __init__(self) -> None:
+        """A latency histogram with exponentially sized buckets."""
+
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.over_budget = 0
+
+    def record(self, milliseconds: float) -> None:
+        """Record a latency.
+
+        Args:
+            milliseconds (float): The latency in milliseconds.
+        """
+
+        self.buckets[bisect.bisect_left(BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+        if milliseconds > FRAME_BUDGET:
+            self.over_budget += 1
+
+    @property
+    def mean(self) -> float:
+        """The mean latency.
+
+        Returns:
+            float: The mean in milliseconds, or 0 if nothing was recorded.
+        """
+
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Estimate a percentile of the latencies, from the upper bound of the bucket it falls in.
+
+        Args:
+            percent (float): The percentile, between 0 and 100.
+
+        Returns:
+            float: The latency in milliseconds, or 0 if nothing was recorded. Latencies in the last bucket are
+                reported as the maximum latency.
+        """
+
+        if not self.count:
+            return 0.0
+
+        rank = percent / 100 * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the histogram into a JSON serializable dictionary.
+
+        Returns:
+            dict[str, Any]: The summary statistics and the bucket counts, keyed by their upper bound.
+        """
+
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max, 3),
+            "over_budget": self.over_budget,
+            "buckets": {
+                **{
+                    f"<={bound:g}": count for bound, count in zip(BUCKETS, self.buckets)
+                },
+                f">{BUCKETS[-1]:g}": self.buckets[-1],
+            },
+        }
+
+
+class Metrics:
+    """Render, event loop and input latency measurements, collected in debug mode."""
+
+    def __init__(self) -> None:
+        """Render, event loop and input latency measurements, collected in debug mode."""
+
+        self.renders: dict[str, Histogram] = {}
+        self.loop_lag = Histogram()
+        self.key_to_paint = Histogram()
+        # When the keys that have not been painted yet were pressed.
+        self.pending_keys: list[float] = []
+        self.monitor: asyncio.Task | None = None
+
+    def instrument(self, widget: Any) -> None:
+        """Time how long a widget takes to render.
+
+        This wraps the widget's render_lines, which renders the widget and all of its renderables into lines for
+        the screen.
+
+        Args:
+            widget (Any): The widget to instrument.
+        """
+
+        name = widget.__class__.__name__
+        histogram = self.renders.setdefault(name, Histogram())
+        render_lines: Callable[..., Any] = widget.render_lines
+
+        def timed_render_lines(*args: Any, **kwargs: Any) -> Any:
+            start = perf_counter()
+            try:
+                return render_lines(*args, **kwargs)
+            finally:
+                histogram.record((perf_counter() - start) * 1000)
+
+        widget.render_lines = timed_render_lines
+
+    def key_pressed(self) -> None:
+        """Record a key press, which is timed until the next paint."""
+
+        self.pending_keys.append(perf_counter())
+
+    def painted(self) -> None:
+        """Record that the screen was painted, which finishes timing the keys pressed before it."""
+
+        now = perf_counter()
+        for pressed in self.pending_keys:
+            self.key_to_paint.record((now - pressed) * 1000)
+        self.pending_keys.clear()
+
+    def start(self) -> None:
+        """Start sampling the event loop lag in the background."""
+
+        if self.monitor is None:
+            self.monitor = asyncio.create_task(self.sample_loop_lag())
+
+    def stop(self) -> None:
+        """Stop sampling the event loop lag."""
+
+        if self.monitor is not None:
+            self.monitor.cancel()
+            self.monitor = None
+
+    async def sample_loop_lag(self) -> None:
+        """Measure how much later than requested the event loop wakes up from a sleep, which is how long other
+        callbacks held it up."""
+
+        while True:
+            start = perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            lag = perf_counter() - start - LAG_INTERVAL
+            self.loop_lag.record(max(lag, 0.0) * 1000)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the measurements into a JSON serializable dictionary.
+
+        Returns:
+            dict[str, Any]: The measurements.
+        """
+
+        return {
+            "frame_budget_ms": FRAME_BUDGET,
+            "renders": {
+                name: histogram.to_dict()
+                for name, histogram in sorted(self.renders.items())
+            },
+            "loop_lag": self.loop_lag.to_dict(),
+            "key_to_paint": self.key_to_paint.to_dict(),
+        }
+
+    def dump(self, path: str = METRICS_FILE) -> None:
+        """Write the measurements to a JSON file.
+
+        Args:
+            path (str): The file to write to. Defaults to METRICS_FILE in the working directory.
+        """
+
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2)
+            file.write("\n")
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable
+
+from .azure import ContainerRegistry
+
+
+class TagPrefetcher:
+    """Speculatively fetches the tags of repositories the user is likely to select next."""
+
+    def __init__(
+        self,
+        client: ContainerRegistry,
+        concurrency: int = 4,
+        log: Callable[..., Any] | None = None,
+    ) -> None:
+        """Speculatively fetches the tags of repositories the user is likely to select next.
+
+        Args:
+            client (ContainerRegistry): The client used to fetch tags.
+            concurrency (int): Maximum number of tag requests in flight at once. Defaults to 4.
+            log (Callable[..., Any] | None): Function used to log failed prefetches. Defaults to None.
+        """
+
+        self.client = client
+        self.log = log
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.tasks: dict[str, asyncio.Task] = {}
+
+    def prefetch(self, repositories: list[str]) -> None:
+        """Prefetch the tags of the given repositories, most important first.
+
+        Prefetches for repositories that are no longer in the list are cancelled.
+
+        Args:
+            repositories (list[str]): The repositories to prefetch, in priority order.
+        """
+
+        wanted = set(repositories)
+        for name in [name for name in self.tasks if name not in wanted]:
+            self.tasks.pop(name).cancel()
+
+        for name in repositories:
+            if name in self.tasks or self.client.has_tags(name):
+                continue
+            # The semaphore wakes waiters in order, so tasks start in priority order.
+            self.tasks[name] = asyncio.create_task(self.fetch(name))
+
+    def cancel(self) -> None:
+        """Cancel all outstanding prefetches."""
+
+        self.prefetch([])
+
+    async def fetch(self, name: str) -> None:
+        """Fetch the first page of tags of a repository into the client's cache.
+
+        Args:
+            name (str): The repository name.
+
+        Raises:
+            asyncio.CancelledError: If the prefetch is cancelled.
+        """
+
+        try:
+            async with self.semaphore:
+                # Only the first page, which is all that is shown when the repository is selected.
+                await self.client.tag_pager(name).ensure(1)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # A failed prefetch just means the tags are fetched when the repository is selected.
+            if self.log:
+                self.log(f"Prefetching tags for {name} failed: {e!r}")
+        finally:
+            if self.tasks.get(name) is asyncio.current_task():
+                del self.tasks[name]
+
+
+def outward(items: list[str], index: int) -> list[str]:
+    """Order items by their distance from an index, starting at the index itself.
+
+    Args:
+        items (list[str]): The items to order.
+        index (int): The index to start from.
+
+    Returns:
+        list[str]: The reordered items.
+    """
+
+    ordered = []
+    for distance in range(len(items)):
+        for i in (index + distance, index - distance) if distance else (index,):
+            if 0 <= i < len(items):
+                ordered.append(items[i])
+    return ordered
+
+
+class TagIndexer:
+    """Sweeps the tags of every repository in the background, to build registry-wide indexes.
+
+    The indexes are filled by the client's tag listeners, which are passed the tags of every repository.
+    """
+
+    def __init__(
+        self,
+        client: ContainerRegistry,
+        concurrency: int = 8,
+        log: Callable[..., Any] | None = None,
+    ) -> None:
+        """Sweeps the tags of every repository in the background, to build registry-wide indexes.
+
+        Args:
+            client (ContainerRegistry): The client used to fetch tags.
+            concurrency (int): Maximum number of tag requests in flight at once. Defaults to 8.
+            log (Callable[..., Any] | None): Function used to log progress. Defaults to None.
+        """
+
+        self.client = client
+        self.concurrency = concurrency
+        self.log = log
+        self.total = 0
+        self.indexed = 0
+        # The repositories that have been added to the sweep, and those that are still waiting for it.
+        self.queued: set[str] = set()
+        self.pending: list[str] = []
+        self.task: asyncio.Task | None = None
+
+    @property
+    def started(self) -> bool:
+        """Whether indexing has been started, in which case new repositories are added to the sweep.
+
+        Returns:
+            bool: True if indexing has been started.
+        """
+
+        return self.task is not None
+
+    @property
+    def running(self) -> bool:
+        """Whether the index is still being built.
+
+        Returns:
+            bool: True if the build has started and not finished yet.
+        """
+
+        return self.task is not None and not self.task.done()
+
+    def start(self, repositories: list[str]) -> None:
+        """Start indexing the tags of the given repositories.
+
+        Repositories that were not seen before, such as those of a newly streamed catalog page, are added to the
+        sweep, which is restarted if it has already finished.
+
+        Args:
+            repositories (list[str]): The repositories to index.
+        """
+
+        new = [name for name in repositories if name not in self.queued]
+        if not new:
+            return
+
+        self.queued.update(new)
+        self.pending.extend(new)
+        self.total += len(new)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.build())
+
+    def cancel(self) -> None:
+        """Stop indexing."""
+
+        if self.task is not None:
+            self.task.cancel()
+
+    async def build(self) -> None:
+        """Index the tags of the pending repositories, using cached tags where possible, until none are left.
+
+        A repository whose tags cannot be fetched is skipped, and swept again the next time it is passed to start.
+        """
+
+        def skip(name: str, error: Exception) -> None:
+            self.queued.discard(name)
+            self.total -= 1
+            if self.log:
+                self.log(f"Indexing the tags of {name} failed: {error!r}")
+
+        while self.pending:
+            repositories, self.pending = self.pending, []
+            missing = []
+            for i, name in enumerate(repositories):
+                # Cached tags have already reached the tag listeners, when they were stored or read from disk.
+                if self.client.cached_tags(name):
+                    self.indexed += 1
+                else:
+                    missing.append(name)
+                if i % 100 == 0:
+                    # Reading the cache from disk can take a while, so let the UI breathe.
+                    await asyncio.sleep(0)
+
+            # Fetched tags reach the tag listeners when they are stored.
+            async for _ in self.client.get_tags_many(
+                missing, self.concurrency, on_error=skip
+            ):
+                self.indexed += 1
+
+        if self.log:
+            self.log(f"Indexed the tags of {self.indexed} repositories")
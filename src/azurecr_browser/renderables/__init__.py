@@ -1,4 +1,5 @@
 from .help import HelpRenderable
+from .metrics import MetricsRenderable
 from .repos_table import ReposTableRenderable
 from .tag_properties import RepositoryPropertiesRenderable
 from .tags_table import TagsTableRenderable
@@ -8,4 +9,5 @@ __all__ = (
     "TagsTableRenderable",
     "RepositoryPropertiesRenderable",
     "HelpRenderable",
+    "MetricsRenderable",
 )
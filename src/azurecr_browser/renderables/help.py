@@ -17,16 +17,22 @@ class HelpRenderable:
         "global": {
             "back": Keys.Escape,
             "search": "/",
+            "search tags": "/ [repo]:tag",
+            "search digests": "/ @digest",
+            "search patterns": "/ infra/** or ~regex",
             "help": "h",
             "quit": "q",
         },
         "navigation": {
             "next row": f"{DOWN}",
             "previous row": f"{UP}",
-            "next page": f"{RIGHT}",
-            "previous page": f"{LEFT}",
-            "first page": "f",
-            "last page": "l",
+            "page down": f"PgDn / {RIGHT}",
+            "page up": f"PgUp / {LEFT}",
+            "first row": "Home / f",
+            "last row": "End / l",
+            "latest tags": "t",
+            "sort tags": "s",
+            "reverse sort": "r",
             "select": Keys.Enter,
         },
     }
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from rich.console import Console, ConsoleOptions, RenderResult
+from rich.table import Table
+
+from .. import styles
+from ..metrics import FRAME_BUDGET, Histogram, Metrics
+
+
+class MetricsRenderable:
+    """A renderable that summarises the debug mode measurements."""
+
+    def __init__(self, metrics: Metrics) -> None:
+        """A renderable that summarises the debug mode measurements.
+
+        Args:
+            metrics (Metrics): The measurements to show.
+        """
+
+        self.metrics = metrics
+
+    def __str__(self) -> str:
+        return str(self.metrics.to_dict())
+
+    def format_latency(self, milliseconds: float) -> str:
+        """Format a latency, highlighting it if it is over the frame budget.
+
+        Args:
+            milliseconds (float): The latency in milliseconds.
+
+        Returns:
+            str: The formatted latency.
+        """
+
+        colour = styles.RED if milliseconds > FRAME_BUDGET else styles.GREY
+        return f"[{colour}]{milliseconds:.1f}[/]"
+
+    def add_row(self, table: Table, name: str, histogram: Histogram) -> None:
+        """Add a row summarising a histogram to the table.
+
+        Args:
+            table (Table): The table to add the row to.
+            name (str): The name of the measurement.
+            histogram (Histogram): The measurement.
+        """
+
+        table.add_row(
+            name,
+            str(histogram.count),
+            self.format_latency(histogram.mean),
+            self.format_latency(histogram.percentile(50)),
+            self.format_latency(histogram.percentile(95)),
+            self.format_latency(histogram.max),
+            str(histogram.over_budget),
+        )
+
+    def __rich_console__(
+        self, console: Console, options: ConsoleOptions
+    ) -> RenderResult:
+
+        table = Table(box=None, expand=True, header_style=f"{styles.GREY} bold")
+        table.add_column("ms", style=f"{styles.ORANGE} bold", ratio=1)
+        for column in ("count", "mean", "p50", "p95", "max", f"> {FRAME_BUDGET:g}"):
+            table.add_column(column, justify="right")
+
+        for name, histogram in sorted(self.metrics.renders.items()):
+            self.add_row(table, name, histogram)
+        table.add_row()
+        self.add_row(table, "event loop lag", self.metrics.loop_lag)
+        self.add_row(table, "key to paint", self.metrics.key_to_paint)
+
+        yield table
@@ -3,33 +3,39 @@ from __future__ import annotations
 from rich.table import Table
 
 from .. import styles
-from .paginated_table import PaginatedTableRenderable
+from .scrolling_list import ScrollingListRenderable
 
 
-class ReposTableRenderable(PaginatedTableRenderable):
+class ReposTableRenderable(ScrollingListRenderable):
     def __init__(
         self,
         items: list[str],
         title: str,
-        page_size: int = -1,
-        page: int = 1,
-        row: int = 0,
+        height: int = 1,
+        cursor: int = 0,
+        offset: int = 0,
+        version: int = 0,
     ) -> None:
         """A renderable that displays build history.
 
         Args:
             items (list[str]): A list of items to display.
             title (str): Title of the table.
-            page_size (int): The size of the page before pagination happens. Defaults to -1.
-            page (int): The starting page. Defaults to 1.
-            row (int): The starting row. Defaults to 0.
+            height (int): The number of visible rows, at least one. Defaults to 1.
+            cursor (int): The index of the selected item. Defaults to 0.
+            offset (int): The index of the first visible item. Defaults to 0.
+            version (int): The version of the items. The visible rows are rebuilt when it changes. Defaults to 0.
         """
 
         self.items = items
         self.title = title
 
         super().__init__(
-            len(items), page_size=page_size, page=page, row=row, row_size=1
+            len(items),
+            height=height,
+            cursor=cursor,
+            offset=offset,
+            version=version,
         )
 
     def renderables(self, start_index: int, end_index: int) -> list[str]:
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any
+
+from rich import box
+from rich.align import Align
+from rich.console import Group
+from rich.padding import Padding
+from rich.style import Style
+from rich.table import Table
+from rich.text import Text
+
+from .. import styles
+
+CURSOR_STYLE = Style(bold=True, dim=False, bgcolor="grey37")
+
+
+class ScrollingListRenderable(ABC):
+    """A scrolling list that only renders the rows that are in view.
+
+    Only the visible window of items is turned into table rows, so rendering costs the same for a list of ten items
+    as for one of a hundred thousand. The rendered window is kept until the items, the height or the scroll position
+    change, and moving the cursor within it only restyles the rows it moves between.
+    """
+
+    def __init__(
+        self,
+        total_items: int,
+        height: int = 1,
+        cursor: int = 0,
+        offset: int = 0,
+        version: int = 0,
+    ) -> None:
+        """A scrolling list that only renders the rows that are in view.
+
+        Args:
+            total_items (int): The number of items in the list.
+            height (int): The number of visible rows, at least one. Defaults to 1.
+            cursor (int): The index of the selected item. Defaults to 0.
+            offset (int): The index of the first visible item. Defaults to 0.
+            version (int): The version of the items. The visible rows are rebuilt when it changes. Defaults to 0.
+        """
+
+        self.total_items = total_items
+        # A window without rows could never show the cursor, and would page by zero items.
+        self.height = max(1, height)
+        self.version = version
+        self.table: Table | None = None
+        self.rendered_key: tuple[int, int, int] | None = None
+        self.styled_row: int = -1
+        self._offset = 0
+        self._cursor = 0
+        self.offset = offset
+        self.cursor = cursor
+
+    @property
+    def offset(self) -> int:
+        """The index of the first visible item.
+
+        Returns:
+            int: The index.
+        """
+
+        return self._offset
+
+    @offset.setter
+    def offset(self, offset: int) -> None:
+        self._offset = max(0, min(offset, self.total_items - self.height))
+
+    @property
+    def cursor(self) -> int:
+        """The index of the selected item. Setting it scrolls the item into view.
+
+        Returns:
+            int: The index.
+        """
+
+        return self._cursor
+
+    @cursor.setter
+    def cursor(self, cursor: int) -> None:
+        self._cursor = max(0, min(cursor, self.total_items - 1))
+        if self._cursor < self.offset:
+            self.offset = self._cursor
+        elif self._cursor >= self.offset + self.height:
+            self.offset = self._cursor - self.height + 1
+
+    def previous_row(self) -> None:
+        self.cursor -= 1
+
+    def next_row(self) -> None:
+        self.cursor += 1
+
+    def previous_page(self) -> None:
+        self.offset -= self.height
+        self.cursor -= self.height
+
+    def next_page(self) -> None:
+        self.offset += self.height
+        self.cursor += self.height
+
+    def first_row(self) -> None:
+        self.cursor = 0
+
+    def last_row(self) -> None:
+        self.cursor = self.total_items - 1
+
+    def at_end(self) -> bool:
+        """Check whether the cursor is on the last item.
+
+        Returns:
+            bool: True if the cursor is on the last item, or there are no items.
+        """
+
+        return self.cursor >= self.total_items - 1
+
+    def visible_range(self) -> tuple[int, int]:
+        """Get the indexes of the visible items.
+
+        Returns:
+            tuple[int, int]: The index of the first visible item, and one past the last.
+        """
+
+        return self.offset, min(self.offset + self.height, self.total_items)
+
+    def cursor_item(self) -> Any | None:
+        """Get the selected item.
+
+        Returns:
+            Any | None: The selected item, or None if there are no items.
+        """
+
+        if self.total_items == 0:
+            return None
+        return self.renderables(self.cursor, self.cursor + 1)[0]
+
+    @abstractmethod
+    def render_columns(self, table: Table) -> None:
+        pass
+
+    @abstractmethod
+    def render_rows(self, table: Table, renderables: list[Any]) -> None:
+        pass
+
+    @abstractmethod
+    def renderables(self, start_index: int, end_index: int) -> list[Any]:
+        pass
+
+    def build_table(self) -> Table:
+        return Table(
+            title_style="",
+            expand=True,
+            box=box.SIMPLE,
+            show_edge=False,
+            header_style=Style(bold=True, color=styles.GREY),
+            border_style=Style(bold=True, color=styles.PURPLE),
+        )
+
+    def __rich__(self) -> Group:
+        key = (self.version, self.height, self.offset)
+        if self.table is None or self.rendered_key != key:
+            self.table = self.build_table()
+            self.render_columns(self.table)
+            self.render_rows(self.table, self.renderables(*self.visible_range()))
+            self.rendered_key = key
+            self.styled_row = -1
+
+        row = self.cursor - self.offset if self.total_items else -1
+        if row != self.styled_row:
+            rows = self.table.rows
+            if 0 <= self.styled_row < len(rows):
+                rows[self.styled_row].style = None
+            if 0 <= row < len(rows):
+                rows[row].style = CURSOR_STYLE
+            self.styled_row = row
+
+        # The position changes with every cursor movement, and is cheap to render on its own.
+        position = Text.from_markup(
+            f"[{styles.GREY}][bold][{styles.ORANGE}]{self.cursor + 1 if self.total_items else 0}[/][/] "
+            f"of [bold][{styles.GREEN}]{self.total_items}[/][/][/]"
+        )
+        visible = len(self.table.rows)
+        return Group(
+            self.table,
+            Padding(Align.right(position), pad=(self.height - visible, 0, 0, 0)),
+        )
+
+    def __str__(self) -> str:
+        return str(self.renderables(*self.visible_range()))
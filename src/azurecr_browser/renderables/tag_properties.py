@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+from typing import Any
+
 from azure.containerregistry import ArtifactTagProperties
 from rich.console import Console, ConsoleOptions, Group, RenderResult
 from rich.table import Table
 
 from .. import styles
-from ..util import format_datetime
+from ..util import format_datetime, format_size
 
 UP = "\u2191"
 DOWN = "\u2193"
@@ -16,7 +18,12 @@ RIGHT = "\u2192"
 class RepositoryPropertiesRenderable:
     """A repository properties renderable."""
 
-    def __init__(self, properties: ArtifactTagProperties | None, value: str) -> None:
+    def __init__(
+        self,
+        properties: ArtifactTagProperties | None,
+        value: str,
+        manifest: dict[str, Any] | None = None,
+    ) -> None:
         self.title = f"{properties.name} @ {properties.digest}" if properties else ""
         self.properties = (
             {
@@ -29,8 +36,34 @@ class RepositoryPropertiesRenderable:
             if properties
             else None
         )
+        if self.properties is not None:
+            self.properties.update(self.manifest_properties(manifest))
         self.value = value if value else ""
 
+    @staticmethod
+    def manifest_properties(manifest: dict[str, Any] | None) -> dict[str, Any]:
+        """Format the properties of a manifest for display.
+
+        Args:
+            manifest (dict[str, Any] | None): The manifest properties, or None if they are still loading.
+
+        Returns:
+            dict[str, Any]: The formatted manifest properties.
+        """
+
+        if manifest is None:
+            return {"manifest": "loading..."}
+
+        size = manifest.get("size")
+        layers = manifest.get("layers")
+        return {
+            "size": format_size(size) if size is not None else "n/a",
+            "architecture": manifest.get("architecture") or "n/a",
+            "os": manifest.get("operating_system") or "n/a",
+            "media type": manifest.get("media_type") or "n/a",
+            "layers": layers if layers is not None else "n/a",
+        }
+
     def __str__(self) -> str:
         return str(self.properties)
 
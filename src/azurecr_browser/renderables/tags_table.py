@@ -1,43 +1,84 @@
 from __future__ import annotations
 
-from azure.containerregistry import ArtifactTagProperties
+from typing import Callable, Sequence
+
 from rich.table import Table
 
 from .. import styles
-from .paginated_table import PaginatedTableRenderable
+from ..tagstore import TagRecord, TagStore, format_timestamp
+from ..util import format_size
+from .scrolling_list import ScrollingListRenderable
+
+UP = "↑"
+DOWN = "↓"
 
+# Number of digest characters shown after the algorithm, as in "docker images".
+SHORT_DIGEST = 12
 
-class TagsTableRenderable(PaginatedTableRenderable):
+
+class TagsTableRenderable(ScrollingListRenderable):
     """A tags table renderable."""
 
     def __init__(
         self,
-        items: list[ArtifactTagProperties],
+        items: TagStore,
         title: str,
-        page_size: int = -1,
-        page: int = 1,
-        row: int = 0,
+        height: int = 1,
+        cursor: int = 0,
+        offset: int = 0,
+        version: int = 0,
+        order: Sequence[int] | None = None,
+        sort_column: str | None = None,
+        descending: bool = False,
+        size: Callable[[str | None], int | None] | None = None,
     ) -> None:
         """A renderable that displays build history.
 
         Args:
-            items (list[str]): A list of items to display.
+            items (TagStore): The tags to display.
             title (str): Title of the table.
-            page_size (int): The size of the page before pagination happens. Defaults to -1.
-            page (int): The starting page. Defaults to 1.
-            row (int): The starting row. Defaults to 0.
+            height (int): The number of visible rows, at least one. Defaults to 1.
+            cursor (int): The index of the selected item. Defaults to 0.
+            offset (int): The index of the first visible item. Defaults to 0.
+            version (int): The version of the items. The visible rows are rebuilt when it changes. Defaults to 0.
+            order (Sequence[int] | None): The indexes of the tags in ascending sort order. Defaults to the order they
+                were loaded in.
+            sort_column (str | None): The name of the column the tags are sorted by. Defaults to None.
+            descending (bool): Show the tags in reverse order. Defaults to False.
+            size (Callable[[str | None], int | None] | None): Looks up the size of the manifest with a digest, if it
+                is known. Defaults to None.
         """
 
         self.items = items
         self.title = title
+        self.order = order
+        self.sort_column = sort_column
+        self.descending = descending
+        self.size = size
 
         super().__init__(
-            len(items), page_size=page_size, page=page, row=row, row_size=1
+            len(items),
+            height=height,
+            cursor=cursor,
+            offset=offset,
+            version=version,
         )
 
-    def renderables(
-        self, start_index: int, end_index: int
-    ) -> list[ArtifactTagProperties]:
+    def item_index(self, position: int) -> int:
+        """Get the index in the tag store of the tag shown at a position.
+
+        Args:
+            position (int): The position in the list.
+
+        Returns:
+            int: The index of the tag in the tag store.
+        """
+
+        if self.descending:
+            position = len(self.items) - 1 - position
+        return position if self.order is None else self.order[position]
+
+    def renderables(self, start_index: int, end_index: int) -> list[TagRecord]:
         """Generate a list of renderables.
 
         Args:
@@ -45,25 +86,32 @@ class TagsTableRenderable(PaginatedTableRenderable):
             end_index (int): The ending index.
 
         Returns:
-            list[str]: A list of renderables.
+            list[TagRecord]: A list of renderables.
         """
 
-        return self.items[start_index:end_index]
+        end_index = min(end_index, len(self.items))
+        return [
+            self.items.record(self.item_index(position))
+            for position in range(start_index, end_index)
+        ]
 
-    def render_rows(
-        self, table: Table, renderables: list[ArtifactTagProperties]
-    ) -> None:
+    def render_rows(self, table: Table, renderables: list[TagRecord]) -> None:
         """Renders rows for the table.
 
         Args:
             table (Table): The table to render rows for.
-            renderables (list[str): The renderables to render.
+            renderables (list[TagRecord]): The renderables to render.
         """
 
         for item in renderables:
-            tag = item.name
-
-            table.add_row(tag)
+            size = self.size(item.digest) if self.size else None
+            table.add_row(
+                item.name,
+                format_timestamp(item.created),
+                format_timestamp(item.updated),
+                item.digest.partition(":")[2][:SHORT_DIGEST] if item.digest else "",
+                format_size(size) if size is not None else "",
+            )
 
     def render_columns(self, table: Table) -> None:
         """Renders columns for the table.
@@ -72,6 +120,19 @@ class TagsTableRenderable(PaginatedTableRenderable):
             table (Table): The table to render columns for.
         """
 
-        table.add_column(
-            "tag", header_style=f"{styles.GREY} bold", no_wrap=True, ratio=100
-        )
+        for name, ratio in (
+            ("tag", 100),
+            ("created", None),
+            ("updated", None),
+            ("digest", None),
+            ("size", None),
+        ):
+            if name == self.sort_column:
+                name = f"{name} {DOWN if self.descending else UP}"
+            table.add_column(
+                name,
+                header_style=f"{styles.GREY} bold",
+                no_wrap=True,
+                ratio=ratio,
+                justify="right" if name.startswith("size") else "left",
+            )
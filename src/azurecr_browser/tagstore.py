@@ -0,0 +1,434 @@
+from __future__ import annotations
+
+import bisect
+import functools
+import heapq
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Iterator, Sequence, overload
+
+from azure.containerregistry import ArtifactTagProperties
+
+from .util import format_datetime
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+# Timestamps are stored as microseconds since the epoch, and this stands in for a missing one.
+MISSING_TIME = -(2 ** 63)
+
+# Digests are stored as the raw bytes of their SHA-256 hash.
+DIGEST_ALGORITHM = "sha256:"
+DIGEST_SIZE = 32
+
+# Columns the tags can be sorted by without looking anything else up.
+SORT_COLUMNS = ("tag", "created", "updated", "digest")
+
+# Number of formatted timestamps to remember, which only needs to cover the rows on screen.
+FORMATTED_TIMESTAMPS = 4096
+
+
+def to_timestamp(value: datetime | None) -> int:
+    """Convert a datetime into the integer timestamp a TagStore stores.
+
+    Args:
+        value (datetime | None): The datetime. Naive datetimes are taken to be in UTC.
+
+    Returns:
+        int: Microseconds since the epoch, or MISSING_TIME if there is no datetime.
+    """
+
+    if value is None:
+        return MISSING_TIME
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // MICROSECOND
+
+
+def from_timestamp(value: int) -> datetime | None:
+    """Convert a timestamp stored by a TagStore back into a datetime.
+
+    Args:
+        value (int): Microseconds since the epoch, or MISSING_TIME.
+
+    Returns:
+        datetime | None: The datetime in UTC, or None if the timestamp is missing.
+    """
+
+    return None if value == MISSING_TIME else EPOCH + value * MICROSECOND
+
+
+@functools.lru_cache(maxsize=FORMATTED_TIMESTAMPS)
+def format_timestamp(value: int) -> str:
+    """Format a stored timestamp for display, remembering the result so that repaints do not format it again.
+
+    Args:
+        value (int): Microseconds since the epoch, or MISSING_TIME.
+
+    Returns:
+        str: The formatted timestamp, or an empty string if it is missing.
+    """
+
+    timestamp = from_timestamp(value)
+    return format_datetime(timestamp) if timestamp else ""
+
+
+class TagRecord:
+    """A lightweight view of one tag in a TagStore."""
+
+    __slots__ = ("name", "digest", "created", "updated")
+
+    def __init__(
+        self, name: str, digest: str | None, created: int, updated: int
+    ) -> None:
+        """A lightweight view of one tag in a TagStore.
+
+        Args:
+            name (str): The tag name.
+            digest (str | None): The digest of the manifest the tag points at.
+            created (int): When the tag was created, in microseconds since the epoch, or MISSING_TIME.
+            updated (int): When the tag was last updated, in microseconds since the epoch, or MISSING_TIME.
+        """
+
+        self.name = name
+        self.digest = digest
+        self.created = created
+        self.updated = updated
+
+    @property
+    def created_on(self) -> datetime | None:
+        """When the tag was created.
+
+        Returns:
+            datetime | None: The creation time in UTC, if known.
+        """
+
+        return from_timestamp(self.created)
+
+    @property
+    def last_updated_on(self) -> datetime | None:
+        """When the tag was last updated.
+
+        Returns:
+            datetime | None: The update time in UTC, if known.
+        """
+
+        return from_timestamp(self.updated)
+
+    def properties(self, repository: str) -> ArtifactTagProperties:
+        """Create the SDK tag properties, for example when the tag is selected.
+
+        Args:
+            repository (str): The repository the tag belongs to.
+
+        Returns:
+            ArtifactTagProperties: The tag properties.
+        """
+
+        return ArtifactTagProperties(
+            name=self.name,
+            digest=self.digest,
+            created_on=self.created_on,
+            last_updated_on=self.last_updated_on,
+            repository_name=repository,
+        )
+
+
+class TagStore(Sequence[TagRecord]):
+    """A compact, append-only list of the tags of a repository.
+
+    Tags are stored in columns rather than as objects: names in a single UTF-8 buffer, digests as the raw bytes of
+    their hash and timestamps as integers. This takes about a sixth of the memory of the SDK's tag properties.
+    Indexing and iterating create TagRecord views on demand, and tags are found by name by searching the buffer
+    rather than through a dictionary.
+    """
+
+    def __init__(self, tags: Iterable[ArtifactTagProperties | TagRecord] = ()) -> None:
+        """A compact, append-only list of the tags of a repository.
+
+        Args:
+            tags (Iterable[ArtifactTagProperties | TagRecord]): The initial tags. Defaults to none.
+        """
+
+        # Every name is followed by a line break, and the buffer starts with one, so that a name can be found by
+        # searching for it between line breaks.
+        self.names = bytearray(b"\n")
+        self.offsets = array("I", [1])
+        self.digests = bytearray()
+        self.created = array("q")
+        self.updated = array("q")
+        # Digests that are not SHA-256 hashes, by index. Their place in the digest buffer is zeroed.
+        self.other_digests: dict[int, str | None] = {}
+        self.extend(tags)
+
+    def __len__(self) -> int:
+        return len(self.created)
+
+    @overload
+    def __getitem__(self, index: int) -> TagRecord:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[TagRecord]:
+        ...
+
+    def __getitem__(self, index: int | slice) -> TagRecord | list[TagRecord]:
+        if isinstance(index, slice):
+            return [self.record(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("tag index out of range")
+        return self.record(index)
+
+    def __iter__(self) -> Iterator[TagRecord]:
+        return (self.record(i) for i in range(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        """The approximate memory used by the tags.
+
+        Returns:
+            int: The size in bytes.
+        """
+
+        return (
+            len(self.names)
+            + self.offsets.itemsize * len(self.offsets)
+            + len(self.digests)
+            + self.created.itemsize * len(self.created)
+            + self.updated.itemsize * len(self.updated)
+        )
+
+    def append(self, tag: ArtifactTagProperties | TagRecord) -> None:
+        """Add a tag to the end of the store.
+
+        Args:
+            tag (ArtifactTagProperties | TagRecord): The tag to add.
+        """
+
+        if isinstance(tag, TagRecord):
+            self.add(tag.name, tag.digest, tag.created, tag.updated)
+        else:
+            self.add(
+                tag.name,
+                tag.digest,
+                to_timestamp(tag.created_on),
+                to_timestamp(tag.last_updated_on),
+            )
+
+    def add(self, name: str, digest: str | None, created: int, updated: int) -> None:
+        """Add a tag to the end of the store from its stored values.
+
+        Args:
+            name (str): The tag name. It cannot contain a line break.
+            digest (str | None): The digest of the manifest the tag points at.
+            created (int): When the tag was created, in microseconds since the epoch, or MISSING_TIME.
+            updated (int): When the tag was last updated, in microseconds since the epoch, or MISSING_TIME.
+        """
+
+        index = len(self)
+        self.names += name.encode()
+        self.names += b"\n"
+        self.offsets.append(len(self.names))
+        try:
+            if digest is None or not digest.startswith(DIGEST_ALGORITHM):
+                raise ValueError(digest)
+            raw = bytes.fromhex(digest[len(DIGEST_ALGORITHM) :])
+            if len(raw) != DIGEST_SIZE:
+                raise ValueError(digest)
+        except ValueError:
+            raw = bytes(DIGEST_SIZE)
+            self.other_digests[index] = digest
+        self.digests += raw
+        self.created.append(created)
+        self.updated.append(updated)
+
+    def extend(self, tags: Iterable[ArtifactTagProperties | TagRecord]) -> None:
+        """Add tags to the end of the store.
+
+        Args:
+            tags (Iterable[ArtifactTagProperties | TagRecord]): The tags to add.
+        """
+
+        for tag in tags:
+            self.append(tag)
+
+    def name(self, index: int) -> str:
+        """Get the name of a tag, without creating a record for it.
+
+        Args:
+            index (int): The index of the tag.
+
+        Returns:
+            str: The tag name.
+        """
+
+        return self.names[self.offsets[index] : self.offsets[index + 1] - 1].decode()
+
+    def digest(self, index: int) -> str | None:
+        """Get the digest of a tag, without creating a record for it.
+
+        Args:
+            index (int): The index of the tag.
+
+        Returns:
+            str | None: The digest of the manifest the tag points at.
+        """
+
+        if index in self.other_digests:
+            return self.other_digests[index]
+        start = index * DIGEST_SIZE
+        return DIGEST_ALGORITHM + self.digests[start : start + DIGEST_SIZE].hex()
+
+    def record(self, index: int) -> TagRecord:
+        """Create a view of a tag.
+
+        Args:
+            index (int): The index of the tag.
+
+        Returns:
+            TagRecord: The tag.
+        """
+
+        return TagRecord(
+            self.name(index),
+            self.digest(index),
+            self.created[index],
+            self.updated[index],
+        )
+
+    def find(self, name: str) -> int | None:
+        """Find a tag by name.
+
+        Args:
+            name (str): The tag name.
+
+        Returns:
+            int | None: The index of the tag, or None if there is no tag with the name.
+        """
+
+        position = self.names.find(b"\n" + name.encode() + b"\n")
+        if position < 0:
+            return None
+        return bisect.bisect_left(self.offsets, position + 1)
+
+    def sort_key(self, column: str) -> Callable[[int], Any]:
+        """Get a function that gives the sort key of the tag at an index.
+
+        Args:
+            column (str): One of SORT_COLUMNS.
+
+        Returns:
+            Callable[[int], Any]: The sort key function.
+
+        Raises:
+            ValueError: If the tags cannot be sorted by the column.
+        """
+
+        if column == "tag":
+            return self.name
+        if column == "created":
+            return self.created.__getitem__
+        if column == "updated":
+            return self.updated.__getitem__
+        if column == "digest":
+            return lambda index: self.digests[
+                index * DIGEST_SIZE : (index + 1) * DIGEST_SIZE
+            ]
+        raise ValueError(f"Unknown sort column {column!r}")
+
+    def sort_order(self, key: Callable[[int], Any]) -> array:
+        """Sort the tags, without moving them.
+
+        Args:
+            key (Callable[[int], Any]): The sort key of the tag at an index, for example from sort_key.
+
+        Returns:
+            array: The indexes of the tags in ascending order.
+        """
+
+        return array("I", sorted(range(len(self)), key=key))
+
+    def latest(self, count: int) -> TagStore:
+        """Pick the most recently updated tags.
+
+        Args:
+            count (int): Number of tags to pick.
+
+        Returns:
+            TagStore: Up to count of the most recently updated tags, newest first.
+        """
+
+        def key(index: int) -> int:
+            updated = self.updated[index]
+            return updated if updated != MISSING_TIME else self.created[index]
+
+        return TagStore(
+            self.record(i) for i in heapq.nlargest(count, range(len(self)), key=key)
+        )
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        """Convert the tags into JSON serializable dictionaries, as stored in the on-disk cache.
+
+        Returns:
+            list[dict[str, Any]]: The serializable tags.
+        """
+
+        return [
+            {
+                "name": self.name(i),
+                "digest": self.digest(i),
+                "created_on": isoformat(self.created[i]),
+                "last_updated_on": isoformat(self.updated[i]),
+            }
+            for i in range(len(self))
+        ]
+
+    @classmethod
+    def from_dicts(cls, items: Iterable[dict[str, Any]]) -> TagStore:
+        """Rebuild tags from the dictionaries created by to_dicts.
+
+        Args:
+            items (Iterable[dict[str, Any]]): The serialized tags.
+
+        Returns:
+            TagStore: The tags.
+        """
+
+        store = cls()
+        for item in items:
+            store.add(
+                item["name"],
+                item.get("digest"),
+                parse_timestamp(item.get("created_on")),
+                parse_timestamp(item.get("last_updated_on")),
+            )
+        return store
+
+
+def isoformat(value: int) -> str | None:
+    """Format a stored timestamp as an ISO 8601 string.
+
+    Args:
+        value (int): Microseconds since the epoch, or MISSING_TIME.
+
+    Returns:
+        str | None: The formatted timestamp, or None if it is missing.
+    """
+
+    timestamp = from_timestamp(value)
+    return timestamp.isoformat() if timestamp else None
+
+
+def parse_timestamp(value: str | None) -> int:
+    """Parse an ISO 8601 string into a stored timestamp.
+
+    Args:
+        value (str | None): The formatted timestamp.
+
+    Returns:
+        int: Microseconds since the epoch, or MISSING_TIME if there is no timestamp.
+    """
+
+    return to_timestamp(datetime.fromisoformat(value)) if value else MISSING_TIME
@@ -32,3 +32,21 @@ def format_datetime(dt: datetime) -> str:
     """
 
     return dt.strftime("%x %X")
+
+
+def format_size(size: int) -> str:
+    """Format a size in bytes to a human readable string.
+
+    Args:
+        size (int): The size in bytes.
+
+    Returns:
+        str: The formatted size, such as "12.3 MiB".
+    """
+
+    value = float(size)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            break
+        value /= 1024
+    return f"{size} B" if unit == "B" else f"{value:.1f} {unit}"
@@ -1,6 +1,7 @@
 from .flash import FlashWidget, ShowFlashNotification
 from .header import HeaderWidget
 from .help import HelpWidget
+from .metrics import MetricsWidget
 from .repos import RepositoriesWidget
 from .search import SearchWidget
 from .tag_properties import TagPropertiesWidget
@@ -15,4 +16,5 @@ __all__ = (
     "TagsWidget",
     "TagPropertiesWidget",
     "HelpWidget",
+    "MetricsWidget",
 )
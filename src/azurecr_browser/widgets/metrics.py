@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from rich.console import RenderableType
+from rich.panel import Panel
+from textual.widget import Widget
+
+from .. import styles
+from ..metrics import Metrics
+from ..renderables import MetricsRenderable
+
+
+class MetricsWidget(Widget):
+    """A debug mode overlay that shows render and input latencies."""
+
+    refresh_interval: float = 1.0
+
+    def __init__(self, metrics: Metrics) -> None:
+        """A debug mode overlay that shows render and input latencies.
+
+        Args:
+            metrics (Metrics): The measurements to show.
+        """
+
+        super().__init__()
+        self.metrics = metrics
+        self.visible = False
+
+    async def on_mount(self) -> None:
+        """Actions that are executed when the widget is mounted."""
+
+        self.set_interval(self.refresh_interval, self.update)
+
+    def update(self) -> None:
+        """Show the latest measurements, if the overlay is visible."""
+
+        if self.visible:
+            self.refresh()
+
+    def render(self) -> RenderableType:
+        """Render the widget.
+
+        Returns:
+            RenderableType: Object to be rendered
+        """
+
+        return Panel(
+            MetricsRenderable(self.metrics),
+            title="⏱️  [bold]metrics[/]",
+            border_style=styles.PURPLE,
+            box=styles.BOX,
+            title_align="left",
+        )
@@ -1,25 +1,31 @@
 from __future__ import annotations
 
+import asyncio
+
 from rich.console import RenderableType
 from rich.panel import Panel
 from rich.style import Style
 from textual import events
 from textual.keys import Keys
 from textual.reactive import Reactive, watch
-from textual.widget import Widget
 
 from .. import styles
 from ..azure import ContainerRegistry
+from ..index import CatalogFilter
+from ..prefetch import TagPrefetcher, outward
 from ..renderables import ReposTableRenderable
+from .flash import FlashMessageType, ShowFlashNotification
+from .scrolling_list import ScrollingListWidget
 
 
-class RepositoriesWidget(Widget):
+class RepositoriesWidget(ScrollingListWidget):
     """A repositories details widget. Used to display repositories."""
 
     has_focus: Reactive[bool] = Reactive(False)
 
-    page: int = 1
-    row: int = 0
+    cursor: int = 0
+    offset: int = 0
+    prefetch_concurrency: int = 4
 
     def __init__(self) -> None:
         """A repositories details widget. Used to display repositories."""
@@ -27,8 +33,20 @@ class RepositoriesWidget(Widget):
         name = self.__class__.__name__
         super().__init__(name=name)
         self.repositories: list[str] = []
+        self.catalog: list[str] = []
+        self.filtered: bool = False
+        self.filter = CatalogFilter()
+        self.search_result: list[str] = []
+        self.loader: asyncio.Task | None = None
         self.renderable: ReposTableRenderable | None = None
+        # Bumped whenever the repositories change, so that the table is only rebuilt when it has to be.
+        self.version: int = 0
         self.client: ContainerRegistry = self.app.client
+        self.prefetcher = TagPrefetcher(
+            self.client, concurrency=self.prefetch_concurrency, log=self.log
+        )
+        # The repositories whose tags were last prefetched. Widget.visible is reactive, so this needs another name.
+        self.prefetched_rows: list[str] = []
 
     def on_focus(self) -> None:
         """Sets has_focus to true when the item is clicked."""
@@ -43,10 +61,69 @@ class RepositoriesWidget(Widget):
     async def on_mount(self) -> None:
         """Actions that are executed when the widget is mounted."""
 
-        self.repositories = await self.client.get_repositories()
-        self.app.searchable_nodes = self.repositories
-
         watch(self.app, "search_result", self.update)
+        self.loader = asyncio.create_task(self.load_repositories())
+
+    async def load_repositories(self) -> None:
+        """Stream the repository catalog into the widget page by page.
+
+        A cached catalog is shown immediately and, if stale, swapped for the fresh one once it has been fetched.
+        Without a cached catalog, rows are shown as soon as the first page arrives so the user can start navigating
+        while the rest of the catalog is still being fetched.
+
+        Raises:
+            asyncio.CancelledError: If loading is cancelled.
+        """
+
+        cached = self.client.cached_repositories()
+        if cached:
+            self.set_catalog(cached.value)
+            if cached.fresh:
+                return
+
+        fresh: list[str] = []
+        try:
+            async for page in self.client.iter_repositories():
+                # Use a new list for every page so that watchers of searchable_nodes are notified.
+                fresh = fresh + page
+                if not cached:
+                    self.set_catalog(fresh)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The loader runs in a task, so an error would otherwise never be seen. The pages that did arrive, or the
+            # cached catalog, are left in place.
+            self.log(f"Loading repositories failed: {e!r}")
+            await self.post_message_from_child(
+                ShowFlashNotification(
+                    self,
+                    type=FlashMessageType.ERROR,
+                    value=f'Unable to load the repositories of "{self.client.acr_name}".',
+                )
+            )
+            return
+
+        if cached:
+            self.set_catalog(fresh)
+
+        self.log(f"Loaded {len(fresh)} repositories")
+
+    def set_catalog(self, catalog: list[str]) -> None:
+        """Replace the repository catalog.
+
+        Args:
+            catalog (list[str]): All of the repository names in the registry.
+        """
+
+        self.catalog = catalog
+        self.filter.set_catalog(catalog)
+        self.app.searchable_nodes = catalog
+        if self.filtered:
+            self.repositories = self.filter.filter(self.search_result)
+        else:
+            self.repositories = catalog
+        self.version += 1
+        self.refresh()
 
     async def update(self, search_result: list[str]) -> None:
         """Update the widget with the search result.
@@ -55,15 +132,14 @@ class RepositoriesWidget(Widget):
             search_result (list[str]): A list of repository names that match the search.
         """
 
-        if len(search_result) > 0:
-            if search_result[0] == "none":
-                self.repositories = self.app.searchable_nodes
-            else:
-                self.repositories = [
-                    x for x in self.repositories if x.lower() in search_result
-                ]
+        self.filtered = len(search_result) > 0 and search_result[0] != "none"
+        self.search_result = search_result
+        if self.filtered:
+            # Always filter the full catalog, so that results do not depend on previous searches.
+            self.repositories = self.filter.filter(search_result)
         else:
-            self.repositories = self.app.searchable_nodes
+            self.repositories = self.catalog
+        self.version += 1
         self.refresh(layout=True)
 
     def on_key(self, event: events.Key) -> None:
@@ -80,36 +156,47 @@ class RepositoriesWidget(Widget):
 
         if key == Keys.Enter:
 
-            row = self.renderable.get_cell_value(0, self.row)
-            self.app.selected_repo = row
-            self.app.selected_tag = ""
-
-        if key == Keys.Left:
-            self.renderable.previous_page()
-        elif key == Keys.Right:
-            self.renderable.next_page()
-        elif key == "f":
-            self.renderable.first_page()
-        elif key == "l":
-            self.renderable.last_page()
-        elif key == Keys.Up:
-            self.renderable.previous_row()
-        elif key == Keys.Down:
-            self.renderable.next_row()
+            repository = self.renderable.cursor_item()
+            if repository is not None:
+                self.app.selected_repo = repository
+                self.app.selected_tag = ""
+            return
 
-        self.refresh(layout=True)
+        if self.move_cursor(self.renderable, key):
+            self.schedule_repaint()
 
     def render_table(self) -> None:
-        """Renders the build history table."""
+        """Renders the build history table, reusing the current one unless the repositories or size changed."""
+
+        height = max(1, self.size.height - 5)
+        if (
+            self.renderable is not None
+            and self.renderable.version == self.version
+            and self.renderable.height == height
+        ):
+            return
 
         self.renderable = ReposTableRenderable(
             items=self.repositories,
             title="🗃️  repositories",
-            page_size=self.size.height - 5,
-            page=self.page,
-            row=self.row,
+            height=height,
+            cursor=self.cursor,
+            offset=self.offset,
+            version=self.version,
         )
 
+    def prefetch_visible(self) -> None:
+        """Prefetch the tags of the visible repositories, starting from the cursor row outward."""
+
+        assert isinstance(self.renderable, ReposTableRenderable)
+        start, end = self.renderable.visible_range()
+        visible = self.renderable.renderables(start, end)
+        if visible == self.prefetched_rows:
+            return
+
+        self.prefetched_rows = visible
+        self.prefetcher.prefetch(outward(visible, self.renderable.cursor - start))
+
     def render(self) -> RenderableType:
         """Render the widget.
 
@@ -118,11 +205,12 @@ class RepositoriesWidget(Widget):
         """
 
         if self.renderable is not None:
-            self.page = self.renderable.page
-            self.row = self.renderable.row
+            self.cursor = self.renderable.cursor
+            self.offset = self.renderable.offset
 
         self.render_table()
         assert isinstance(self.renderable, ReposTableRenderable)
+        self.prefetch_visible()
         return Panel(
             renderable=self.renderable,
             title=f"[{styles.GREY}]( {self.renderable.title} )[/]",
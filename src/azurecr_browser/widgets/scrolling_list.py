@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from time import monotonic
+
+from textual.keys import Keys
+from textual.widget import Widget
+
+from ..renderables.scrolling_list import ScrollingListRenderable
+
+
+class ScrollingListWidget(Widget):
+    """A widget that shows a scrolling list.
+
+    Navigation keys move the cursor of the list straight away, but the widget is repainted at most once per frame.
+    Holding a key down then moves the cursor as fast as the key repeats, instead of queueing up a repaint for every
+    repeated key press.
+    """
+
+    frame_interval: float = 1 / 30
+
+    def __init__(self, name: str | None = None) -> None:
+        """A widget that shows a scrolling list.
+
+        Args:
+            name (str | None): The name of the widget. Defaults to None.
+        """
+
+        super().__init__(name=name)
+        self.last_repaint: float = 0.0
+        self.repaint_pending: bool = False
+
+    def move_cursor(self, renderable: ScrollingListRenderable, key: str) -> bool:
+        """Move the cursor of a list for a navigation key.
+
+        Args:
+            renderable (ScrollingListRenderable): The list.
+            key (str): The pressed key.
+
+        Returns:
+            bool: True if the key is a navigation key.
+        """
+
+        if key in (Keys.PageUp, Keys.Left):
+            renderable.previous_page()
+        elif key in (Keys.PageDown, Keys.Right):
+            renderable.next_page()
+        elif key in (Keys.Home, "f"):
+            renderable.first_row()
+        elif key in (Keys.End, "l"):
+            renderable.last_row()
+        elif key == Keys.Up:
+            renderable.previous_row()
+        elif key == Keys.Down:
+            renderable.next_row()
+        else:
+            return False
+        return True
+
+    def schedule_repaint(self) -> None:
+        """Repaint the widget, unless it was repainted less than a frame ago, in which case repaint it at the end of
+        the frame.
+
+        This only repaints the widget, so it must not be used when its size changes.
+        """
+
+        if self.repaint_pending:
+            return
+
+        remaining = self.last_repaint + self.frame_interval - monotonic()
+        if remaining <= 0:
+            self.repaint()
+        else:
+            self.repaint_pending = True
+            self.set_timer(remaining, self.repaint)
+
+    def repaint(self) -> None:
+        """Repaint the widget."""
+
+        self.repaint_pending = False
+        self.last_repaint = monotonic()
+        self.refresh()
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import asyncio
+import re
 import string
-from typing import Any
+import time
 
-from fast_autocomplete import AutoComplete
 from rich.console import RenderableType
 from rich.padding import Padding
 from rich.panel import Panel
@@ -16,15 +17,29 @@ from textual_inputs import TextInput
 from textual_inputs.events import InputOnChange
 
 from .. import styles
+from ..index import (
+    REGEX_PREFIX,
+    DigestIndex,
+    SearchIndex,
+    TagIndex,
+    is_digest,
+    is_pattern,
+    normalize,
+)
+from ..prefetch import TagIndexer
+from ..tagstore import TagStore
 from .flash import FlashMessageType, ShowFlashNotification
 
 
 class SearchWidget(TextInput):
     """A custom search widget."""
 
-    autocompleter: AutoComplete = None
     value: Reactive[str] = Reactive("")
     valid: Reactive[bool] = Reactive(True)
+    tag_index_concurrency: int = 8
+    debounce: float = 0.05
+    # Seconds the catalog has to stay unchanged before the search index is saved.
+    save_delay: float = 1.0
 
     def __init__(self) -> None:
         """A custom search widget."""
@@ -33,16 +48,152 @@ class SearchWidget(TextInput):
 
         self.title = f"🔍 [{styles.GREY}]search[/]"
         self.visible = True
+        self.index = SearchIndex()
+        self.pending_nodes: list[str] | None = None
+        self.indexer: asyncio.Task | None = None
+        self.tag_index = TagIndex()
+        self.digest_index = DigestIndex()
+        self.tag_indexer = TagIndexer(
+            self.app.client,
+            concurrency=self.tag_index_concurrency,
+            log=self.log,
+        )
+        self.tag_index_updater: asyncio.Task | None = None
+        self.tag_hits: list[tuple[str, str]] = []
+        self.searching: asyncio.Task | None = None
+        self.generation: int = 0
 
     async def on_mount(self) -> None:
         """Actions that are executed when the widget is mounted."""
 
+        self.restore_index()
+
         async def map(nodes: list[str]):
-            searchable_words, synonyms = self.map_nodes(nodes=nodes)
-            self.autocompleter = AutoComplete(words=searchable_words, synonyms=synonyms)
-            self.log("Searchable nodes have been mapped")
+            self.pending_nodes = nodes
+            if self.indexer is None or self.indexer.done():
+                self.indexer = asyncio.create_task(self.index_nodes())
+            if self.tag_indexer.started:
+                # Repositories that appear after tags were first searched for are swept as well.
+                self.tag_indexer.start(nodes)
 
         watch(self.app, "searchable_nodes", map)
+        self.app.client.tag_listeners.append(self.add_tags)
+
+    def restore_index(self) -> None:
+        """Start from the search index persisted by the last run, so searches work before the catalog is loaded."""
+
+        cache = self.app.client.cache
+        if cache is None:
+            return
+
+        start = time.perf_counter()
+        snapshot = cache.get_search_index()
+        if snapshot is not None and self.index.restore(snapshot):
+            self.log(
+                f"Search index: restored {len(self.index)} "
+                f"in {(time.perf_counter() - start) * 1000:.1f} ms"
+            )
+
+    async def save_index(self) -> None:
+        """Persist the search index in a worker thread, so that the next run does not have to rebuild it."""
+
+        cache = self.app.client.cache
+        if cache is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(
+                None, cache.set_search_index, self.index.snapshot
+            )
+        except OSError as e:
+            self.log(f"Saving the search index failed: {e!r}")
+
+    async def index_nodes(self) -> None:
+        """Bring the search index up to date with the searchable nodes.
+
+        The index is updated in a worker thread, and only with the nodes that were added or removed. Changes that
+        arrive while an update, a search or a save is running are picked up by this task before it finishes. The
+        index is saved once the catalog has stopped changing for save_delay seconds, rather than for every page.
+        """
+
+        changed = False
+        while True:
+            updated = False
+            while self.pending_nodes is not None:
+                nodes, self.pending_nodes = self.pending_nodes, None
+                added, removed = await self.index.update_in_background(nodes)
+                updated = updated or bool(added or removed)
+                self.log(
+                    f"Search index: {added} added, {removed} removed, "
+                    f"{len(self.index)} total in {self.index.build_time * 1000:.1f} ms"
+                )
+            changed = changed or updated
+
+            # Results of the current search may be missing the new nodes.
+            if self.value and updated:
+                await self.search(search_string=self.value)
+            if self.pending_nodes is not None:
+                continue
+            if not changed:
+                return
+
+            await asyncio.sleep(self.save_delay)
+            if self.pending_nodes is not None:
+                continue
+            await self.save_index()
+            changed = False
+            if self.pending_nodes is None:
+                return
+
+    def add_tags(self, repository: str, tags: TagStore) -> None:
+        """Add the tags of a repository to the tag and digest indexes, replacing any added before.
+
+        Args:
+            repository (str): The repository name.
+            tags (TagStore): All of the tags in the repository, or those loaded so far if it is being paged through.
+        """
+
+        self.digest_index.set_tags(
+            repository, [(tag.name, tag.digest) for tag in tags if tag.digest]
+        )
+        self.tag_index.set_tags(repository, [tag.name for tag in tags])
+        if self.tag_index_updater is None or self.tag_index_updater.done():
+            self.tag_index_updater = asyncio.create_task(self.index_tags())
+
+    async def index_tags(self) -> None:
+        """Bring the tag name index up to date, and refresh the results of a tag search."""
+
+        await self.tag_index.update_names()
+        if self.is_tag_search(self.value) or is_digest(self.value):
+            await self.search(search_string=self.value)
+        self.refresh()
+
+    @staticmethod
+    def is_tag_search(search_string: str) -> bool:
+        """Check whether a search is for tags rather than repositories.
+
+        Args:
+            search_string (str): The search string.
+
+        Returns:
+            bool: True if the search string is of the form "[repository]:tag".
+        """
+
+        return (
+            ":" in search_string
+            and not is_digest(search_string)
+            and not search_string.startswith(REGEX_PREFIX)
+        )
+
+    async def jump_to_tag(self) -> None:
+        """Select the repository and tag of the best tag search result."""
+
+        repository, _ = self.tag_hits[0]
+        if self.app.selected_repo == repository:
+            self.app.tags.start_selection(repository)
+        else:
+            self.app.selected_repo = repository
 
     async def clear(self) -> None:
         """Clear the search field."""
@@ -64,6 +215,10 @@ class SearchWidget(TextInput):
 
         if event.key == Keys.Enter:
 
+            if self.searching is not None and not self.searching.done():
+                # Act on the results of what has been typed, not of an earlier search.
+                await asyncio.wait([self.searching])
+
             if len(self.value) == 0:
                 await self.post_message_from_child(
                     ShowFlashNotification(
@@ -73,6 +228,9 @@ class SearchWidget(TextInput):
                     )
                 )
 
+            elif self.tag_hits:
+                await self.jump_to_tag()
+
             elif self.app.search_result and self.app.search_result[0] == "none":
                 await self.post_message_from_child(
                     ShowFlashNotification(
@@ -85,11 +243,7 @@ class SearchWidget(TextInput):
                 await self.app.set_focus(self.app.repositories)
 
         elif event.key == "ctrl+h":  # Backspace
-            if len(self.value) == 1:
-                self.app.search_result = []
-
-            if len(self.value) > 1:
-                await self.search(search_string=self.value)
+            await self.search(search_string=self.value if len(self.value) > 1 else "")
 
         elif event.key in string.printable:
 
@@ -99,43 +253,96 @@ class SearchWidget(TextInput):
         await self.post_message(InputOnChange(self))
 
     async def search(self, search_string: str) -> None:
-        """Search for a string in the autocompleter.
+        """Start searching for a string, cancelling any search that is still in progress.
 
         Args:
             search_string (str): The string to search for.
         """
 
+        self.generation += 1
+        if self.searching is not None:
+            self.searching.cancel()
+
         if search_string:
-            result = self.autocompleter.get_tokens_flat_list(search_string)
-            self.app.search_result = result if len(result) > 0 else ["none"]
-            await self.toggle_field_status(valid=len(result) > 0)
+            self.searching = asyncio.create_task(
+                self.execute_search(search_string, self.generation)
+            )
         else:
+            self.set_tag_hits([])
             self.app.search_result = []
 
-    def map_nodes(
-        self, nodes: list[str]
-    ) -> tuple[dict[str, Any], dict[str, list[str]]]:
-        """Build a map of nodes and synonyms.
+    async def execute_search(self, search_string: str, generation: int) -> None:
+        """Search for a string in a worker thread and publish the results, unless a newer search has started.
 
         Args:
-            nodes (dict[NodeID, TreeNode]): A dictionary of nodes.
-
-        Returns:
-            tuple[dict[str, Any], dict[str, list[str]]]: A tuple containing searchable_words and synonyms.
+            search_string (str): The string to search for.
+            generation (int): The search this is. Results of older searches are discarded.
         """
 
-        searchable_words: dict[str, Any] = {}
-        synonyms: dict[str, list[str]] = {}
-        for node in nodes:
-            name = node.lower()
-            searchable_words[name] = {}
+        # Wait for the user to stop typing, so that only the last of a burst of keystrokes is searched for.
+        await asyncio.sleep(self.debounce)
+
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        if is_digest(search_string) or self.is_tag_search(search_string):
+            # Searching tags or digests sweeps every repository for tags that have not been loaded yet.
+            self.tag_indexer.start(self.app.searchable_nodes)
+            if is_digest(search_string):
+                # Digests are looked up in constant time.
+                hits = self.digest_index.query(search_string)
+            else:
+                hits = await loop.run_in_executor(
+                    None, self.tag_index.query, search_string
+                )
+            result = list(
+                dict.fromkeys(normalize(repository) for repository, _ in hits)
+            )
+        elif is_pattern(search_string):
+            hits = []
+            try:
+                # Patterns are matched on the event loop in small chunks, so the search can be cancelled between them.
+                result = await self.index.match(search_string)
+            except re.error as e:
+                self.log(f"Invalid pattern {search_string!r}: {e}")
+                if generation == self.generation:
+                    self.set_tag_hits([])
+                    self.app.search_result = ["none"]
+                    await self.toggle_field_status(valid=False)
+                return
+        else:
+            hits = []
+            result = await loop.run_in_executor(None, self.index.query, search_string)
 
-            # Secret names must can contain Alphanumerics and hyphens (dash).
-            # So we can make a niave attempt at synonyms.
-            name_words = name.split("-")
-            synonyms[name] = name_words if len(name_words) > 1 else []
+        if generation != self.generation:
+            return
+
+        self.log(
+            f"Search for {search_string!r}: {len(result)} results "
+            f"in {(time.perf_counter() - start) * 1000:.2f} ms"
+        )
+        self.set_tag_hits(hits)
+        self.app.search_result = result if len(result) > 0 else ["none"]
+        # Tags that have not been indexed yet may still match.
+        await self.toggle_field_status(
+            valid=len(result) > 0
+            or (
+                (self.is_tag_search(search_string) or is_digest(search_string))
+                and self.tag_indexer.running
+            )
+        )
 
-        return searchable_words, synonyms
+    def set_tag_hits(self, hits: list[tuple[str, str]]) -> None:
+        """Remember the tag search results, so the best matching tag is selected when a repository is opened.
+
+        Args:
+            hits (list[tuple[str, str]]): The repository and tag names of the matches, best match first.
+        """
+
+        self.tag_hits = hits
+        tags: dict[str, str] = {}
+        for repository, tag in hits:
+            tags.setdefault(repository, tag)
+        self.app.tag_hits = tags
 
     async def toggle_field_status(self, valid=True) -> None:
         """Toggles field status.
@@ -163,6 +370,13 @@ class SearchWidget(TextInput):
 
         text = Text.assemble(*segments)
 
+        title = self.title
+        if self.tag_indexer.running:
+            title = (
+                f"{title} [{styles.GREY}](indexing tags "
+                f"{self.tag_indexer.indexed}/{self.tag_indexer.total})[/]"
+            )
+
         border_style = (
             Style(color=styles.LIGHT_PURPLE if self.has_focus else styles.PURPLE)
             if self.valid
@@ -172,7 +386,7 @@ class SearchWidget(TextInput):
         return Padding(
             Panel(
                 text,
-                title=self.title,
+                title=title,
                 title_align="left",
                 height=3,
                 border_style=border_style,
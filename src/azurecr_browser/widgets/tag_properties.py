@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import asyncio
+from typing import Any
+
+from azure.containerregistry import ArtifactTagProperties
 from rich.console import RenderableType
 from rich.panel import Panel
 from rich.style import Style
@@ -8,7 +12,7 @@ from textual.reactive import Reactive, watch
 from textual.widget import Widget
 
 from .. import styles
-from ..azure import ArtifactTagProperties, ContainerRegistry
+from ..azure import ContainerRegistry
 from ..renderables import RepositoryPropertiesRenderable
 
 
@@ -23,6 +27,8 @@ class TagPropertiesWidget(Widget):
         name = self.__class__.__name__
         super().__init__(name=name)
         self.selected_tag: ArtifactTagProperties | None = None
+        self.manifest: dict[str, Any] | None = None
+        self.loader: asyncio.Task | None = None
         self.renderable: RepositoryPropertiesRenderable | None = None
         self.value: str = ""
         self.client: ContainerRegistry = self.app.client
@@ -45,7 +51,10 @@ class TagPropertiesWidget(Widget):
     async def clear(self) -> None:
         """Clears the widget."""
 
+        if self.loader is not None:
+            self.loader.cancel()
         self.selected_tag = None
+        self.manifest = None
         self.renderable = None
         self.refresh(layout=True)
 
@@ -58,10 +67,45 @@ class TagPropertiesWidget(Widget):
 
         if selected_tag:
             self.selected_tag = selected_tag
+            if self.loader is not None:
+                self.loader.cancel()
+            # Manifests are cached by digest, so a manifest that has been seen before is shown straight away.
+            self.manifest = self.client.manifest_cache.get(selected_tag.digest)
+            if self.manifest is None:
+                self.loader = asyncio.create_task(
+                    self.load_manifest(self.app.selected_repo, selected_tag)
+                )
             await self.app.set_focus(self)
 
         self.refresh(layout=True)
 
+    async def load_manifest(
+        self, repository_name: str, tag: ArtifactTagProperties
+    ) -> None:
+        """Fetch the manifest properties of a tag and show them, if the tag is still selected.
+
+        Args:
+            repository_name (str): The repository the tag belongs to.
+            tag (ArtifactTagProperties): The selected tag.
+
+        Raises:
+            asyncio.CancelledError: If loading is cancelled.
+        """
+
+        try:
+            manifest = await self.client.get_manifest_properties(
+                repository_name, tag.digest
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.log(f"Loading the manifest of {tag.digest} failed: {e!r}")
+            manifest = {}
+
+        if tag is self.selected_tag:
+            self.manifest = manifest
+            self.refresh(layout=True)
+
     def on_key(self, event: events.Key) -> None:
         """Handle a key press.
 
@@ -80,6 +124,7 @@ class TagPropertiesWidget(Widget):
         self.renderable = RepositoryPropertiesRenderable(
             properties=self.selected_tag,
             value="",
+            manifest=self.manifest,
         )
 
     def render(self) -> RenderableType:
@@ -1,34 +1,61 @@
 from __future__ import annotations
 
+import asyncio
+from array import array
+
 from rich.console import RenderableType
 from rich.panel import Panel
 from rich.style import Style
 from textual import events
 from textual.keys import Keys
 from textual.reactive import Reactive, watch
-from textual.widget import Widget
 
 from .. import styles
-from ..azure import ArtifactTagProperties, ContainerRegistry
+from ..azure import LATEST_TAGS, ContainerRegistry, TagPager
 from ..renderables import TagsTableRenderable
+from ..tagstore import SORT_COLUMNS, TagStore
+from .flash import FlashMessageType, ShowFlashNotification
+from .scrolling_list import ScrollingListWidget
 
 
-class TagsWidget(Widget):
+class TagsWidget(ScrollingListWidget):
     """A tags widget. Used to display tags in a repository."""
 
     has_focus: Reactive[bool] = Reactive(False)
 
-    page: int = 1
-    row: int = 0
+    cursor: int = 0
+    offset: int = 0
+    debounce: float = 0.15
+    latest: bool = False
+    latest_count: int = LATEST_TAGS
+    # Maximum number of manifest sizes requested at once.
+    size_concurrency: int = 8
+    # Pressing "s" cycles through these, where None is the order the tags were loaded in.
+    sort_columns: tuple[str | None, ...] = (None, *SORT_COLUMNS, "size")
 
     def __init__(self) -> None:
         """A tags widget. Used to display tags in a repository."""
 
         name = self.__class__.__name__
         super().__init__(name=name)
-        self.tags: list[ArtifactTagProperties] = []
-        self.tag_map: dict[str, ArtifactTagProperties] = {}
+        self.tags = TagStore()
+        self.pager: TagPager | None = None
+        self.loader: asyncio.Task | None = None
+        self.all_loader: asyncio.Task | None = None
+        self.selection: asyncio.Task | None = None
+        self.generation: int = 0
+        self.loading: bool = False
+        self.showing_latest: bool = False
         self.renderable: TagsTableRenderable | None = None
+        # Bumped whenever the tags change, so that the table is only rebuilt when it has to be.
+        self.version: int = 0
+        self.sort_column: str | None = None
+        self.descending: bool = False
+        # The sort order of each column, worked out the first time the column is sorted by after the tags load.
+        self.orders: dict[str, array] = {}
+        self.size_loader: asyncio.Task | None = None
+        self.requested_sizes: set[str] = set()
+        self.size_semaphore = asyncio.Semaphore(self.size_concurrency)
         self.reveal: bool
         self.client: ContainerRegistry = self.app.client
 
@@ -50,7 +77,16 @@ class TagsWidget(Widget):
     async def clear(self) -> None:
         """Clears the widget."""
 
-        self.tags = []
+        self.generation += 1
+        if self.selection is not None:
+            self.selection.cancel()
+        if self.all_loader is not None:
+            self.all_loader.cancel()
+        if self.size_loader is not None:
+            self.size_loader.cancel()
+        self.set_tags(TagStore())
+        self.pager = None
+        self.loading = False
         self.renderable = None
         self.refresh(layout=True)
 
@@ -61,12 +97,364 @@ class TagsWidget(Widget):
             repository_name (str): The repository name.
         """
 
+        self.start_selection(repository_name)
+        if not repository_name:
+            self.refresh(layout=True)
+
+    def start_selection(self, repository_name: str, latest: bool | None = None) -> None:
+        """Start loading the tags of a repository.
+
+        Loading the tags of the previously selected repository is cancelled, so only the latest selection is ever
+        fetched and rendered.
+
+        Args:
+            repository_name (str): The repository name.
+            latest (bool | None): Only load the most recently updated tags. Defaults to the widget's view mode.
+        """
+
+        self.generation += 1
+        if self.selection is not None:
+            self.selection.cancel()
+        if self.loader is not None:
+            self.loader.cancel()
+        if self.all_loader is not None:
+            self.all_loader.cancel()
+        if self.size_loader is not None:
+            self.size_loader.cancel()
+        # Sizes requested by a cancelled loader have to be requested again.
+        self.requested_sizes.clear()
+
+        if latest is None:
+            # The tag found by a tag search may not be one of the latest tags.
+            latest = self.latest and repository_name not in self.app.tag_hits
+
         if repository_name:
-            self.tags = await self.client.get_tags(repository_name)
-            self.tag_map = {t.name: t for t in self.tags}
+            self.selection = asyncio.create_task(
+                self.select(repository_name, self.generation, latest)
+            )
+
+    async def select(
+        self, repository_name: str, generation: int, latest: bool = False
+    ) -> None:
+        """Load and show the tags of the selected repository.
+
+        Args:
+            repository_name (str): The repository name.
+            generation (int): The selection this load belongs to. Results of older selections are discarded.
+            latest (bool): Only load the most recently updated tags. Defaults to False.
+
+        Raises:
+            asyncio.CancelledError: If a newer selection supersedes this one.
+        """
+
+        try:
+            cached = self.client.cached_tags(repository_name)
+            paged = self.client.tag_pagers.get(repository_name)
+            self.showing_latest = latest
+            if cached:
+                self.pager = None
+                self.set_tags(
+                    cached.value.latest(self.latest_count) if latest else cached.value
+                )
+            elif (
+                not latest
+                and repository_name not in self.app.tag_hits
+                and paged is not None
+                and paged.tags
+            ):
+                # Pages that were already fetched, for instance by the prefetcher, are shown without waiting.
+                self.pager = paged
+                self.loading = False
+                self.set_tags(paged.tags)
+            else:
+                self.pager = None
+                self.loading = True
+                self.set_tags(TagStore())
+                self.refresh()
+
+                # Wait for the selection to settle before fetching, in case the user is still moving on. Only real
+                # fetches are debounced.
+                await asyncio.sleep(self.debounce)
+
+                pager = None
+                if latest:
+                    tags = await self.client.get_latest_tags(
+                        repository_name, self.latest_count
+                    )
+                elif repository_name in self.app.tag_hits:
+                    # The tag found by a tag search could be on any page.
+                    tags = await self.client.get_tags(repository_name)
+                else:
+                    # Only the first page is fetched up front, the rest follows as the user pages through the tags.
+                    pager = self.client.tag_pager(repository_name)
+                    tags = await pager.ensure(1)
+                if generation != self.generation:
+                    return
+                self.pager = pager
+                self.loading = False
+                self.set_tags(tags)
+
+            self.log(f"Tag cache: {self.client.tag_cache.stats()}")
             await self.app.set_focus(self)
+            if repository_name in self.app.tag_hits:
+                self.focus_tag(self.app.tag_hits[repository_name])
+            self.load_all_if_sorted()
+            self.refresh(layout=True)
+
+            if cached and not cached.fresh:
+                if latest:
+                    tags = await self.client.get_latest_tags(
+                        repository_name, self.latest_count
+                    )
+                else:
+                    tags = await self.client.get_tags(repository_name)
+                if generation == self.generation:
+                    self.set_tags(tags)
+                    self.refresh()
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if generation != self.generation:
+                return
+            self.loading = False
+            self.log(f"Loading tags for {repository_name} failed: {e!r}")
+            await self.post_message_from_child(
+                ShowFlashNotification(
+                    self,
+                    type=FlashMessageType.ERROR,
+                    value=f'Unable to load the tags of "{repository_name}".',
+                )
+            )
+
+    def focus_tag(self, name: str) -> None:
+        """Move the cursor to a tag and select it, if it has been loaded.
 
-        self.refresh(layout=True)
+        Args:
+            name (str): The tag name.
+        """
+
+        index = self.tags.find(name)
+        if index is None:
+            return
+
+        self.move_to(index)
+        # The SDK tag properties are only created for the selected tag.
+        self.app.selected_tag = self.tags[index].properties(self.app.selected_repo)
+
+    def move_to(self, index: int) -> None:
+        """Move the cursor to a tag, and scroll it to the middle of the list.
+
+        Args:
+            index (int): The index of the tag in the tag store.
+        """
+
+        order = self.sort_order()
+        position = index if order is None else order.index(index)
+        if self.descending:
+            position = len(self.tags) - 1 - position
+
+        self.cursor = position
+        self.offset = position - max(self.size.height - 5, 1) // 2
+        # Otherwise the next render would restore the cursor position of the current renderable.
+        self.renderable = None
+
+    def sort_order(self) -> array | None:
+        """Get the ascending sort order of the tags by the sort column, sorting them if they have not been yet.
+
+        Returns:
+            array | None: The indexes of the tags in sort order, or None if the tags are not sorted.
+        """
+
+        column = self.sort_column
+        if column is None:
+            return None
+
+        order = self.orders.get(column)
+        if order is None:
+            if column == "size":
+                # Tags of unknown size come first.
+                def size(index: int) -> int:
+                    value = self.manifest_size(self.tags.digest(index))
+                    return -1 if value is None else value
+
+                order = self.tags.sort_order(size)
+            else:
+                order = self.tags.sort_order(self.tags.sort_key(column))
+            self.orders[column] = order
+        return order
+
+    def sort(self, column: str | None, descending: bool) -> None:
+        """Sort the tags, keeping the cursor on the same tag.
+
+        Args:
+            column (str | None): The column to sort by, or None for the order the tags were loaded in.
+            descending (bool): Sort in descending order.
+        """
+
+        index = None
+        if self.renderable is not None and len(self.tags) > 0:
+            index = self.renderable.item_index(self.renderable.cursor)
+
+        self.sort_column = column
+        self.descending = descending
+        if index is not None:
+            self.move_to(index)
+        else:
+            self.renderable = None
+
+    def load_all_if_sorted(self) -> None:
+        """Fetch the remaining pages of tags in the background if they are sorted, so that every tag is sorted."""
+
+        if (
+            self.sort_column is not None
+            and self.pager is not None
+            and not self.pager.complete
+            and (self.all_loader is None or self.all_loader.done())
+        ):
+            self.all_loader = asyncio.create_task(self.load_all())
+
+    async def load_all(self) -> None:
+        """Fetch all of the remaining pages of tags, and sort them again.
+
+        Raises:
+            asyncio.CancelledError: If loading is cancelled.
+        """
+
+        pager = self.pager
+        if pager is None:
+            return
+
+        try:
+            await pager.fetch_all()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if pager is not self.pager:
+                return
+            self.log(f"Loading all tags for {pager.name} failed: {e!r}")
+            await self.post_message_from_child(
+                ShowFlashNotification(
+                    self,
+                    type=FlashMessageType.ERROR,
+                    value=f'Unable to load all of the tags of "{pager.name}" to sort them.',
+                )
+            )
+            return
+
+        if pager is self.pager:
+            self.set_tags(pager.tags)
+            # The store only grows, so the tag under the cursor can be found in the order it was shown in.
+            self.sort(self.sort_column, self.descending)
+            self.refresh()
+
+    def manifest_size(self, digest: str | None) -> int | None:
+        """Get the size of a manifest, if it has been loaded.
+
+        Args:
+            digest (str | None): The manifest digest.
+
+        Returns:
+            int | None: The size in bytes, or None if it is not known.
+        """
+
+        return self.client.peek_manifest_size(digest) if digest else None
+
+    def load_sizes(self) -> None:
+        """Fetch the sizes of the visible tags that are not known yet, in the background."""
+
+        if self.renderable is None or (
+            self.size_loader is not None and not self.size_loader.done()
+        ):
+            return
+
+        digests = {
+            tag.digest
+            for tag in self.renderable.renderables(*self.renderable.visible_range())
+            if tag.digest and tag.digest not in self.requested_sizes
+        }
+        digests = {digest for digest in digests if self.manifest_size(digest) is None}
+        if digests:
+            self.requested_sizes.update(digests)
+            self.size_loader = asyncio.create_task(
+                self.fetch_sizes(self.app.selected_repo, digests)
+            )
+
+    async def fetch_sizes(self, repository_name: str, digests: set[str]) -> None:
+        """Fetch the sizes of manifests, and show them.
+
+        Only the manifest properties are requested, a few at a time. The manifests themselves are only downloaded
+        for the properties pane.
+
+        Args:
+            repository_name (str): The repository the manifests belong to.
+            digests (set[str]): The manifest digests.
+        """
+
+        async def fetch(digest: str) -> None:
+            try:
+                async with self.size_semaphore:
+                    await self.client.get_manifest_size(repository_name, digest)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log(f"Loading the manifest of {digest} failed: {e!r}")
+
+        await asyncio.gather(*(fetch(digest) for digest in digests))
+        if repository_name != self.app.selected_repo:
+            return
+
+        self.orders.pop("size", None)
+        if self.sort_column == "size":
+            self.sort(self.sort_column, self.descending)
+        self.version += 1
+        self.refresh()
+
+    async def load_more(self) -> None:
+        """Fetch the next page of tags from the pager.
+
+        If the page cannot be fetched the error is shown, and the page is requested again the next time the user
+        scrolls towards the end of the tags.
+
+        Raises:
+            asyncio.CancelledError: If loading is cancelled.
+        """
+
+        pager = self.pager
+        if pager is None:
+            return
+
+        try:
+            await pager.ensure(len(pager.tags) + 1)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if pager is not self.pager:
+                return
+            self.log(f"Loading more tags for {pager.name} failed: {e!r}")
+            await self.post_message_from_child(
+                ShowFlashNotification(
+                    self,
+                    type=FlashMessageType.ERROR,
+                    value=f'Unable to load more tags of "{pager.name}".',
+                )
+            )
+            return
+
+        if pager is self.pager:
+            self.set_tags(pager.tags)
+            self.refresh()
+
+    def set_tags(self, tags: TagStore) -> None:
+        """Replace the tags shown by the widget.
+
+        Args:
+            tags (TagStore): The tags to show.
+        """
+
+        self.tags = tags
+        self.orders = {}
+        self.version += 1
 
     def on_key(self, event: events.Key) -> None:
         """Handle a key press.
@@ -75,38 +463,91 @@ class TagsWidget(Widget):
             event (events.Key): The event containing the pressed key.
         """
 
+        if event.key == "t" and self.app.selected_repo:
+            self.latest = not self.latest
+            self.start_selection(self.app.selected_repo, latest=self.latest)
+            return
+
+        if event.key == "s":
+            columns = self.sort_columns
+            column = columns[(columns.index(self.sort_column) + 1) % len(columns)]
+            self.sort(column, self.descending)
+            self.load_all_if_sorted()
+            self.refresh()
+            return
+
+        if event.key == "r":
+            self.sort(self.sort_column, not self.descending)
+            self.refresh()
+            return
+
         if self.renderable is None or len(self.tags) == 0:
             return
 
         key = event.key
+
+        # Scrolling past the latest tags falls back to loading all of them.
+        if self.showing_latest and (
+            key in (Keys.PageDown, Keys.Right, Keys.End, "l")
+            or (key == Keys.Down and self.renderable.at_end())
+        ):
+            self.start_selection(self.app.selected_repo, latest=False)
+            return
+
         if key == Keys.Enter:
-            row = self.renderable.get_cell_value(0, self.row)
-            self.app.selected_tag = self.tag_map[str(row)]
-
-        elif key == Keys.Left:
-            self.renderable.previous_page()
-        elif key == Keys.Right:
-            self.renderable.next_page()
-        elif key == "f":
-            self.renderable.first_page()
-        elif key == "l":
-            self.renderable.last_page()
-        elif key == Keys.Up:
-            self.renderable.previous_row()
-        elif key == Keys.Down:
-            self.renderable.next_row()
+            tag = self.renderable.cursor_item()
+            if tag is not None:
+                self.app.selected_tag = tag.properties(self.app.selected_repo)
+            return
 
-        self.refresh(layout=True)
+        if not self.move_cursor(self.renderable, key):
+            return
+
+        # Fetch the next page of tags once the user is within a screen of the end of the loaded ones.
+        _, end = self.renderable.visible_range()
+        if (
+            self.pager is not None
+            and not self.pager.complete
+            and (self.loader is None or self.loader.done())
+            and end + self.renderable.height >= self.renderable.total_items
+        ):
+            self.loader = asyncio.create_task(self.load_more())
+
+        self.schedule_repaint()
 
     def render_table(self) -> None:
-        """Render the table."""
+        """Render the table, reusing the current one unless the tags or size changed."""
+
+        title = "🏷️  tags"
+        if self.loading:
+            title = f"{title} (loading)"
+        elif self.showing_latest:
+            title = f"{title} (latest {len(self.tags)})"
+        elif self.pager is not None and not self.pager.complete:
+            # Only the loaded tags are sorted until the rest arrive.
+            partial = ", sorting loaded tags" if self.sort_column is not None else ""
+            title = f"{title} ({self.pager.total}{partial})"
+
+        height = max(1, self.size.height - 5)
+        if (
+            self.renderable is not None
+            and self.renderable.version == self.version
+            and self.renderable.height == height
+        ):
+            self.renderable.title = title
+            return
 
         self.renderable = TagsTableRenderable(
-            items=self.tags or [],
-            title="🏷️  tags",
-            page_size=self.size.height - 5,
-            page=self.page,
-            row=self.row,
+            items=self.tags,
+            title=title,
+            height=height,
+            cursor=self.cursor,
+            offset=self.offset,
+            version=self.version,
+            order=self.sort_order(),
+            sort_column=self.sort_column,
+            descending=self.descending,
+            size=self.manifest_size,
         )
 
     def render(self) -> RenderableType:
@@ -117,11 +558,12 @@ class TagsWidget(Widget):
         """
 
         if self.renderable is not None:
-            self.page = self.renderable.page
-            self.row = self.renderable.row
+            self.cursor = self.renderable.cursor
+            self.offset = self.renderable.offset
 
         self.render_table()
         assert isinstance(self.renderable, TagsTableRenderable)
+        self.load_sizes()
         return Panel(
             renderable=self.renderable,
             title=f"[{styles.GREY}]( {self.renderable.title} )[/]",
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import pytest
+from azure.core.credentials import AccessToken
+
+from azurecr_browser.auth import CachedCredential
+
+SCOPE = "https://management.azure.com/.default"
+
+
+class FakeCredential:
+    """Hands out numbered tokens once released, and records every request."""
+
+    def __init__(self, expires_in: float = 3600) -> None:
+        self.expires_in = expires_in
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.error: Exception | None = None
+
+    async def get_token(self, *scopes: str, **kwargs) -> AccessToken:
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return AccessToken(f"token-{self.calls}", int(time.time() + self.expires_in))
+
+
+def test_concurrent_callers_share_one_refresh():
+    async def run() -> tuple[CachedCredential, list[AccessToken]]:
+        credential = CachedCredential(FakeCredential())
+        callers = [asyncio.ensure_future(credential.get_token(SCOPE)) for _ in range(5)]
+        await asyncio.sleep(0)
+        credential.credential.release.set()
+        return credential, await asyncio.gather(*callers)
+
+    credential, tokens = asyncio.run(run())
+    assert credential.credential.calls == 1
+    assert {token.token for token in tokens} == {"token-1"}
+    assert credential.refreshing == {}
+
+
+def test_cancelled_callers_do_not_leave_the_request_behind():
+    async def run() -> tuple[CachedCredential, AccessToken]:
+        credential = CachedCredential(FakeCredential())
+        caller = asyncio.ensure_future(credential.get_token(SCOPE))
+        await asyncio.sleep(0)
+        caller.cancel()
+        credential.credential.release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert credential.refreshing == {}
+        return credential, await credential.get_token(SCOPE)
+
+    credential, token = asyncio.run(run())
+    # The request finished without anyone waiting for it, and its token was still cached.
+    assert credential.credential.calls == 1
+    assert token.token == "token-1"
+
+
+def test_failed_refresh_is_retried():
+    async def run() -> tuple[CachedCredential, AccessToken]:
+        credential = CachedCredential(FakeCredential())
+        credential.credential.error = ConnectionError("The connection was reset")
+        credential.credential.release.set()
+        with pytest.raises(ConnectionError):
+            await credential.get_token(SCOPE)
+        credential.credential.error = None
+        return credential, await credential.get_token(SCOPE)
+
+    credential, token = asyncio.run(run())
+    assert credential.credential.calls == 2
+    assert token.token == "token-2"
+
+
+def test_expiring_token_is_refreshed_once_in_the_background():
+    async def run() -> tuple[CachedCredential, list[AccessToken], AccessToken]:
+        credential = CachedCredential(FakeCredential(expires_in=60))
+        credential.credential.release.set()
+        await credential.get_token(SCOPE)
+
+        tokens = [await credential.get_token(SCOPE) for _ in range(3)]
+        assert len(credential.background) == 1
+        await asyncio.gather(*credential.background.values())
+        assert credential.background == {}
+        return credential, tokens, await credential.get_token(SCOPE)
+
+    credential, tokens, token = asyncio.run(run())
+    # The current token is handed out while the new one is fetched.
+    assert {token.token for token in tokens} == {"token-1"}
+    assert credential.credential.calls == 2
+    assert token.token == "token-2"
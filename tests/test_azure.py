@@ -0,0 +1,229 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from azure.containerregistry import ArtifactTagProperties
+from azure.core.async_paging import AsyncItemPaged, AsyncList
+from azure.core.exceptions import ServiceRequestError
+
+from azurecr_browser import auth
+from azurecr_browser.azure import ContainerRegistry
+
+BASE = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class FakeClient:
+    """Serves a fixed number of tags per repository, and records every page requested."""
+
+    def __init__(self, tags: int = 250) -> None:
+        self.tags = tags
+        self.calls: list[tuple[str, str | None]] = []
+        # Page requests that fail with a ServiceRequestError before succeeding.
+        self.failures = 0
+        # Repositories whose page requests always fail.
+        self.broken: set[str] = set()
+
+    def list_tag_properties(self, name: str, results_per_page: int = 100, **kwargs):
+        items = [
+            ArtifactTagProperties(
+                name=f"v{i}",
+                digest=f"sha256:{i:064d}",
+                created_on=BASE + datetime.timedelta(minutes=i),
+                last_updated_on=BASE + datetime.timedelta(minutes=i),
+            )
+            for i in range(self.tags)
+        ]
+
+        async def get_next(token):
+            self.calls.append((name, token))
+            await asyncio.sleep(0)
+            if name in self.broken:
+                raise ServiceRequestError("The service is unavailable")
+            if self.failures:
+                self.failures -= 1
+                raise ServiceRequestError("The connection was reset")
+            return int(token or 0)
+
+        async def extract(start):
+            end = start + results_per_page
+            return (str(end) if end < len(items) else None), AsyncList(items[start:end])
+
+        return AsyncItemPaged(get_next, extract)
+
+    async def get_manifest_properties(self, name: str, digest: str):
+        self.calls.append((name, digest))
+        return SimpleNamespace(size_in_bytes=1024)
+
+    async def get_manifest(self, name: str, digest: str):
+        raise AssertionError("The manifest should not be downloaded")
+
+
+def make_registry() -> ContainerRegistry:
+    # The registry creates its SDK client, and the shared transport, so it needs a running event loop.
+    registry = ContainerRegistry("fake")
+    registry.client = FakeClient()  # type: ignore[assignment]
+    return registry
+
+
+async def collect(registry: ContainerRegistry, names: list[str]) -> dict:
+    return {name: tags async for name, tags in registry.get_tags_many(names)}
+
+
+def test_get_tags_many_uses_fresh_cache():
+    names = ["a", "b", "c"]
+
+    async def run() -> tuple[ContainerRegistry, int, dict, dict]:
+        registry = make_registry()
+        first = await collect(registry, names)
+        calls = len(registry.client.calls)
+        second = await collect(registry, names)
+        await auth.close()
+        return registry, calls, first, second
+
+    registry, calls, first, second = asyncio.run(run())
+    assert calls == 9
+    assert len(registry.client.calls) == calls
+    assert {name: len(tags) for name, tags in second.items()} == {
+        name: len(tags) for name, tags in first.items()
+    }
+
+
+def test_get_tags_many_stops_every_worker_on_error():
+    names = [f"r{i}" for i in range(200)]
+
+    async def run() -> tuple[ContainerRegistry, int]:
+        registry = make_registry()
+        registry.client.broken = {"r3"}
+        with pytest.raises(ServiceRequestError):
+            async for _ in registry.get_tags_many(names, concurrency=4):
+                pass
+        calls = len(registry.client.calls)
+        await asyncio.sleep(0.01)
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+        await auth.close()
+        return registry, calls
+
+    registry, calls = asyncio.run(run())
+    assert len(registry.client.calls) == calls
+
+
+def test_get_tags_many_stops_every_worker_when_the_consumer_stops():
+    names = [f"r{i}" for i in range(200)]
+
+    async def run() -> ContainerRegistry:
+        registry = make_registry()
+        results = registry.get_tags_many(names, concurrency=4)
+        async for name, _ in results:
+            if name == "r1":
+                break
+        await results.aclose()
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+        await auth.close()
+        return registry
+
+    registry = asyncio.run(run())
+    assert len({name for name, _ in registry.client.calls}) < len(names)
+
+
+def test_get_tags_many_reports_errors_and_continues():
+    names = [f"r{i}" for i in range(10)]
+    errors = []
+
+    async def run() -> dict:
+        registry = make_registry()
+        registry.client.broken = {"r3"}
+        results = {
+            name: tags
+            async for name, tags in registry.get_tags_many(
+                names, concurrency=4, on_error=lambda name, e: errors.append(name)
+            )
+        }
+        await auth.close()
+        return results
+
+    results = asyncio.run(run())
+    assert sorted(results) == sorted(set(names) - {"r3"})
+    assert errors == ["r3"]
+
+
+def test_get_tags_uses_fresh_cache_until_invalidated():
+    async def run() -> ContainerRegistry:
+        registry = make_registry()
+        await registry.get_tags("a")
+        await registry.get_tags("a")
+        registry.invalidate_tags("a")
+        await registry.get_tags("a")
+        await auth.close()
+        return registry
+
+    registry = asyncio.run(run())
+    assert registry.client.calls == [("a", None), ("a", "100"), ("a", "200")] * 2
+
+
+def test_invalidate_tags_discards_partial_pager():
+    async def run() -> ContainerRegistry:
+        registry = make_registry()
+        await registry.tag_pager("a").ensure(1)
+        registry.invalidate_tags("a")
+        await registry.get_tags("a")
+        await auth.close()
+        return registry
+
+    registry = asyncio.run(run())
+    assert registry.client.calls == [
+        ("a", None),
+        ("a", None),
+        ("a", "100"),
+        ("a", "200"),
+    ]
+
+
+def test_tag_pager_retries_failed_page():
+    async def run() -> ContainerRegistry:
+        registry = make_registry()
+        pager = registry.tag_pager("a")
+        await pager.ensure(1)
+        registry.client.failures = 1
+        with pytest.raises(ServiceRequestError):
+            await pager.ensure(101)
+        assert len(pager.tags) == 100
+        await pager.ensure(101)
+        assert len(pager.tags) == 200
+        await auth.close()
+        return registry
+
+    registry = asyncio.run(run())
+    assert registry.client.calls == [("a", None), ("a", "100"), ("a", "100")]
+
+
+def test_tag_pager_notifies_listeners_of_every_page():
+    async def run() -> list[tuple[str, int]]:
+        registry = make_registry()
+        notified = []
+        registry.tag_listeners.append(
+            lambda name, tags: notified.append((name, len(tags)))
+        )
+        pager = registry.tag_pager("a")
+        await pager.ensure(1)
+        await pager.ensure(101)
+        await pager.fetch_all()
+        await registry.tag_pager("b").fetch_all()
+        await auth.close()
+        return notified
+
+    # Pages fetched by a single call are passed on together.
+    assert asyncio.run(run()) == [("a", 100), ("a", 200), ("a", 250), ("b", 250)]
+
+
+def test_get_manifest_size_only_requests_properties():
+    async def run() -> tuple[ContainerRegistry, list]:
+        registry = make_registry()
+        sizes = [await registry.get_manifest_size("a", "sha256:1") for _ in range(2)]
+        await auth.close()
+        return registry, sizes
+
+    registry, sizes = asyncio.run(run())
+    assert sizes == [1024, 1024]
+    assert registry.client.calls == [("a", "sha256:1")]
+    assert registry.peek_manifest_size("sha256:1") == 1024
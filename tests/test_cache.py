@@ -0,0 +1,98 @@
+import os
+import time
+
+from azurecr_browser.cache import CacheEntry, CatalogCache, ManifestCache
+from azurecr_browser.tagstore import TagRecord, TagStore
+
+
+def make_tags(count: int = 3) -> TagStore:
+    return TagStore(
+        [TagRecord(f"v{i}", f"sha256:{i:064d}", 0, 0) for i in range(count)]
+    )
+
+
+def test_entries_go_stale_after_their_ttl():
+    assert CacheEntry([], time.time(), ttl=60).fresh is True
+    assert CacheEntry([], time.time() - 61, ttl=60).fresh is False
+
+
+def test_stale_tags_are_still_returned(tmp_path):
+    cache = CatalogCache("fake", path=str(tmp_path), tags_ttl=0)
+    cache.set_tags("a", make_tags())
+
+    entry = cache.get_tags("a")
+    assert entry is not None
+    assert entry.fresh is False
+    assert [tag.name for tag in entry.value] == ["v0", "v1", "v2"]
+
+
+def test_refresh_ignores_existing_entries(tmp_path):
+    CatalogCache("fake", path=str(tmp_path)).set_repositories(["a"])
+    cache = CatalogCache("fake", path=str(tmp_path), refresh=True)
+
+    assert cache.get_repositories() is None
+    cache.set_repositories(["b"])
+    assert CatalogCache("fake", path=str(tmp_path)).get_repositories().value == ["b"]
+
+
+def test_least_recently_stored_tags_are_pruned(tmp_path):
+    cache = CatalogCache("fake", path=str(tmp_path))
+    cache.set_tags("a", make_tags())
+    size = os.path.getsize(cache._tags_file("a"))
+    cache.set_tags("b", make_tags())
+    # Modification times can be equal on coarse clocks, so the order is made explicit.
+    os.utime(cache._tags_file("a"), (0, 0))
+
+    # The timestamps stored with the tags can differ in length by a few bytes.
+    cache.max_size = 2 * size + 16
+    cache.set_tags("c", make_tags())
+
+    assert cache.has_tags("a") is False
+    assert cache.has_tags("b") is True
+    assert cache.has_tags("c") is True
+    assert cache._size == sum(
+        os.path.getsize(cache._tags_file(name)) for name in ("b", "c")
+    )
+
+
+def test_corrupt_entries_are_ignored(tmp_path):
+    cache = CatalogCache("fake", path=str(tmp_path))
+    cache.set_tags("a", make_tags())
+    with open(cache._tags_file("a"), "w") as f:
+        f.write('{"stored_at": ')
+    with open(os.path.join(cache.path, "repositories.json"), "w") as f:
+        f.write("not json")
+
+    assert cache.get_tags("a") is None
+    assert cache.get_repositories() is None
+
+    manifests = ManifestCache(path=str(tmp_path))
+    os.makedirs(manifests.path)
+    with open(manifests._file("sha256:1"), "w") as f:
+        f.write("{")
+    assert manifests.get("sha256:1") is None
+
+
+def test_failed_writes_are_logged(tmp_path):
+    # A file where the cache directory should be makes every write fail.
+    (tmp_path / "fake").write_text("")
+    messages = []
+    cache = CatalogCache("fake", path=str(tmp_path), log=messages.append)
+
+    cache.set_repositories(["a"])
+    cache.set_tags("a", make_tags())
+
+    assert len(messages) == 2
+    assert cache.get_repositories() is None
+    assert cache.get_tags("a") is None
+
+
+def test_failed_manifest_writes_are_kept_in_memory(tmp_path):
+    (tmp_path / "manifests").write_text("")
+    messages = []
+    manifests = ManifestCache(path=str(tmp_path), log=messages.append)
+
+    manifests.set("sha256:1", {"size": 1024})
+
+    assert manifests.get("sha256:1") == {"size": 1024}
+    assert len(messages) == 1
@@ -0,0 +1,120 @@
+import datetime
+import json
+
+import pytest
+from azure.containerregistry import ArtifactTagProperties
+from azure.core.async_paging import AsyncItemPaged, AsyncList
+from azure.core.exceptions import ResourceNotFoundError
+from click.testing import CliRunner
+
+from azurecr_browser.azure import ContainerRegistry
+from azurecr_browser.cli import main
+
+BASE = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+REPOSITORIES = ["team/api", "team/worker", "web"]
+
+
+def paged(items: list, page_size: int) -> AsyncItemPaged:
+    async def get_next(token):
+        return int(token or 0)
+
+    async def extract(start):
+        end = start + page_size
+        return (str(end) if end < len(items) else None), AsyncList(items[start:end])
+
+    return AsyncItemPaged(get_next, extract)
+
+
+class FakeClient:
+    """Serves three tags for each of a few repositories."""
+
+    def list_repository_names(self, results_per_page: int | None = None, **kwargs):
+        return paged(REPOSITORIES, results_per_page or 2)
+
+    def list_tag_properties(self, name: str, results_per_page: int = 100, **kwargs):
+        if name not in REPOSITORIES:
+            # The service only reports a missing repository once a page is requested.
+            async def missing(token):
+                raise ResourceNotFoundError("The repository does not exist")
+
+            return AsyncItemPaged(missing, None)
+
+        tags = [
+            ArtifactTagProperties(
+                name=f"v{i}",
+                digest=f"sha256:{i:064d}",
+                created_on=BASE,
+                last_updated_on=BASE + datetime.timedelta(minutes=i),
+            )
+            for i in range(3)
+        ]
+        if kwargs.get("order_by") == "timedesc":
+            tags.reverse()
+        return paged(tags, results_per_page)
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.setattr(ContainerRegistry, "client", FakeClient())
+    return CliRunner()
+
+
+def invoke(runner: CliRunner, *args: str):
+    return runner.invoke(main, [*args, "--registry", "fake", "--no-cache"])
+
+
+def test_ls_jsonl(runner):
+    result = invoke(runner, "ls")
+
+    assert result.exit_code == 0, result.output
+    assert [json.loads(line) for line in result.output.splitlines()] == [
+        {"repository": name} for name in REPOSITORIES
+    ]
+
+
+def test_ls_tsv(runner):
+    result = invoke(runner, "ls", "--format", "tsv", "--page-size", "1")
+
+    assert result.exit_code == 0, result.output
+    assert result.output.splitlines() == ["repository", *REPOSITORIES]
+
+
+def test_tags_jsonl(runner):
+    result = invoke(runner, "tags", "team/api", "web")
+
+    assert result.exit_code == 0, result.output
+    records = [json.loads(line) for line in result.output.splitlines()]
+    # Repositories are fetched concurrently, but the tags of each are written in order.
+    assert [record["tag"] for record in records if record["repository"] == "web"] == [
+        "v0",
+        "v1",
+        "v2",
+    ]
+    assert len(records) == 6
+    assert records[0].keys() == {
+        "repository",
+        "tag",
+        "digest",
+        "created_on",
+        "last_updated_on",
+    }
+    assert records[0]["created_on"] == "2024-01-01T00:00:00+00:00"
+
+
+def test_tags_tsv_of_every_repository(runner):
+    result = invoke(runner, "tags", "--format", "tsv", "--latest", "1")
+
+    assert result.exit_code == 0, result.output
+    lines = result.output.splitlines()
+    assert lines[0] == "repository\ttag\tdigest\tcreated_on\tlast_updated_on"
+    assert sorted(line.split("\t")[:2] for line in lines[1:]) == [
+        [name, "v2"] for name in REPOSITORIES
+    ]
+
+
+def test_tags_reports_missing_repositories(runner):
+    result = invoke(runner, "tags", "web", "missing")
+
+    assert result.exit_code == 1
+    assert "Repositories not found: missing" in result.output
+    assert len([line for line in result.output.splitlines() if '"web"' in line]) == 3
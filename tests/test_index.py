@@ -0,0 +1,237 @@
+import asyncio
+import os
+import re
+
+import pytest
+
+from azurecr_browser.cache import SEARCH_INDEX_FILE, CatalogCache
+from azurecr_browser.index import (
+    IndexSnapshot,
+    MappedPostings,
+    SearchIndex,
+    apply_changes,
+    compile_pattern,
+    edit_distance,
+    glob_to_regex,
+    read_snapshot,
+    regex_prefix,
+    write_snapshot,
+)
+
+NAMES = ["deploy", "deployer", "ci/deploy-tools", "blue-redeploy", "deplyo", "web"]
+
+
+def make_index(names: list[str] = NAMES) -> SearchIndex:
+    index = SearchIndex()
+    index.update(names)
+    return index
+
+
+def test_matches_are_ranked_by_tier():
+    # Exact, prefix, word prefix, substring and finally fuzzy matches.
+    assert make_index().query("deploy") == [
+        "deploy",
+        "deployer",
+        "ci/deploy-tools",
+        "blue-redeploy",
+        "deplyo",
+    ]
+
+
+def test_query_is_case_insensitive_and_limited():
+    index = make_index()
+
+    assert index.query("DEPLOY", limit=2) == ["deploy", "deployer"]
+    assert index.query("") == []
+
+
+def test_fuzzy_matches_rank_subsequences_first():
+    # "deplyer" is a subsequence of "deployer", and two edits away from "deplyo".
+    assert make_index().query("deplyer") == ["deployer", "deplyo"]
+
+
+def test_edit_distance():
+    assert edit_distance("kitten", "sitting", 5) == 3
+    assert edit_distance("deploy", "deploy", 0) == 0
+    assert edit_distance("", "abc", 5) == 3
+    # Distances past the limit are reported as limit + 1, however large they are.
+    assert edit_distance("kitten", "sitting", 1) == 2
+    assert edit_distance("a", "abcdef", 2) == 3
+
+
+def test_incremental_updates_match_a_rebuild():
+    index = make_index()
+    names = ["deploy", "ci/deploy-tools", "web/frontend", "Web/Backend"]
+
+    assert index.update(names) == (2, 4)
+    rebuilt = make_index(names)
+    for attribute in ("keys", "sorted_keys", "sorted_words"):
+        assert getattr(index.snapshot, attribute) == getattr(
+            rebuilt.snapshot, attribute
+        )
+    for attribute in ("words", "grams", "word_grams"):
+        assert dict(getattr(index.snapshot, attribute)) == dict(
+            getattr(rebuilt.snapshot, attribute)
+        )
+    assert index.query("backend") == ["web/backend"]
+    # The removed name is only found by the fuzzy matches of its words.
+    assert index.query("deployer") == ["ci/deploy-tools", "deploy"]
+
+
+def test_add_and_remove():
+    index = make_index()
+
+    assert index.add(["Deploy", "new"]) == 1
+    assert index.remove(["deployer", "missing"]) == 1
+    assert index.query("new") == ["new"]
+    assert "deployer" not in index.snapshot.keys
+
+
+def test_apply_changes_copies_the_postings():
+    postings = {"a": ("x", "y"), "b": ("x",)}
+    changes = {"a": (set(), {"x", "y"}), "b": ({"z"}, set()), "c": ({"x"}, set())}
+
+    updated, new, dropped = apply_changes(postings, changes, ordered=True)
+
+    assert updated == {"b": ("x", "z"), "c": ("x",)}
+    assert (new, dropped) == ({"c"}, {"a"})
+    assert postings == {"a": ("x", "y"), "b": ("x",)}
+
+
+@pytest.mark.parametrize(
+    "glob, regex",
+    [
+        ("infra/*", "^infra/[^/]*$"),
+        ("**/api", "^.*/api$"),
+        ("v?.[!a]", r"^v[^/]\.[^a]$"),
+        ("a.b+c(d)", r"^a\.b\+c\(d\)$"),
+        # An unterminated bracket is matched literally.
+        ("v[1", r"^v\[1$"),
+    ],
+)
+def test_glob_to_regex(glob, regex):
+    assert glob_to_regex(glob) == regex
+
+
+def test_single_star_does_not_cross_slashes():
+    pattern = re.compile(glob_to_regex("infra/*"))
+    assert pattern.search("infra/payments")
+    assert not pattern.search("infra/payments/api")
+    assert re.search(glob_to_regex("infra/**"), "infra/payments/api")
+
+
+@pytest.mark.parametrize(
+    "pattern, prefix",
+    [
+        ("^infra/pay.*", "infra/pay"),
+        (r"^Web\.App-v2", "web.app-v2"),
+        # The last character is optional or repeated, so it is not part of every match.
+        ("^ab?c", "a"),
+        ("^ab{2}", "a"),
+        ("^a|b", ""),
+        ("infra", ""),
+        ("^[a-z]+", ""),
+    ],
+)
+def test_regex_prefix(pattern, prefix):
+    assert regex_prefix(pattern) == prefix
+
+
+def test_compile_pattern():
+    pattern, prefix, literals = compile_pattern("Infra/*-API")
+    assert (pattern.pattern, prefix, literals) == (
+        "^infra/[^/]*\\-api$",
+        "infra/",
+        ["-api"],
+    )
+
+    pattern, prefix, literals = compile_pattern("~^Infra/pay")
+    assert (prefix, literals) == ("infra/pay", [])
+    assert pattern.flags & re.IGNORECASE
+
+
+def test_match_patterns():
+    index = make_index(["infra/payments", "Infra/Auth", "web/paymentsvc", "payments"])
+
+    assert asyncio.run(index.match("~^INFRA/")) == ["infra/auth", "infra/payments"]
+    assert asyncio.run(index.match("*/pay*")) == ["infra/payments", "web/paymentsvc"]
+    assert asyncio.run(index.match("**pay*")) == [
+        "infra/payments",
+        "payments",
+        "web/paymentsvc",
+    ]
+    assert asyncio.run(index.match("~ments$", chunk_size=1)) == [
+        "infra/payments",
+        "payments",
+    ]
+
+
+def assert_same_snapshot(a: IndexSnapshot, b: IndexSnapshot) -> None:
+    assert a.keys == b.keys
+    assert a.sorted_keys == b.sorted_keys
+    assert a.sorted_words == b.sorted_words
+    for attribute in ("words", "grams", "word_grams"):
+        assert dict(getattr(a, attribute)) == dict(getattr(b, attribute))
+
+
+def test_snapshot_round_trip(tmp_path):
+    index = make_index()
+    path = str(tmp_path / SEARCH_INDEX_FILE)
+    write_snapshot(index.snapshot, path)
+
+    snapshot = read_snapshot(path)
+    assert isinstance(snapshot.words, MappedPostings)
+    assert_same_snapshot(snapshot, index.snapshot)
+
+    restored = SearchIndex()
+    assert restored.restore(snapshot) is True
+    assert restored.query("deploy") == index.query("deploy")
+
+    # Updates are layered on top of the mapped postings, without changing the ones they were copied from.
+    restored.update(NAMES[1:] + ["new"])
+    assert_same_snapshot(restored.snapshot, make_index(NAMES[1:] + ["new"]).snapshot)
+    assert "deploy" in snapshot.words["deploy"]
+
+
+def test_mapped_postings_changes():
+    postings = MappedPostings({}, memoryview(b""), [], ordered=True)
+    postings["a"] = ("x",)
+    copy = postings.copy()
+    del copy["a"]
+
+    assert "a" in postings and "a" not in copy
+    assert list(postings) == ["a"] and len(copy) == 0
+    with pytest.raises(KeyError):
+        copy["a"]
+    with pytest.raises(KeyError):
+        del copy["a"]
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [
+        lambda data: b"",
+        lambda data: data[:-4],
+        lambda data: data[:20],
+        lambda data: b"NOTANIDX" + data[8:],
+    ],
+    ids=["empty", "truncated", "truncated header", "wrong format"],
+)
+def test_corrupt_snapshots_are_rejected_and_rebuilt(tmp_path, corrupt):
+    cache = CatalogCache("fake", path=str(tmp_path))
+    index = make_index()
+    cache.set_search_index(index.snapshot)
+    path = os.path.join(cache.path, SEARCH_INDEX_FILE)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(corrupt(data))
+
+    with pytest.raises(ValueError):
+        read_snapshot(path)
+    assert cache.get_search_index() is None
+
+    cache.set_search_index(make_index().snapshot)
+    snapshot = cache.get_search_index()
+    assert snapshot is not None
+    assert_same_snapshot(snapshot, index.snapshot)
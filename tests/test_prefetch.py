@@ -0,0 +1,89 @@
+import asyncio
+from types import SimpleNamespace
+
+from azurecr_browser.prefetch import TagIndexer
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.fetched: list[str] = []
+        self.cached: set[str] = set()
+        self.broken: set[str] = set()
+        self.notified: list[str] = []
+
+    def cached_tags(self, name: str):
+        return SimpleNamespace(value=[], fresh=True) if name in self.cached else None
+
+    def notify_tags(self, name: str, tags: list) -> None:
+        self.notified.append(name)
+
+    async def get_tags_many(self, names: list[str], concurrency: int, on_error=None):
+        for name in names:
+            await asyncio.sleep(0.01)
+            if name in self.broken:
+                on_error(name, ConnectionError("The connection was reset"))
+                continue
+            self.fetched.append(name)
+            yield name, []
+
+
+def test_indexer_sweeps_repositories_added_while_running():
+    async def run() -> FakeClient:
+        client = FakeClient()
+        indexer = TagIndexer(client)  # type: ignore[arg-type]
+        indexer.start(["a", "b"])
+        await asyncio.sleep(0)
+        indexer.start(["a", "b", "c"])
+        await indexer.task
+        return client
+
+    assert asyncio.run(run()).fetched == ["a", "b", "c"]
+
+
+def test_indexer_sweeps_repositories_added_after_finishing():
+    async def run() -> tuple[FakeClient, TagIndexer]:
+        client = FakeClient()
+        indexer = TagIndexer(client)  # type: ignore[arg-type]
+        indexer.start(["a", "b"])
+        await indexer.task
+        indexer.start(["a", "b", "c"])
+        assert indexer.running
+        await indexer.task
+        return client, indexer
+
+    client, indexer = asyncio.run(run())
+    assert client.fetched == ["a", "b", "c"]
+    assert (indexer.indexed, indexer.total) == (3, 3)
+
+
+def test_indexer_skips_failed_repositories_and_retries_them_later():
+    async def run() -> tuple[FakeClient, TagIndexer]:
+        client = FakeClient()
+        client.broken = {"b"}
+        indexer = TagIndexer(client)  # type: ignore[arg-type]
+        indexer.start(["a", "b", "c"])
+        await indexer.task
+        assert (indexer.indexed, indexer.total) == (2, 2)
+
+        client.broken = set()
+        indexer.start(["a", "b", "c"])
+        await indexer.task
+        return client, indexer
+
+    client, indexer = asyncio.run(run())
+    assert client.fetched == ["a", "c", "b"]
+    assert (indexer.indexed, indexer.total) == (3, 3)
+
+
+def test_indexer_does_not_notify_cached_tags_again():
+    async def run() -> FakeClient:
+        client = FakeClient()
+        client.cached = {"a"}
+        indexer = TagIndexer(client)  # type: ignore[arg-type]
+        indexer.start(["a", "b"])
+        await indexer.task
+        return client
+
+    client = asyncio.run(run())
+    assert client.fetched == ["b"]
+    assert client.notified == []
@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from textual._context import active_app
+
+from azurecr_browser.renderables import ReposTableRenderable
+from azurecr_browser.widgets import RepositoriesWidget
+
+
+class FakeClient:
+    acr_name = "fake"
+
+    def has_tags(self, name: str) -> bool:
+        return True
+
+    def cached_repositories(self) -> None:
+        return None
+
+    async def iter_repositories(self):
+        yield ["repo-0", "repo-1"]
+        raise ConnectionError("The connection was reset")
+
+
+@pytest.fixture
+def widget():
+    app = SimpleNamespace(
+        client=FakeClient(), searchable_nodes=[], log=lambda *args, **kwargs: None
+    )
+    token = active_app.set(app)
+    try:
+        yield RepositoriesWidget()
+    finally:
+        active_app.reset(token)
+
+
+def test_visible_after_init(widget):
+    assert widget.visible is True
+
+
+def test_visible_after_prefetch(widget):
+    repositories = [f"repo-{i}" for i in range(10)]
+    widget.renderable = ReposTableRenderable(
+        items=repositories, title="repositories", height=3
+    )
+    widget.prefetch_visible()
+
+    assert widget.visible is True
+    assert widget.prefetched_rows == repositories[:3]
+
+
+def test_load_repositories_reports_errors(widget):
+    messages = []
+
+    async def post_message_from_child(message) -> None:
+        messages.append(message)
+
+    widget.post_message_from_child = post_message_from_child
+    asyncio.run(widget.load_repositories())
+
+    assert widget.catalog == ["repo-0", "repo-1"]
+    assert [message.value for message in messages] == [
+        'Unable to load the repositories of "fake".'
+    ]
@@ -0,0 +1,27 @@
+import pytest
+
+from azurecr_browser.renderables import ReposTableRenderable
+
+ITEMS = [f"repo-{i}" for i in range(10)]
+
+
+@pytest.mark.parametrize("height", [-5, 0])
+def test_height_is_at_least_one_row(height):
+    renderable = ReposTableRenderable(items=ITEMS, title="repositories", height=height)
+
+    assert renderable.height == 1
+    assert renderable.visible_range() == (0, 1)
+
+    renderable.next_page()
+    assert renderable.cursor == 1
+    assert renderable.visible_range() == (1, 2)
+
+
+def test_cursor_scrolls_into_view():
+    renderable = ReposTableRenderable(items=ITEMS, title="repositories", height=3)
+
+    renderable.cursor = 5
+    assert renderable.visible_range() == (3, 6)
+
+    renderable.last_row()
+    assert renderable.visible_range() == (7, 10)
@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from textual._context import active_app
+
+from azurecr_browser.tagstore import TagRecord, TagStore
+from azurecr_browser.widgets import TagsWidget
+
+
+class FakePager:
+    def __init__(self, name: str, tags: TagStore) -> None:
+        self.name = name
+        self.tags = tags
+        self.complete = False
+
+    async def ensure(self, count: int) -> TagStore:
+        raise AssertionError("The loaded pages should be shown without fetching")
+
+    async def fetch_all(self) -> TagStore:
+        self.tags.extend([TagRecord("v0", "sha256:0", 0, 0)])
+        self.complete = True
+        return self.tags
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.tag_pagers: dict[str, FakePager] = {}
+        self.tag_cache = SimpleNamespace(stats=lambda: "")
+
+    def cached_tags(self, name: str) -> None:
+        return None
+
+    def tag_pager(self, name: str) -> FakePager:
+        return self.tag_pagers[name]
+
+
+@pytest.fixture
+def widget():
+    async def set_focus(widget) -> None:
+        pass
+
+    app = SimpleNamespace(
+        client=FakeClient(),
+        tag_hits={},
+        set_focus=set_focus,
+        log=lambda *args, **kwargs: None,
+    )
+    token = active_app.set(app)
+    try:
+        yield TagsWidget()
+    finally:
+        active_app.reset(token)
+
+
+def test_select_shows_prefetched_pages_without_debouncing(widget):
+    tags = TagStore([TagRecord("v1", "sha256:1", 1, 1)])
+    pager = FakePager("a", tags)
+    widget.client.tag_pagers["a"] = pager
+    widget.debounce = 60
+    widget.refresh = lambda *args, **kwargs: None
+
+    async def run() -> None:
+        await asyncio.wait_for(widget.select("a", widget.generation), timeout=1)
+
+    asyncio.run(run())
+    assert widget.pager is pager
+    assert widget.tags is tags
+    assert widget.loading is False
+
+
+def test_sorting_fetches_the_remaining_pages(widget):
+    pager = FakePager("a", TagStore([TagRecord("v1", "sha256:1", 1, 1)]))
+    widget.pager = pager
+    widget.set_tags(pager.tags)
+    widget.refresh = lambda *args, **kwargs: None
+
+    async def run() -> None:
+        widget.sort("tag", descending=False)
+        widget.load_all_if_sorted()
+        await widget.all_loader
+
+    asyncio.run(run())
+    assert pager.complete is True
+    assert [widget.tags[i].name for i in widget.sort_order()] == ["v0", "v1"]
@@ -0,0 +1,115 @@
+import datetime
+import json
+
+from azure.containerregistry import ArtifactTagProperties
+
+from azurecr_browser.tagstore import (
+    MISSING_TIME,
+    TagRecord,
+    TagStore,
+    from_timestamp,
+    to_timestamp,
+)
+
+BASE = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+DIGEST = "sha256:" + "ab" * 32
+
+
+def make_tags() -> TagStore:
+    return TagStore(
+        [
+            TagRecord("v2", DIGEST, 20, 30),
+            TagRecord("v10", "sha256:" + "01" * 32, 10, MISSING_TIME),
+            TagRecord("latest", "md5:not-a-sha256", 30, 15),
+            TagRecord("v1", None, 5, 5),
+        ]
+    )
+
+
+def test_timestamps_are_microseconds_since_the_epoch():
+    value = BASE + datetime.timedelta(microseconds=1)
+
+    assert to_timestamp(value) == 1704067200000001
+    assert from_timestamp(to_timestamp(value)) == value
+    # Naive datetimes are taken to be in UTC.
+    assert to_timestamp(value.replace(tzinfo=None)) == to_timestamp(value)
+    assert to_timestamp(None) == MISSING_TIME
+    assert from_timestamp(MISSING_TIME) is None
+    # Dates before the epoch are negative, but not missing.
+    assert from_timestamp(to_timestamp(datetime.datetime(1960, 1, 1))) is not None
+
+
+def test_stores_sdk_properties():
+    tags = TagStore(
+        [
+            ArtifactTagProperties(
+                name="v1", digest=DIGEST, created_on=BASE, last_updated_on=None
+            )
+        ]
+    )
+
+    assert tags[0].name == "v1"
+    assert tags[0].digest == DIGEST
+    assert tags[0].created_on == BASE
+    assert tags[0].last_updated_on is None
+    assert tags[-1].name == "v1"
+    assert tags[0].properties("repo").repository_name == "repo"
+
+
+def test_keeps_digests_that_are_not_sha256():
+    tags = make_tags()
+
+    assert [tag.digest for tag in tags] == [
+        DIGEST,
+        "sha256:" + "01" * 32,
+        "md5:not-a-sha256",
+        None,
+    ]
+
+
+def test_find():
+    tags = make_tags()
+
+    assert tags.find("v1") == 3
+    assert tags.find("v10") == 1
+    assert tags.find("latest") == 2
+    # Names are only matched whole.
+    assert tags.find("v") is None
+    assert tags.find("0") is None
+    assert TagStore().find("v1") is None
+
+
+def test_sort_order():
+    tags = make_tags()
+
+    assert list(tags.sort_order(tags.sort_key("tag"))) == [2, 3, 1, 0]
+    assert list(tags.sort_order(tags.sort_key("created"))) == [3, 1, 0, 2]
+    # Missing timestamps sort first.
+    assert list(tags.sort_order(tags.sort_key("updated"))) == [1, 3, 2, 0]
+    # Digests that are not SHA-256 hashes are stored as zeros.
+    assert list(tags.sort_order(tags.sort_key("digest"))) == [2, 3, 1, 0]
+    # Sorting does not move the tags.
+    assert [tag.name for tag in tags] == ["v2", "v10", "latest", "v1"]
+
+
+def test_latest():
+    tags = make_tags()
+
+    # Tags that were never updated fall back to when they were created.
+    assert [tag.name for tag in tags.latest(3)] == ["v2", "latest", "v10"]
+    assert len(tags.latest(10)) == 4
+    assert len(TagStore().latest(3)) == 0
+
+
+def test_dicts_round_trip():
+    tags = make_tags()
+    tags.append(TagRecord("old", DIGEST, to_timestamp(BASE), to_timestamp(BASE)))
+
+    # The dictionaries are stored as JSON in the on-disk cache.
+    restored = TagStore.from_dicts(json.loads(json.dumps(tags.to_dicts())))
+
+    assert [(tag.name, tag.digest, tag.created, tag.updated) for tag in restored] == [
+        (tag.name, tag.digest, tag.created, tag.updated) for tag in tags
+    ]
+    assert tags.to_dicts()[-1]["created_on"] == "2024-01-01T00:00:00+00:00"
+    assert tags.to_dicts()[1]["last_updated_on"] is None